@@ -0,0 +1,235 @@
+"""In-process stand-in for the gateway CLI, systemctl and the process tools.
+
+Usage: python bench/cmd_simulator.py [--port 7843] [OPTS]
+
+Serves the dashboard with spawn() routed through CommandSimulator, so the
+endpoints that shell out (status, channels, gateway control, agent
+messages) can be exercised and load-tested on a host without the real
+binaries. OPTS is a comma-separated list such as agent_ms=1500,seed=1
+(see DEFAULTS). bench/endpoints.py --simulate installs the same backend.
+Any command not emulated here behaves as not installed.
+"""
+import argparse
+import collections
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import dashboard  # noqa: E402
+
+DEFAULTS = {
+    'delay_ms': 5.0,        # base latency of every simulated command
+    'jitter': 0.2,          # +/- fraction applied to each delay
+    'channels_ms': 300.0,   # `openclaw channels status`
+    'agent_ms': 800.0,      # `openclaw agent` time to first output
+    'chunks': 8,            # `openclaw agent` output chunks
+    'chunk_ms': 50.0,       # delay between chunks
+    'fail_rate': 0.0,       # probability a command exits 1
+    'hang_rate': 0.0,       # probability a command runs into its timeout
+    'seed': None,
+}
+REPLY_WORDS = ('acknowledged checking the queue now task is scheduled results look good '
+               'deploy finished report attached no further action needed').split()
+
+
+def parse_options(text):
+    """'agent_ms=1500,fail_rate=0.1' -> dict of typed options (unknown keys are an error)."""
+    opts = {}
+    for item in filter(None, (p.strip() for p in text.split(','))):
+        key, _, value = item.partition('=')
+        key = key.strip()
+        if key not in DEFAULTS:
+            raise ValueError(f'unknown simulator option: {key}')
+        opts[key] = int(value) if key in ('chunks', 'seed') else float(value)
+    return opts
+
+
+class CommandSimulator:
+    """Stand-in for subprocess.run covering the commands the dashboard issues."""
+
+    def __init__(self, **options):
+        self.options = {**DEFAULTS, **options}
+        self._rng = random.Random(self.options['seed'])
+        self._lock = threading.Lock()
+        self.gateway_active = True
+        self.gateway_pid = 40000 + self._rng.randrange(20000)
+        self.gateway_since = time.time()
+        self.calls = collections.Counter()
+
+    def _roll(self, rate):
+        with self._lock:
+            return rate > 0 and self._rng.random() < rate
+
+    def _delay(self, ms):
+        with self._lock:
+            jitter = 1 + self.options['jitter'] * (2 * self._rng.random() - 1)
+        return max(0.0, ms * jitter / 1000)
+
+    def __call__(self, cmd, input=None, capture_output=False, text=False, timeout=None, check=False, **_kwargs):
+        cmd = [str(c) for c in cmd]
+        name = os.path.basename(cmd[0])
+        with self._lock:
+            self.calls[name] += 1
+        handler = getattr(self, '_cmd_' + name.replace('-', '_'), None)
+        if handler is None:
+            # behave like a host without the binary
+            raise FileNotFoundError(2, 'No such file or directory', cmd[0])
+
+        if self._roll(self.options['hang_rate']):
+            time.sleep(timeout if timeout is not None else 60)
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        if self._roll(self.options['fail_rate']):
+            code, chunks = 1, [(0.0, f'Error: simulated failure of {" ".join(cmd[:3])}\n')]
+        else:
+            code, chunks = handler(cmd[1:])
+
+        # output is produced chunk by chunk; a timeout keeps what was written so far
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        out = []
+        for delay, chunk in [(self._delay(self.options['delay_ms']), '')] + chunks:
+            if deadline is not None and time.monotonic() + delay > deadline:
+                time.sleep(max(0.0, deadline - time.monotonic()))
+                raise subprocess.TimeoutExpired(cmd, timeout, output=self._encode(''.join(out), text))
+            time.sleep(delay)
+            out.append(chunk)
+
+        stdout = self._encode(''.join(out), text) if capture_output else None
+        stderr = self._encode('', text) if capture_output else None
+        if check and code:
+            raise subprocess.CalledProcessError(code, cmd, stdout, stderr)
+        return subprocess.CompletedProcess(cmd, code, stdout, stderr)
+
+    @staticmethod
+    def _encode(out, text):
+        return out if text else out.encode()
+
+    # gateway service state
+
+    def _set_gateway(self, active):
+        with self._lock:
+            if active and not self.gateway_active:
+                self.gateway_pid += 1
+                self.gateway_since = time.time()
+            self.gateway_active = active
+
+    def _gateway_action(self, action):
+        if action == 'restart':
+            self._set_gateway(False)
+        self._set_gateway(action != 'stop')
+
+    # commands
+
+    def _cmd_openclaw(self, args):
+        if args[:2] == ['channels', 'status']:
+            return 0, [(self._delay(self.options['channels_ms']), self._channels_status())]
+        if args[:1] == ['agent']:
+            return self._agent(args[1:])
+        if args[:1] == ['gateway'] and args[1:2] in (['start'], ['stop'], ['restart']):
+            self._gateway_action(args[1])
+            return 0, [(0.0, f'Gateway {args[1]} requested.\n')]
+        return 1, [(0.0, f"error: unknown command '{' '.join(args[:2])}'\n")]
+
+    def _channels_status(self):
+        cfg = dashboard.load_config()
+        accounts = cfg.get('channels', {}).get('telegram', {}).get('accounts', {})
+        lines = ['Gateway reachable.' if self.gateway_active else 'Gateway not reachable.']
+        for i, (name, acc) in enumerate(sorted(accounts.items())):
+            enabled = acc.get('enabled', False)
+            parts = ['enabled' if enabled else 'disabled']
+            if enabled and self.gateway_active:
+                parts += ['running', f'in:{i + 1}m ago', f'out:{2 * i + 1}m ago']
+            else:
+                parts.append('stopped')
+            lines.append(f'- Telegram {name} ({name}): {", ".join(parts)}')
+        return '\n'.join(lines) + '\n'
+
+    def _agent(self, args):
+        opts = dict(zip(args[::2], args[1::2]))
+        agent_id = opts.get('--agent', '')
+        known = {a.get('id') for a in dashboard.load_config().get('agents', {}).get('list', [])}
+        if agent_id not in known:
+            return 1, [(0.0, f'Error: unknown agent "{agent_id}"\n')]
+        if not self.gateway_active:
+            return 1, [(0.0, 'Error: gateway not reachable\n')]
+        with self._lock:
+            words = [self._rng.choice(REPLY_WORDS) for _ in range(self.options['chunks'] * 4)]
+        chunks = [' '.join(words[i:i + 4]) + ' ' for i in range(0, len(words), 4)]
+        timed = [(self._delay(self.options['agent_ms'] if i == 0 else self.options['chunk_ms']), c)
+                 for i, c in enumerate(chunks)]
+        timed.append((0.0, '\n'))
+        return 0, timed
+
+    def _cmd_systemctl(self, args):
+        args = [a for a in args if a != '--user']
+        action = args[0] if args else ''
+        if action == 'status':
+            return (0 if self.gateway_active else 3), [(0.0, self._systemctl_status())]
+        if action in ('start', 'stop', 'restart'):
+            self._gateway_action(action)
+            return 0, []
+        return 1, [(0.0, f'Unknown command verb {action}.\n')]
+
+    def _systemctl_status(self):
+        since = datetime.fromtimestamp(self.gateway_since).strftime('%a %Y-%m-%d %H:%M:%S')
+        ago = int(time.time() - self.gateway_since)
+        head = [
+            f'● {dashboard.SERVICE_NAME}.service - OpenClaw Gateway',
+            f'     Loaded: loaded ({Path.home()}/.config/systemd/user/{dashboard.SERVICE_NAME}.service; enabled; preset: enabled)',
+        ]
+        if not self.gateway_active:
+            return '\n'.join(head + [f'     Active: inactive (dead) since {since}; {ago}s ago']) + '\n'
+        return '\n'.join(head + [
+            f'     Active: active (running) since {since}; {ago // 60}min {ago % 60}s ago',
+            f'   Main PID: {self.gateway_pid} (openclaw-gatewa)',
+            '      Tasks: 11 (limit: 38169)',
+            '     Memory: 182.4M',
+            '        CPU: 12.345s',
+            f'     CGroup: /user.slice/{dashboard.SERVICE_NAME}.service',
+            f'             └─{self.gateway_pid} openclaw-gateway',
+        ]) + '\n'
+
+    def _cmd_pgrep(self, args):
+        return (0, [(0.0, f'{self.gateway_pid}\n')]) if self.gateway_active else (1, [])
+
+    def _cmd_pkill(self, args):
+        was_active = self.gateway_active
+        self._set_gateway(False)
+        return (0 if was_active else 1), []
+
+    def _cmd_ps(self, args):
+        if not self.gateway_active or str(self.gateway_pid) not in args:
+            return 1, []
+        if 'rss=' in args:
+            return 0, [(0.0, '186816\n')]
+        if 'lstart=' in args:
+            return 0, [(0.0, time.strftime('%a %b %d %H:%M:%S %Y', time.localtime(self.gateway_since)) + '\n')]
+        return 1, []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('options', nargs='?', default='', metavar='OPTS',
+                        help='simulator options, e.g. agent_ms=1500,fail_rate=0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('OPENCLAW_HQ_PORT', 7843)))
+    args = parser.parse_args()
+    try:
+        options = parse_options(args.options)
+    except ValueError as e:
+        parser.error(str(e))
+    dashboard.set_command_backend(CommandSimulator(**options))
+    dashboard._restart_backup_timer()
+    dashboard.start_cron_scheduler()
+    dashboard.start_transcript_archiver()
+    dashboard.start_request_sampler()
+    dashboard.app.run(host='0.0.0.0', port=args.port, debug=False, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+"""Time every read endpoint against a synthetic OpenClaw home and compare with a stored baseline.
+
+Usage: python bench/endpoints.py [--scale small|medium|large] [--repeat 20] [--baseline bench/baseline.json]
+                                 [--save-baseline] [--tolerance 1.3] [--include-cli] [--simulate [OPTS]]
+
+Each endpoint is requested once cold (caches empty) and then --repeat
+times through the Flask test client. Reported per endpoint: cold and
+p50/p95 latency, peak traced allocation of one request, and bytes read
+from sessions/transcript/log files per request (from /metrics counters).
+Exits non-zero when an endpoint regresses past the tolerance against
+the baseline. Endpoints that shell out to the gateway CLI are skipped
+unless --include-cli (real binaries) or --simulate (the in-process
+command simulator of bench/cmd_simulator.py, e.g. --simulate
+agent_ms=1500,seed=1) is given.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import synth_home  # noqa: E402
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+MIN_REGRESSION_MS = 0.5
+
+# (name, url template, needs the openclaw/systemctl CLI)
+ENDPOINTS = [
+    ('status', '/api/status', True),
+    ('system_stats', '/api/system/stats', True),
+    ('channels', '/api/channels', True),
+    ('agents', '/api/agents', False),
+    ('sessions', '/api/sessions', False),
+    ('agent_detail', '/api/agent/{agent}', False),
+    ('agent_profile', '/api/agent/{agent}/profile', False),
+    ('agent_apps', '/api/agent/{agent}/apps', False),
+    ('models', '/api/models', False),
+    ('models_available', '/api/models/available', False),
+    ('providers', '/api/providers', False),
+    ('platforms', '/api/platforms', False),
+    ('settings', '/api/settings', False),
+    ('md_backup_status', '/api/md-backup/status', False),
+    ('tasks', '/api/tasks', False),
+    ('tasks_search', '/api/tasks/search?q=deploy', False),
+    ('tasks_stats', '/api/tasks/stats', False),
+    ('calendar', '/api/calendar', False),
+    ('calendar_month', '/api/calendar?month={month}', False),
+    ('session_messages', '/api/agent/{agent}/sessions/{session}/messages', False),
+    ('session_message', '/api/agent/{agent}/sessions/{session}/messages/10', False),
+    ('search_messages', '/api/search/messages?q=deploy', False),
+    ('latency', '/api/agents/latency', False),
+    ('activity', '/api/activity', False),
+    ('usage', '/api/usage', False),
+    ('hq_settings', '/api/hq/settings', False),
+    ('cron', '/api/cron', False),
+    ('cron_stats', '/api/cron/stats', False),
+    ('cron_upcoming', '/api/cron/upcoming', False),
+    ('logs_recent', '/api/logs/recent', False),
+    ('apps', '/api/apps', False),
+    ('app_bindings', '/api/apps/bindings', False),
+    ('export_agent', '/api/export/sessions?agent={agent}', False),
+]
+
+
+def _bytes_read(dashboard):
+    return sum(v for (name, _labels), v in dashboard._metric_counters.items() if name == 'hq_file_read_bytes_total')
+
+
+def _request(client, url):
+    resp = client.get(url)
+    resp.get_data()
+    resp.close()
+    return resp.status_code
+
+
+def run(client, dashboard, url, repeat):
+    start = time.perf_counter()
+    status = _request(client, url)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    read_before = _bytes_read(dashboard)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _request(client, url)
+        timings.append((time.perf_counter() - start) * 1000)
+    bytes_read = (_bytes_read(dashboard) - read_before) / repeat
+
+    tracemalloc.start()
+    _request(client, url)
+    _size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'status': status,
+        'coldMs': round(cold_ms, 3),
+        'p50Ms': round(statistics.median(timings), 3),
+        'p95Ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'peakKiB': round(peak / 1024, 1),
+        'bytesRead': int(bytes_read),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return [(name, metric, old, new)] for regressions beyond tolerance."""
+    regressions = []
+    for name, cur in results.items():
+        old = baseline.get('results', {}).get(name)
+        if not old:
+            continue
+        if cur['p50Ms'] > old['p50Ms'] * tolerance and cur['p50Ms'] - old['p50Ms'] > MIN_REGRESSION_MS:
+            regressions.append((name, 'p50Ms', old['p50Ms'], cur['p50Ms']))
+        if cur['bytesRead'] > old['bytesRead'] * tolerance and cur['bytesRead'] - old['bytesRead'] > 4096:
+            regressions.append((name, 'bytesRead', old['bytesRead'], cur['bytesRead']))
+        if cur['peakKiB'] > old['peakKiB'] * tolerance and cur['peakKiB'] - old['peakKiB'] > 64:
+            regressions.append((name, 'peakKiB', old['peakKiB'], cur['peakKiB']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    synth_home.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=1.3, help='allowed ratio over baseline')
+    parser.add_argument('--include-cli', action='store_true', help='also time endpoints that run the gateway CLI')
+    parser.add_argument('--simulate', nargs='?', const='seed=1', metavar='OPTS',
+                        help='time CLI endpoints against bench/cmd_simulator.py (e.g. agent_ms=1500,seed=1)')
+    parser.add_argument('--only', help='comma-separated endpoint names')
+    parser.add_argument('--keep', action='store_true', help='keep the generated home for inspection')
+    args = parser.parse_args()
+
+    params = synth_home.params_from_args(args)
+    home = tempfile.mkdtemp(prefix='openclaw-bench-')
+    if not args.keep:
+        atexit.register(shutil.rmtree, home, True)
+    started = time.perf_counter()
+    summary = synth_home.generate(home, **params)
+    print(f"generated {summary['sessions']} sessions ({summary['transcriptBytes'] / 2**20:.1f} MiB transcripts, "
+          f"{summary['logBytes'] / 2**20:.1f} MiB log) in {time.perf_counter() - started:.1f}s under {home}")
+
+    # dashboard resolves its paths from HOME at import time
+    os.environ['HOME'] = home
+    import dashboard  # noqa: E402
+    dashboard.LOG_DIR = Path(summary['logDir'])
+    if args.simulate is not None:
+        import cmd_simulator  # noqa: E402
+        try:
+            options = cmd_simulator.parse_options(args.simulate)
+        except ValueError as e:
+            parser.error(str(e))
+        dashboard.set_command_backend(cmd_simulator.CommandSimulator(**options))
+        args.include_cli = True
+    client = dashboard.app.test_client()
+
+    agent = dashboard.load_config()['agents']['list'][0]['id']
+    fields = {'agent': agent, 'session': sorted(dashboard.load_sessions(agent))[0],
+              'month': date.today().strftime('%Y-%m')}
+    only = set(args.only.split(',')) if args.only else None
+
+    results = {}
+    print(f'{"endpoint":<18} {"status":>6} {"cold ms":>9} {"p50 ms":>8} {"p95 ms":>8} {"peak KiB":>9} {"read KiB":>9}')
+    for name, template, needs_cli in ENDPOINTS:
+        if (only and name not in only) or (needs_cli and not args.include_cli):
+            continue
+        r = results[name] = run(client, dashboard, template.format(**fields), args.repeat)
+        print(f'{name:<18} {r["status"]:>6} {r["coldMs"]:>9.2f} {r["p50Ms"]:>8.2f} {r["p95Ms"]:>8.2f} '
+              f'{r["peakKiB"]:>9.1f} {r["bytesRead"] / 1024:>9.1f}')
+
+    record = {
+        'params': params,
+        'simulator': args.simulate,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    failed = [n for n, r in results.items() if r['status'] >= 400]
+    if failed:
+        print(f"error responses: {', '.join(failed)}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(record, indent=2) + '\n')
+        print(f'baseline saved to {args.baseline}')
+        return 1 if failed else 0
+
+    if not args.baseline.exists():
+        print(f'no baseline at {args.baseline}; run with --save-baseline to create one')
+        return 1 if failed else 0
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get('params') != params:
+        print('warning: baseline was recorded with different generator parameters')
+    regressions = compare(results, baseline, args.tolerance)
+    for name, metric, old, new in regressions:
+        print(f'REGRESSION {name} {metric}: {old} -> {new} ({new / old if old else float("inf"):.2f}x)')
+    if not regressions:
+        print(f'no regressions against {args.baseline} (tolerance {args.tolerance}x)')
+    return 1 if regressions or failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
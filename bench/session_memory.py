@@ -0,0 +1,116 @@
+"""Memory footprint of resident session summaries: raw dicts vs SessionRecord vs columns.
+
+Usage: python bench/session_memory.py [--sessions 200000] [--agents 60]
+"""
+import argparse
+import array
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dashboard import SessionRecord  # noqa: E402
+
+CHANNELS = ['telegram', 'discord', 'whatsapp', 'webchat']
+CHAT_TYPES = ['direct', 'group', 'channel']
+MODELS = ['anthropic/claude-sonnet-4-6', 'openai/gpt-4o', 'minimax/MiniMax-M2.5']
+
+
+def fake_sessions_json(agent_id, count, rng):
+    """Serialized sessions.json content shaped like the gateway writes it."""
+    data = {}
+    for i in range(count):
+        key = f'agent:{agent_id}:{rng.choice(CHANNELS)}:{rng.randrange(10**9)}:{i}'
+        data[key] = {
+            'sessionId': f'{rng.getrandbits(128):032x}',
+            'updatedAt': 1760000000000 + rng.randrange(10**10),
+            'chatType': rng.choice(CHAT_TYPES),
+            'lastChannel': rng.choice(CHANNELS),
+            'model': rng.choice(MODELS),
+            'sessionFile': f'/home/user/.openclaw/agents/{agent_id}/sessions/{rng.getrandbits(64):016x}.jsonl',
+            'inputTokens': rng.randrange(10**6),
+            'outputTokens': rng.randrange(10**5),
+            'totalTokens': rng.randrange(10**6),
+            'contextTokens': 128000,
+        }
+    return json.dumps(data)
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def build_dicts(blobs):
+    store = {}
+    for agent_id, blob in blobs:
+        for key, sess in json.loads(blob).items():
+            store[(agent_id, key)] = sess
+    return store
+
+
+def build_records(blobs):
+    store = {}
+    for agent_id, blob in blobs:
+        for key, sess in json.loads(blob).items():
+            store[(agent_id, key)] = SessionRecord(agent_id, key).update(sess)
+    return store
+
+
+def build_columns(blobs):
+    cols = {
+        'agent': [], 'key': [], 'channel': [], 'chat_type': [], 'model': [],
+        'updated_at': array.array('q'), 'input_tokens': array.array('q'), 'output_tokens': array.array('q'),
+    }
+    for agent_id, blob in blobs:
+        agent_id = sys.intern(agent_id)
+        for key, sess in json.loads(blob).items():
+            cols['agent'].append(agent_id)
+            cols['key'].append(key)
+            cols['channel'].append(sys.intern(sess.get('lastChannel', '')))
+            cols['chat_type'].append(sys.intern(sess.get('chatType', 'direct')))
+            cols['model'].append(sys.intern(sess.get('model', '')))
+            cols['updated_at'].append(sess.get('updatedAt', 0))
+            cols['input_tokens'].append(sess.get('inputTokens', 0))
+            cols['output_tokens'].append(sess.get('outputTokens', 0))
+    return cols
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=200000, help='total sessions across all agents')
+    parser.add_argument('--agents', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    per_agent = max(1, args.sessions // args.agents)
+    blobs = [(f'agent{i}', fake_sessions_json(f'agent{i}', per_agent, rng)) for i in range(args.agents)]
+    total = per_agent * args.agents
+
+    results = []
+    for name, build in (('dict (json.loads)', build_dicts),
+                        ('SessionRecord', build_records),
+                        ('columns (arrays)', build_columns)):
+        obj, size = measure(lambda: build(blobs))
+        results.append((name, size))
+        del obj
+
+    baseline = results[0][1]
+    print(f'{total} sessions across {args.agents} agents')
+    print(f'{"layout":<20} {"resident MiB":>12} {"bytes/session":>14} {"vs dict":>8}')
+    for name, size in results:
+        print(f'{name:<20} {size / 2**20:>12.1f} {size / total:>14.0f} {size / baseline:>7.0%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""Load-test /events: many concurrent SSE subscribers fed by a fake gateway log writer.
+
+Usage: python bench/sse_load.py [--subscribers 500] [--rate 20] [--duration 30] [--rollover-at 15]
+                                [--url http://127.0.0.1:7843 --pid PID]
+
+By default a dashboard instance is started on a free port with its log
+directory pointed at a temp dir; a writer process appends gateway-shaped
+JSON lines tagged with a sequence number and send time. --rollover-at
+switches the writer (and the server's notion of "today") to the next
+day's log file mid-run. With --url an already running instance is used
+instead; the writer then appends to the real /tmp/openclaw log and
+rollover cannot be simulated.
+
+Reports delivery latency percentiles, dropped events (written after a
+subscriber connected but never delivered to it), and the server's RSS,
+thread count and CPU time per subscriber (from /proc, Linux only).
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import re
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlparse
+
+REPO = Path(__file__).resolve().parent.parent
+SEQ_RE = re.compile(rb'\[bench seq=(\d+) t=([\d.]+)\]')
+DELIVERY_GRACE = 2.5
+SUBSYSTEMS = ['gateway', 'agent', 'telegram', 'discord', 'cron', 'tools']
+WORDS = 'message received dispatch tool call completed reply sent session resumed queue flush'.split()
+
+BOOTSTRAP = '''
+import sys
+from pathlib import Path
+sys.path.insert(0, {repo!r})
+import dashboard
+log_dir = Path({log_dir!r})
+date_file = log_dir / '.bench-date'
+dashboard.LOG_DIR = log_dir
+dashboard.today_log = lambda: log_dir / ('openclaw-' + date_file.read_text().strip() + '.log')
+dashboard.app.run(host='127.0.0.1', port={port}, threaded=True)
+'''
+
+
+def _log_name(day):
+    return f"openclaw-{day.strftime('%Y-%m-%d')}.log"
+
+
+def writer(log_dir, rate, duration, rollover_at, date_file):
+    """Append tagged gateway log lines at `rate` per second; optionally move to the next day's file."""
+    rng = random.Random(7)
+    day = date.today()
+    interval = 1.0 / rate
+    start = time.time()
+    seq = 0
+    rolled = False
+    f = open(Path(log_dir) / _log_name(day), 'a')
+    try:
+        while time.time() - start < duration:
+            if rollover_at and not rolled and time.time() - start >= rollover_at and date_file:
+                rolled = True
+                day += timedelta(days=1)
+                f.close()
+                f = open(Path(log_dir) / _log_name(day), 'a')
+                Path(date_file).write_text(day.strftime('%Y-%m-%d'))
+            now = time.time()
+            text = ' '.join(rng.choices(WORDS, k=rng.randint(4, 20)))
+            f.write(json.dumps({
+                '0': f'{text} [bench seq={seq} t={now:.6f}]',
+                '_meta': {'logLevelName': 'INFO', 'name': rng.choice(SUBSYSTEMS)},
+                'time': datetime.fromtimestamp(now).isoformat(timespec='milliseconds'),
+            }) + '\n')
+            f.flush()
+            seq += 1
+            time.sleep(max(0.0, start + seq * interval - time.time()))
+    finally:
+        f.close()
+
+
+def written_events(log_dir):
+    """{seq: send_time} for every tagged line in the log directory."""
+    events = {}
+    for path in Path(log_dir).glob('openclaw-*.log'):
+        with open(path, 'rb') as f:
+            for line in f:
+                m = SEQ_RE.search(line)
+                if m:
+                    events[int(m[1])] = float(m[2])
+    return events
+
+
+def proc_stats(pid):
+    """(rss_bytes, threads, cpu_seconds) of a process, or None off Linux."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            status = dict(line.split(':', 1) for line in f if ':' in line)
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+    except OSError:
+        return None
+    ticks = os.sysconf('SC_CLK_TCK')
+    rss = int(status['VmRSS'].split()[0]) * 1024
+    return rss, int(status['Threads']), (int(fields[11]) + int(fields[12])) / ticks
+
+
+async def subscribe(host, port, result):
+    """Hold one /events connection; record connect time, seen sequence numbers and latencies."""
+    reader, writer_ = await asyncio.open_connection(host, port)
+    try:
+        # HTTP/1.0 so the stream is not chunk-encoded
+        writer_.write(f'GET /events HTTP/1.0\r\nHost: {host}\r\nAccept: text/event-stream\r\n\r\n'.encode())
+        await writer_.drain()
+        status = await reader.readline()
+        if b' 200 ' not in status:
+            raise ConnectionError(status.decode(errors='replace').strip())
+        while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        result['connectedAt'] = time.time()
+        while True:
+            line = await reader.readline()
+            if not line:
+                result['closed'] = True
+                return
+            m = SEQ_RE.search(line)
+            if m:
+                result['seen'].add(int(m[1]))
+                result['latencies'].append(time.time() - float(m[2]))
+    finally:
+        writer_.close()
+
+
+async def run_load(host, port, args, pid):
+    results = [{'seen': set(), 'latencies': [], 'connectedAt': None, 'closed': False, 'error': None}
+               for _ in range(args.subscribers)]
+
+    async def guarded(result):
+        try:
+            await subscribe(host, port, result)
+        except (OSError, ConnectionError) as e:
+            result['error'] = str(e)
+
+    tasks = []
+    ramp_start = time.time()
+    for i, result in enumerate(results):
+        tasks.append(asyncio.create_task(guarded(result)))
+        await asyncio.sleep(max(0.0, ramp_start + (i + 1) / args.ramp - time.time()))
+    await asyncio.sleep(1.0)
+
+    samples = []
+    before = proc_stats(pid) if pid else None
+    window_start = time.time()
+    proc = multiprocessing.Process(target=writer, args=(args.log_dir, args.rate, args.duration, args.rollover_at,
+                                                        args.date_file))
+    proc.start()
+    while proc.is_alive():
+        if pid:
+            stats = proc_stats(pid)
+            if stats:
+                samples.append(stats)
+        await asyncio.sleep(1.0)
+    proc.join()
+    await asyncio.sleep(DELIVERY_GRACE)
+    after = proc_stats(pid) if pid else None
+    window = time.time() - window_start
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return results, samples, before, after, window, window_start
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q))]
+
+
+def report(results, events, samples, before, after, window, write_end):
+    connected = [r for r in results if r['connectedAt']]
+    errors = [r['error'] for r in results if r['error']]
+    expected = delivered = 0
+    for r in connected:
+        want = {s for s, t in events.items() if t >= r['connectedAt'] + 1.0 and t <= write_end}
+        expected += len(want)
+        delivered += len(want & r['seen'])
+    latencies = sorted(x for r in connected for x in r['latencies'])
+
+    print(f'subscribers: {len(connected)} connected, {len(errors)} failed, '
+          f"{sum(1 for r in connected if r['closed'])} closed by server")
+    if errors:
+        print(f'  first error: {errors[0]}')
+    print(f'events written: {len(events)}; deliveries expected {expected}, delivered {delivered}, '
+          f'dropped {expected - delivered} ({(expected - delivered) / expected if expected else 0:.2%})')
+    print('delivery latency ms: ' + ', '.join(
+        f'{name} {percentile(latencies, q) * 1000:.0f}' for name, q in
+        (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))))
+    if before and after and samples:
+        cpu = after[2] - before[2]
+        print(f'server: RSS {before[0] / 2**20:.0f} -> peak {max(s[0] for s in samples) / 2**20:.0f} MiB, '
+              f'threads peak {max(s[1] for s in samples)}, CPU {cpu / window:.1%} of a core, '
+              f'{cpu / window / max(len(connected), 1) * 1000:.3f}‰ of a core per subscriber')
+    else:
+        print('server stats unavailable (no --pid, or not Linux)')
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(host, port, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f'dashboard did not start on {host}:{port}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--rate', type=float, default=20, help='log lines per second')
+    parser.add_argument('--duration', type=float, default=30, help='seconds of log writing')
+    parser.add_argument('--ramp', type=float, default=200, help='new connections per second')
+    parser.add_argument('--rollover-at', type=float, default=0, help='seconds into the run to switch day (0 = off)')
+    parser.add_argument('--url', help='use a running instance instead of starting one')
+    parser.add_argument('--pid', type=int, help='server pid for RSS/thread/CPU stats with --url')
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if args.subscribers + 64 > hard:
+        print(f'warning: open file limit {hard} is below the subscriber count')
+
+    server = None
+    scratch = []
+    if args.url:
+        url = urlparse(args.url)
+        host, port, pid = url.hostname, url.port or 80, args.pid
+        args.log_dir, args.date_file = '/tmp/openclaw', None
+        Path(args.log_dir).mkdir(parents=True, exist_ok=True)
+        if args.rollover_at:
+            print('warning: --rollover-at needs a bench-started server; ignored')
+            args.rollover_at = 0
+    else:
+        host, port = '127.0.0.1', _free_port()
+        args.log_dir = tempfile.mkdtemp(prefix='openclaw-sse-')
+        scratch.append(args.log_dir)
+        args.date_file = os.path.join(args.log_dir, '.bench-date')
+        Path(args.date_file).write_text(date.today().strftime('%Y-%m-%d'))
+        (Path(args.log_dir) / _log_name(date.today())).touch()
+        scratch.append(tempfile.mkdtemp(prefix='openclaw-sse-home-'))
+        env = {**os.environ, 'HOME': scratch[-1]}
+        server = subprocess.Popen(
+            [sys.executable, '-c', BOOTSTRAP.format(repo=str(REPO), log_dir=args.log_dir, port=port)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        pid = server.pid
+        _wait_for_port(host, port)
+
+    try:
+        print(f'{args.subscribers} subscribers on {host}:{port}, {args.rate:g} lines/s for {args.duration:g}s'
+              + (f', day rollover at {args.rollover_at:g}s' if args.rollover_at else ''))
+        results, samples, before, after, window, window_start = asyncio.run(run_load(host, port, args, pid))
+        events = {s: t for s, t in written_events(args.log_dir).items() if t >= window_start}
+        write_end = max(events.values(), default=0)
+        report(results, events, samples, before, after, window, write_end)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        for path in scratch:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""Generate a synthetic OpenClaw home laid out the way dashboard.py reads it.
+
+Usage: python bench/synth_home.py DEST [--agents 20] [--sessions 40] [--messages 100] [--log-lines 20000] ...
+
+Writes DEST/.openclaw/ (config, agents, sessions, transcripts, hq stores,
+cron jobs) and DEST/logs/openclaw-<today>.log. Run the dashboard with
+HOME=DEST and point LOG_DIR at DEST/logs.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+CHANNELS = ['telegram', 'discord', 'whatsapp', 'webchat']
+CHAT_TYPES = ['direct', 'group']
+MODELS = {
+    'anthropic': [('claude-sonnet-4-6', 3.0, 15.0), ('claude-haiku-4-5', 1.0, 5.0)],
+    'openai': [('gpt-4o', 2.5, 10.0), ('gpt-4o-mini', 0.15, 0.6)],
+}
+APPS = ['github', 'gitlab', 'jira', 'linear', 'sentry']
+MODES = ['read_only', 'write_only', 'read_write', 'event_listener', 'action_trigger']
+PROFILE_FILES = ['IDENTITY.md', 'SOUL.md', 'MEMORY.md', 'TOOLS.md']
+SUBSYSTEMS = ['gateway', 'agent', 'telegram', 'discord', 'cron', 'tools']
+LEVELS = ['INFO'] * 8 + ['DEBUG', 'WARN', 'ERROR']
+WORDS = ('deploy database migration frontend review bug invoice report urgent cleanup '
+         'backup schedule customer release metrics latency queue worker config token').split()
+
+SCALES = {
+    'small': dict(agents=5, sessions=10, messages=50, log_lines=5000, tasks=100, events=50, bindings=20, cron_jobs=5),
+    'medium': dict(agents=20, sessions=40, messages=100, log_lines=20000, tasks=500, events=200, bindings=100,
+                   cron_jobs=20),
+    'large': dict(agents=60, sessions=150, messages=200, log_lines=100000, tasks=5000, events=1000, bindings=300,
+                  cron_jobs=60),
+}
+
+
+def _text(rng, chars):
+    words = []
+    size = 0
+    while size < chars:
+        w = rng.choice(WORDS)
+        words.append(w)
+        size += len(w) + 1
+    return ' '.join(words)
+
+
+def _iso(ms):
+    return datetime.fromtimestamp(ms / 1000).isoformat(timespec='milliseconds')
+
+
+def _write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+
+
+def _write_transcript(path, rng, messages, message_chars, start_ms, provider, model):
+    ts = start_ms
+    with open(path, 'w') as f:
+        f.write(json.dumps({'type': 'session', 'version': 3, 'timestamp': _iso(ts)}) + '\n')
+        for i in range(messages):
+            ts += rng.randint(5, 600) * 1000
+            if i % 2 == 0:
+                msg = {'role': 'user', 'content': [{'type': 'text', 'text': _text(rng, message_chars // 2)}],
+                       'timestamp': ts}
+            else:
+                msg = {'role': 'assistant', 'content': [{'type': 'text', 'text': _text(rng, message_chars)}],
+                       'provider': provider, 'model': model, 'timestamp': ts,
+                       'usage': {'input': rng.randint(200, 8000), 'output': rng.randint(20, 1500)}}
+            f.write(json.dumps({'type': 'message', 'timestamp': _iso(ts), 'message': msg}) + '\n')
+    return ts
+
+
+def generate(home, agents=20, sessions=40, messages=100, message_chars=300, log_lines=20000, tasks=500,
+             events=200, bindings=100, cron_jobs=20, days=30, seed=1):
+    """Build the tree under `home` and return a summary including the log directory."""
+    rng = random.Random(seed)
+    home = Path(home)
+    oc = home / '.openclaw'
+    now_ms = int(time.time() * 1000)
+    span_ms = days * 86400 * 1000
+
+    agent_list = []
+    for i in range(agents):
+        provider = rng.choice(sorted(MODELS))
+        model = rng.choice(MODELS[provider])[0]
+        agent_list.append({'id': f'agent{i:03d}', 'name': f'Agent {i}', 'model': {'primary': f'{provider}/{model}'}})
+
+    cfg = {
+        'agents': {'list': agent_list},
+        'bindings': [{'agentId': a['id'], 'channel': rng.choice(CHANNELS), 'accountId': f'acct{n}'}
+                     for n, a in enumerate(agent_list)],
+        'models': {'providers': {
+            p: {'models': [{'id': m, 'cost': {'input': ci, 'output': co}} for m, ci, co in ms]}
+            for p, ms in MODELS.items()
+        }},
+        'apps': {
+            'registry': {a: {'enabled': True} for a in APPS},
+            'bindings': [],
+        },
+    }
+    seen = set()
+    while len(cfg['apps']['bindings']) < min(bindings, agents * len(APPS)):
+        pair = (rng.choice(agent_list)['id'], rng.choice(APPS))
+        if pair not in seen:
+            seen.add(pair)
+            cfg['apps']['bindings'].append({'agentId': pair[0], 'appId': pair[1], 'mode': rng.choice(MODES)})
+    _write_json(oc / 'openclaw.json', cfg)
+
+    transcript_bytes = 0
+    for agent in agent_list:
+        adir = oc / 'agents' / agent['id']
+        (adir / 'agent').mkdir(parents=True, exist_ok=True)
+        for fname in PROFILE_FILES:
+            (adir / 'agent' / fname).write_text(f"# {fname[:-3].title()}\n\n{_text(rng, 600)}\n")
+        sdir = adir / 'sessions'
+        sdir.mkdir(parents=True, exist_ok=True)
+        provider, model = agent['model']['primary'].split('/', 1)
+        store = {}
+        for s in range(sessions):
+            session_id = f'{rng.getrandbits(128):032x}'
+            sf = sdir / f'{session_id}.jsonl'
+            channel = rng.choice(CHANNELS)
+            start = now_ms - rng.randrange(span_ms)
+            last = _write_transcript(sf, rng, messages, message_chars, start, provider, model)
+            transcript_bytes += sf.stat().st_size
+            store[f"agent:{agent['id']}:{channel}:{s}"] = {
+                'sessionId': session_id,
+                'sessionFile': str(sf),
+                'updatedAt': last,
+                'chatType': rng.choice(CHAT_TYPES),
+                'lastChannel': channel,
+                'model': model,
+                'inputTokens': rng.randint(10**4, 10**6),
+                'outputTokens': rng.randint(10**3, 10**5),
+                'totalTokens': 0,
+                'contextTokens': 200000,
+            }
+        _write_json(sdir / 'sessions.json', store)
+
+    today = datetime.now().date()
+    _write_json(oc / 'hq' / 'tasks.json', {
+        'tasks': [{
+            'id': f't_{i + 1}',
+            'title': _text(rng, 40),
+            'description': _text(rng, 200),
+            'assignedTo': rng.choice(agent_list)['id'],
+            'createdBy': 'user',
+            'priority': rng.choice(['low', 'medium', 'high']),
+            'status': rng.choice(['pending', 'in_progress', 'completed']),
+            'hours': rng.randint(0, 8),
+            'createdAt': _iso(now_ms - rng.randrange(span_ms))[:19],
+            'updatedAt': _iso(now_ms)[:19],
+            'dueDate': (today + timedelta(days=rng.randint(-10, 30))).isoformat(),
+            'completedAt': None,
+        } for i in range(tasks)],
+        'nextId': tasks + 1,
+    })
+    _write_json(oc / 'hq' / 'calendar.json', {
+        'events': [{
+            'id': f'e_{i + 1}',
+            'title': _text(rng, 30),
+            'description': '',
+            'date': (today + timedelta(days=rng.randint(-60, 60))).isoformat(),
+            'time': f'{rng.randint(0, 23):02d}:{rng.choice([0, 15, 30, 45]):02d}',
+            'agentId': rng.choice(agent_list)['id'] if rng.random() < 0.8 else 'all',
+            'type': rng.choice(['reminder', 'meeting', 'deadline']),
+            'rrule': rng.choice(['FREQ=DAILY', 'FREQ=WEEKLY;BYDAY=MO,WE,FR', 'FREQ=MONTHLY;COUNT=12'])
+            if rng.random() < 0.2 else '',
+            'createdBy': 'user',
+            'createdAt': _iso(now_ms)[:19],
+        } for i in range(events)],
+        'nextId': events + 1,
+    })
+    _write_json(oc / 'cron' / 'jobs.json', {
+        'version': 1,
+        'jobs': [{
+            'id': f'c_{i + 1}',
+            'name': f'job {i}',
+            'agentId': rng.choice(agent_list)['id'],
+            'schedule': rng.choice(['*/15 * * * *', '0 9 * * 1-5', '@hourly', '30 2 * * *']),
+            'message': _text(rng, 60),
+            'enabled': rng.random() < 0.9,
+            'createdAt': _iso(now_ms)[:19],
+        } for i in range(cron_jobs)],
+        'nextId': cron_jobs + 1,
+    })
+
+    log_dir = home / 'logs'
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_path = log_dir / f"openclaw-{today.strftime('%Y-%m-%d')}.log"
+    with open(log_path, 'w') as f:
+        ts = now_ms - log_lines * 100
+        for _ in range(log_lines):
+            ts += rng.randint(1, 200)
+            f.write(json.dumps({
+                '0': _text(rng, rng.randint(30, 250)),
+                '_meta': {'logLevelName': rng.choice(LEVELS), 'name': rng.choice(SUBSYSTEMS), 'date': _iso(ts)},
+                'time': _iso(ts),
+            }) + '\n')
+
+    return {
+        'home': str(home),
+        'logDir': str(log_dir),
+        'agents': agents,
+        'sessions': agents * sessions,
+        'transcriptBytes': transcript_bytes,
+        'logBytes': os.path.getsize(log_path),
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument('--scale', choices=sorted(SCALES), default='medium', help='preset; flags below override it')
+    for name in ('agents', 'sessions', 'messages', 'log_lines', 'tasks', 'events', 'bindings', 'cron_jobs'):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=int, dest=name)
+    parser.add_argument('--message-chars', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def params_from_args(args):
+    params = dict(SCALES[args.scale])
+    params.update({k: getattr(args, k) for k in params if getattr(args, k) is not None})
+    params['message_chars'] = args.message_chars
+    params['seed'] = args.seed
+    return params
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('dest')
+    add_arguments(parser)
+    args = parser.parse_args()
+    summary = generate(args.dest, **params_from_args(args))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,35 @@
+import array
+import bisect
+import collections
+import contextlib
+import contextvars
+import cProfile
+import functools
+import gzip
+import hashlib
+import heapq
+import hmac
+import io
+import itertools
 import json
+import math
 import os
 import platform
+import pstats
 import re
 import shutil
+import sqlite3
 import subprocess
+import sys
+import tarfile
 import threading
 import time
-from datetime import datetime
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
-from flask import Flask, Response, jsonify, render_template, request
+from flask import Flask, Response, g, jsonify, render_template, request, stream_with_context
 
 app = Flask(__name__)
 IS_MACOS = platform.system() == 'Darwin'
@@ -23,12 +43,52 @@ HQ_DIR = Path.home() / '.openclaw' / 'hq'
 TASKS_PATH = HQ_DIR / 'tasks.json'
 CALENDAR_PATH = HQ_DIR / 'calendar.json'
 HQ_SETTINGS_PATH = HQ_DIR / 'settings.json'
+SEARCH_DB_PATH = HQ_DIR / 'search.db'
+PROFILES_DIR = HQ_DIR / 'profiles'
+CRON_JOBS_PATH = Path.home() / '.openclaw' / 'cron' / 'jobs.json'
+CRON_RUNS_PATH = HQ_DIR / 'cron-runs.jsonl'
 
 PROFILE_FILES = ['IDENTITY.md', 'SOUL.md', 'MEMORY.md', 'TOOLS.md']
 
+IO_WORKERS = int(os.environ.get('OPENCLAW_HQ_IO_WORKERS', 16))
+AGENT_SCAN_TIMEOUT = float(os.environ.get('OPENCLAW_HQ_SCAN_TIMEOUT', 5))
+BACKUP_WORKERS = int(os.environ.get('OPENCLAW_HQ_BACKUP_WORKERS', 8))
+TRANSCRIPT_ARCHIVE_DAYS = float(os.environ.get('OPENCLAW_HQ_ARCHIVE_DAYS', 0))
+PROFILING_ENABLED = os.environ.get('OPENCLAW_HQ_PROFILING', '') not in ('', '0')
+SLOW_REQUEST_MS = float(os.environ.get('OPENCLAW_HQ_SLOW_MS', 2000))
+PROFILE_RING_SIZE = int(os.environ.get('OPENCLAW_HQ_PROFILE_RING', 50))
+PROFILE_TOKEN = os.environ.get('OPENCLAW_HQ_PROFILE_TOKEN', '')
+TRACE_LOG_PATH = os.environ.get('OPENCLAW_HQ_TRACE_LOG', '')
+
 _backup_timer = None
 _backup_lock = threading.Lock()
 
+_io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='io')
+
+_calendar_index = None
+_calendar_index_lock = threading.Lock()
+
+_task_index = None
+_task_index_lock = threading.Lock()
+
+_app_bindings_index = None
+_app_bindings_index_lock = threading.Lock()
+
+_search_index_lock = threading.Lock()
+_search_indexed_sigs = {}  # (search db, transcript path) -> _transcript_sig() as of its last indexing
+
+_line_indexes = collections.OrderedDict()
+_line_indexes_lock = threading.Lock()
+_archive_indexes = {}
+_archive_lock = threading.RLock()
+_archive_timer = None
+
+_transcript_consumers = []
+_transcript_reconcilers = []
+_transcript_offsets = {}
+_session_records = {}    # (agent, session_key) -> SessionRecord
+_transcript_lock = threading.Lock()
+
 BOT_NAMES = {
     'kate': '@KateAdler_Bot',
     'main': '@Tom_MiniM_Bot',
@@ -126,20 +186,38 @@ APP_ICONS = {
 
 
 def load_config():
-    try:
-        return json.loads(CONFIG_PATH.read_text())
-    except Exception:
-        return {}
+    metric_inc('hq_load_config_total')
+    with span('config.load') as sp:
+        try:
+            raw = CONFIG_PATH.read_bytes()
+            sp.set(bytes=len(raw))
+            return json.loads(raw)
+        except Exception:
+            return {}
 
 
 def save_config(cfg):
-    CONFIG_PATH.write_text(json.dumps(cfg, indent=2, ensure_ascii=False))
+    global _app_bindings_index
+    raw = json.dumps(cfg, indent=2, ensure_ascii=False).encode()
+    with span('config.save', bytes=len(raw)):
+        CONFIG_PATH.write_bytes(raw)
+    with _app_bindings_index_lock:
+        _app_bindings_index = None
 
 
 def _ensure_hq():
     HQ_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _file_sig(path):
+    """Cheap change detector for JSON stores: (mtime_ns, size) or None if missing."""
+    try:
+        st = path.stat()
+        return (st.st_mtime_ns, st.st_size)
+    except OSError:
+        return None
+
+
 def load_tasks():
     _ensure_hq()
     try:
@@ -162,8 +240,11 @@ def load_calendar():
 
 
 def save_calendar(data):
+    global _calendar_index
     _ensure_hq()
     CALENDAR_PATH.write_text(json.dumps(data, indent=2, ensure_ascii=False))
+    with _calendar_index_lock:
+        _calendar_index = None
 
 
 HQ_SETTINGS_DEFAULTS = {
@@ -187,15 +268,366 @@ def save_hq_settings(data):
     HQ_SETTINGS_PATH.write_text(json.dumps(data, indent=2, ensure_ascii=False))
 
 
-def run_cmd(cmd, timeout=10):
+def load_sessions(agent_id):
+    """Return an agent's sessions.json as a dict ({} if missing or unreadable)."""
+    with span('sessions.read', agent=agent_id) as sp:
+        try:
+            raw = (AGENTS_DIR / agent_id / 'sessions' / 'sessions.json').read_bytes()
+            metric_inc('hq_file_read_bytes_total', len(raw), kind='sessions')
+            sp.set(bytes=len(raw))
+            return json.loads(raw)
+        except Exception:
+            return {}
+
+
+TOKEN_COUNT_MAX = 1 << 53
+TRANSCRIPT_TS_MIN_MS = 946684800000  # 2000-01-01T00:00:00Z
+
+
+class SessionRecord:
+    """Compact resident summary of one sessions.json entry.
+
+    Strings that repeat across sessions (agent, channel, chat type, model)
+    are interned and timestamps are integer epoch milliseconds, so a
+    fleet-wide index costs a fixed slot layout per session instead of a
+    full dict. The counted_* and pending_user_ts slots carry the running
+    state of the transcript consumers.
+    """
+    __slots__ = ('agent', 'key', 'channel', 'chat_type', 'model', 'updated_at', 'session_file',
+                 'input_tokens', 'output_tokens', 'counted_input', 'counted_output', 'pending_user_ts')
+
+    def __init__(self, agent, key):
+        self.agent = sys.intern(agent)
+        self.key = key
+        self.channel = ''
+        self.chat_type = 'direct'
+        self.model = ''
+        self.updated_at = 0
+        self.session_file = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.counted_input = 0
+        self.counted_output = 0
+        self.pending_user_ts = None
+
+    def update(self, sess):
+        """Refresh the metadata fields from a raw sessions.json entry."""
+        self.channel = sys.intern(str(sess.get('lastChannel') or ''))
+        self.chat_type = sys.intern(str(sess.get('chatType') or 'direct'))
+        self.model = sys.intern(str(sess.get('model') or ''))
+        self.updated_at = _to_ms(sess.get('updatedAt')) or 0
+        sf = sess.get('sessionFile')
+        self.session_file = sf if isinstance(sf, str) and sf else None
+        self.input_tokens = _token_count(sess.get('inputTokens')) or 0
+        self.output_tokens = _token_count(sess.get('outputTokens')) or 0
+        return self
+
+
+def _token_count(value):
+    """A token count as a non-negative int, or None if the field is malformed."""
+    if value is None or value == '':
+        return 0
     try:
-        result = subprocess.run(
-            cmd, capture_output=True, text=True, timeout=timeout,
-            env={**os.environ}
-        )
-        return result.stdout + result.stderr
-    except Exception as e:
-        return str(e)
+        count = int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return count if 0 <= count < TOKEN_COUNT_MAX else None
+
+
+def _plausible_ms(ms):
+    """ms if it is a transcript-era epoch timestamp (2000-01-01 up to a day ahead), else None."""
+    if ms is None or not TRANSCRIPT_TS_MIN_MS <= ms <= time.time() * 1000 + 86400000:
+        return None
+    return ms
+
+
+def _message_text(content):
+    """Join the text parts of a transcript message's content."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return '\n'.join(c.get('text', '') for c in content if isinstance(c, dict) and c.get('type') == 'text')
+    return ''
+
+
+def _to_ms(value, end_of_day=False):
+    """Normalize a timestamp (epoch s/ms number or ISO string) to epoch milliseconds.
+
+    With end_of_day, a bare date (YYYY-MM-DD) maps to its last millisecond so
+    it can serve as an inclusive upper bound.
+    """
+    if value is None or value == '':
+        return None
+    if end_of_day and isinstance(value, str) and len(value) == 10:
+        try:
+            day = datetime.combine(date.fromisoformat(value), datetime.min.time())
+        except ValueError:
+            pass
+        else:
+            return int((day + timedelta(days=1)).timestamp() * 1000) - 1
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is not None:
+        if not math.isfinite(number):
+            return None
+        return int(number if number > 1e11 else number * 1000)
+    if not isinstance(value, str):
+        return None
+    try:
+        return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() * 1000)
+    except (ValueError, OverflowError):
+        return None
+
+
+def _iter_lines_reverse(path, block_size=65536, opener=None, kind=None):
+    """Yield the lines of a file from last to first, reading fixed-size blocks from the end.
+
+    With kind set, the read is accounted in /metrics and the request trace.
+    """
+    started = time.perf_counter()
+    with (opener(path) if opener else open(path, 'rb')) as f:
+        f.seek(0, os.SEEK_END)
+        pos = end = f.tell()
+        tail = b''
+        try:
+            while pos > 0:
+                step = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                lines = (f.read(step) + tail).split(b'\n')
+                tail = lines.pop(0)
+                for line in reversed(lines):
+                    if line:
+                        yield line.decode('utf-8', errors='replace')
+            if tail:
+                yield tail.decode('utf-8', errors='replace')
+        finally:
+            if kind:
+                count_read(kind, end - pos, started, path)
+
+
+NDJSON_CHUNK_BYTES = 64 * 1024
+
+
+def wants_ndjson():
+    """True if the client asked for streamed NDJSON (Accept header or ?stream=1)."""
+    return request.args.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', '')
+
+
+def ndjson_response(records):
+    """Stream records as newline-delimited JSON, flushing in chunks as they are produced.
+
+    The first record is sent immediately so clients can start rendering;
+    after that lines are batched into ~64 KB writes.
+    """
+    def generate():
+        buf = []
+        size = 0
+        first = True
+        for record in records:
+            line = json.dumps(record, ensure_ascii=False) + '\n'
+            if first:
+                first = False
+                yield line
+                continue
+            buf.append(line)
+            size += len(line)
+            if size >= NDJSON_CHUNK_BYTES:
+                yield ''.join(buf)
+                buf = []
+                size = 0
+        if buf:
+            yield ''.join(buf)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def request_deadline():
+    """Per-request agent scan deadline in seconds (?timeout=, default AGENT_SCAN_TIMEOUT)."""
+    timeout = request.args.get('timeout', AGENT_SCAN_TIMEOUT, type=float)
+    return min(max(timeout, 0.1), 60.0)
+
+
+## ── TRACING ──
+
+_current_span = contextvars.ContextVar('hq_span', default=None)
+_trace_log_lock = threading.Lock()
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'start', 'duration', 'children')
+
+    def __init__(self, name, attrs, start=None):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter() if start is None else start
+        self.duration = None
+        self.children = []
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self, origin):
+        out = {'name': self.name, 'startMs': round((self.start - origin) * 1000, 3),
+               'ms': round((self.duration or 0) * 1000, 3), **self.attrs}
+        if self.children:
+            out['children'] = [c.to_dict(origin) for c in list(self.children)]
+        return out
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """Time a block as a child of the current span; a no-op outside a request."""
+    parent = _current_span.get()
+    if parent is None:
+        yield _NULL_SPAN
+        return
+    current = Span(name, attrs)
+    parent.children.append(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current_span.reset(token)
+
+
+def record_span(name, started, **attrs):
+    """Attach an already finished leaf span (e.g. a generator's read) to the current span."""
+    parent = _current_span.get()
+    if parent is not None:
+        leaf = Span(name, attrs, started)
+        leaf.duration = time.perf_counter() - started
+        parent.children.append(leaf)
+
+
+def traced(name):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_read(kind, nbytes, started, path):
+    """Account a finished file read in /metrics and the request trace."""
+    metric_inc('hq_file_read_bytes_total', nbytes, kind=kind)
+    record_span(f'{kind}.read', started, bytes=nbytes, path=str(path))
+
+
+def _server_timing(root, elapsed):
+    """Server-Timing header value: spans aggregated by name, plus the total."""
+    agg = {}
+    stack = list(root.children)
+    while stack:
+        sp = stack.pop()
+        entry = agg.setdefault(sp.name, [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += sp.duration or 0
+        entry[2] += sp.attrs.get('bytes', 0)
+        stack.extend(sp.children)
+    parts = []
+    for name, (count, dur, nbytes) in sorted(agg.items(), key=lambda kv: -kv[1][1]):
+        desc = f'{count}x, {nbytes} B' if nbytes else f'{count}x'
+        parts.append(f'{name};dur={dur * 1000:.2f};desc="{desc}"')
+    parts.append(f'total;dur={elapsed * 1000:.2f}')
+    return ', '.join(parts)
+
+
+@app.before_request
+def _trace_before():
+    root = Span('request', {})
+    g.trace = root
+    g.trace_token = _current_span.set(root)
+
+
+@app.after_request
+def _trace_after(response):
+    root = g.get('trace')
+    if root is None:
+        return response
+    root.duration = time.perf_counter() - root.start
+    response.headers['Server-Timing'] = _server_timing(root, root.duration)
+    if TRACE_LOG_PATH:
+        record = {
+            'ts': datetime.now().isoformat(timespec='milliseconds'),
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'route': _metrics_route(),
+            'status': response.status_code,
+            'ms': round(root.duration * 1000, 3),
+            'spans': [c.to_dict(root.start) for c in list(root.children)],
+        }
+        try:
+            with _trace_log_lock, open(TRACE_LOG_PATH, 'a') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError:
+            pass
+    return response
+
+
+@app.teardown_request
+def _trace_teardown(exc):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        _current_span.reset(token)
+
+
+def map_agents(fn, agents, timeout=None):
+    """Run fn(agent) for every agent on the shared I/O pool.
+
+    Returns [(agent, result, error)] in input order. Agents still running
+    when the deadline passes come back with error 'timeout' instead of
+    holding up the whole response; timeout=None waits for all of them.
+    """
+    def run(agent):
+        with span('agent', agent=agent.get('id')):
+            return fn(agent)
+
+    # Each task runs in a copy of the caller's context so its spans land in the request's trace
+    futures = [_io_pool.submit(contextvars.copy_context().run, run, agent) for agent in agents]
+    wait(futures, timeout=timeout)
+    results = []
+    for agent, future in zip(agents, futures):
+        if not future.done():
+            future.cancel()
+            results.append((agent, None, 'timeout'))
+        elif future.exception() is not None:
+            results.append((agent, None, str(future.exception())))
+        else:
+            results.append((agent, future.result(), None))
+    return results
+
+
+def run_cmd_result(cmd, timeout=10):
+    """Run a command and return (exit_code, output); exit_code is None if it never finished."""
+    with span('cmd', argv=' '.join(map(str, cmd[:3]))) as sp:
+        try:
+            result = spawn(
+                cmd, capture_output=True, text=True, timeout=timeout,
+                env={**os.environ}
+            )
+            sp.set(exit=result.returncode)
+            return result.returncode, result.stdout + result.stderr
+        except Exception as e:
+            sp.set(error=str(e))
+            return None, str(e)
+
+
+def run_cmd(cmd, timeout=10):
+    return run_cmd_result(cmd, timeout)[1]
 
 
 def today_log():
@@ -203,8 +635,180 @@ def today_log():
     return LOG_DIR / f'openclaw-{today}.log'
 
 
-def perform_md_backup(target_path):
-    """Copy all .md files from each agent's 'agent' subdirectory to target."""
+MD_BACKUP_CHUNK = 1 << 20
+SNAPSHOT_ID_RE = re.compile(r'^\d{8}T\d{6}(-\d+)?$')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+SNAPSHOT_RETENTION_DEFAULTS = {'hourly': 24, 'daily': 7, 'weekly': 8, 'monthly': 12}
+# retention bucket -> period key of a snapshot's creation time
+SNAPSHOT_PERIODS = {
+    'hourly': lambda t: t.strftime('%Y%m%d%H'),
+    'daily': lambda t: t.strftime('%Y%m%d'),
+    'weekly': lambda t: t.isocalendar()[:2],
+    'monthly': lambda t: t.strftime('%Y%m'),
+}
+
+
+def _blob_path(target, digest):
+    return target / 'blobs' / digest[:2] / digest
+
+
+def _snapshot_path(target, snapshot_id):
+    return target / 'snapshots' / f'{snapshot_id}.json'
+
+
+def list_snapshot_ids(target):
+    """Snapshot ids under target, oldest first."""
+    try:
+        names = os.listdir(target / 'snapshots')
+    except OSError:
+        return []
+    return sorted((n[:-5] for n in names if n.endswith('.json') and SNAPSHOT_ID_RE.match(n[:-5])),
+                  key=_snapshot_order)
+
+
+def load_snapshot(target, snapshot_id):
+    """Snapshot manifest: {'id', 'created', 'files': {'agents/<id>/<rel>': {size, mtime_ns, sha256}}, ...}.
+
+    Raises FileNotFoundError for an unknown id and ValueError for a manifest
+    that is not valid JSON or not shaped like one.
+    """
+    if not isinstance(snapshot_id, str) or not SNAPSHOT_ID_RE.match(snapshot_id):
+        raise FileNotFoundError(snapshot_id)
+    with open(_snapshot_path(target, snapshot_id), encoding='utf-8') as f:
+        snapshot = json.load(f)
+    files = snapshot.get('files') if isinstance(snapshot, dict) else None
+    if not isinstance(files, dict) or not all(
+            isinstance(key, str) and key.startswith('agents/') and isinstance(e, dict)
+            and isinstance(e.get('size'), int) and isinstance(e.get('sha256'), str) and SHA256_RE.match(e['sha256'])
+            for key, e in files.items()):
+        raise ValueError(f'corrupt snapshot manifest: {snapshot_id}')
+    return snapshot
+
+
+def _snapshot_time(snapshot_id):
+    return datetime.strptime(snapshot_id[:15], '%Y%m%dT%H%M%S')
+
+
+def _snapshot_order(snapshot_id):
+    base, _, seq = snapshot_id.partition('-')
+    return base, int(seq or 0)
+
+
+def _next_snapshot_id(ids, now):
+    """Timestamp id that sorts after every existing snapshot, even within the same second."""
+    snapshot_id = now.strftime('%Y%m%dT%H%M%S')
+    if ids and _snapshot_order(snapshot_id) <= _snapshot_order(ids[-1]):
+        base, seq = _snapshot_order(ids[-1])
+        snapshot_id = f'{base}-{seq + 1}'
+    return snapshot_id
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(MD_BACKUP_CHUNK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _store_blob(target, src, digest):
+    """gzip src into the blob store unless that content is already there; returns bytes written."""
+    blob = _blob_path(target, digest)
+    if blob.exists():
+        return 0
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    tmp = blob.with_name(f'{digest}.{threading.get_ident()}.part')
+    with open(src, 'rb') as fin, gzip.open(tmp, 'wb', compresslevel=6) as fout:
+        shutil.copyfileobj(fin, fout, MD_BACKUP_CHUNK)
+    written = tmp.stat().st_size
+    os.replace(tmp, blob)
+    return written
+
+
+def _backup_file(target, src, st, prev, full=False):
+    """Snapshot entry for src; reuses prev's hash when size and mtime are unchanged (unless full).
+
+    Returns (entry, bytes_written, changed).
+    """
+    if (not full and prev and prev.get('size') == st.st_size and prev.get('mtime_ns') == st.st_mtime_ns
+            and _blob_path(target, prev['sha256']).exists()):
+        return prev, 0, False
+    digest = _hash_file(src)
+    written = _store_blob(target, src, digest)
+    entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': digest}
+    return entry, written, not prev or prev.get('sha256') != digest
+
+
+def _retained_snapshots(ids, retention):
+    """Ids to keep: the newest, plus the newest snapshot of each of the last N hours/days/weeks/months."""
+    keep = set(ids[-1:])
+    for bucket, count in retention.items():
+        period_of = SNAPSHOT_PERIODS.get(bucket)
+        if not period_of or not isinstance(count, int) or count <= 0:
+            continue
+        periods = set()
+        for snapshot_id in reversed(ids):
+            period = period_of(_snapshot_time(snapshot_id))
+            if period not in periods:
+                if len(periods) == count:
+                    break
+                periods.add(period)
+                keep.add(snapshot_id)
+    return keep
+
+
+def prune_snapshots(target, retention=None):
+    """Drop snapshots outside the retention policy, then blobs no remaining snapshot references."""
+    retention = {**SNAPSHOT_RETENTION_DEFAULTS, **(retention or {})}
+    ids = list_snapshot_ids(target)
+    keep = _retained_snapshots(ids, retention)
+    removed = 0
+    for snapshot_id in ids:
+        if snapshot_id not in keep:
+            _snapshot_path(target, snapshot_id).unlink()
+            removed += 1
+
+    referenced, unreadable = set(), False
+    for snapshot_id in keep:
+        try:
+            referenced.update(e['sha256'] for e in load_snapshot(target, snapshot_id)['files'].values())
+        except (OSError, ValueError) as e:
+            app.logger.warning('md backup: skipping snapshot %s: %s', snapshot_id, e)
+            unreadable = True
+    blobs_removed = bytes_freed = 0
+    blob_root = target / 'blobs'
+    if unreadable:
+        # its blobs are unknown; collect them once the snapshot falls out of retention
+        app.logger.warning('md backup: blob collection skipped while a retained snapshot is unreadable')
+    elif blob_root.is_dir():
+        for shard in os.scandir(blob_root):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                # leftover .part files of an interrupted run go too
+                if entry.name not in referenced:
+                    bytes_freed += entry.stat().st_size
+                    os.unlink(entry.path)
+                    blobs_removed += 1
+    return {'snapshots_removed': removed, 'blobs_removed': blobs_removed, 'bytes_freed': bytes_freed}
+
+
+@traced('md_backup')
+def perform_md_backup(target_path, full=False, propagate_deletes=None, progress=None, cancel=None):
+    """Snapshot each agent's 'agent' subdirectory .md files into target's content-addressed store.
+
+    target/blobs/ holds one gzip blob per distinct sha256, so unchanged
+    files cost nothing; target/snapshots/<id>.json maps every file to its
+    blob. Files whose size and mtime match the previous snapshot are not
+    read at all; the rest are hashed and stored on a bounded pool. Files
+    whose source is gone are carried forward unless propagate_deletes
+    (default: the md_backup.propagate_deletes setting). full=True rehashes
+    everything. Old snapshots are then pruned per md_backup.retention.
+
+    progress(files_done, files_total, bytes_done, bytes_total) is called as
+    files complete; setting the `cancel` event abandons the run before a
+    snapshot is written (blobs already stored are collected by a later GC).
+    """
     target = Path(target_path)
     if not target.exists():
         return {'ok': False, 'error': 'Target path does not exist'}
@@ -216,56 +820,276 @@ def perform_md_backup(target_path):
         return {'ok': False, 'error': 'Target path is not writable'}
 
     cfg = load_config()
+    backup_cfg = cfg.get('md_backup', {})
+    if propagate_deletes is None:
+        propagate_deletes = backup_cfg.get('propagate_deletes', False)
     agents_list = cfg.get('agents', {}).get('list', [])
-    files_copied = 0
-    agents_done = []
+    ids = list_snapshot_ids(target)
+    previous = {}
+    for snapshot_id in reversed(ids):
+        try:
+            previous = load_snapshot(target, snapshot_id)['files']
+            break
+        except (OSError, ValueError) as e:
+            app.logger.warning('md backup: skipping snapshot %s: %s', snapshot_id, e)
     errors = []
 
-    for agent in agents_list:
-        agent_id = agent['id']
-        agent_src = AGENTS_DIR / agent_id / 'agent'
+    def scan_agent(agent):
+        """[(key, src, stat)] of every .md file in the agent's profile directory."""
+        agent_src = AGENTS_DIR / agent['id'] / 'agent'
         if not agent_src.is_dir():
+            return []
+        return [(f"agents/{agent['id']}/{md_file.relative_to(agent_src).as_posix()}", md_file, md_file.stat())
+                for md_file in agent_src.rglob('*.md')]
+
+    found, scanned = [], set()
+    for agent, outcome, error in map_agents(scan_agent, agents_list):
+        if error:
+            errors.append(f"{agent['id']}: {error}")
             continue
-        agent_copied = 0
-        for md_file in agent_src.rglob('*.md'):
-            rel = md_file.relative_to(agent_src)
-            dest = target / 'agents' / agent_id / rel
+        found.extend(outcome)
+        scanned.add(agent['id'])
+
+    files_total, bytes_total = len(found), sum(st.st_size for _, _, st in found)
+    files_done = bytes_done = 0
+    if progress:
+        progress(files_done, files_total, bytes_done, bytes_total)
+
+    files = {}
+    files_copied = files_skipped = bytes_written = 0
+    agents_done = set()
+    with ThreadPoolExecutor(max_workers=BACKUP_WORKERS, thread_name_prefix='md-backup') as pool:
+        futures = {
+            pool.submit(_backup_file, target, src, st, previous.get(key), full): (key, st.st_size)
+            for key, src, st in found
+        }
+        for future in as_completed(futures):
+            if cancel is not None and cancel.is_set():
+                pool.shutdown(cancel_futures=True)
+                return {'ok': False, 'cancelled': True, 'error': 'Backup cancelled',
+                        'files_done': files_done, 'files_total': files_total}
+            key, size = futures[future]
+            files_done += 1
+            bytes_done += size
+            if progress:
+                progress(files_done, files_total, bytes_done, bytes_total)
             try:
-                dest.parent.mkdir(parents=True, exist_ok=True)
-                shutil.copy2(str(md_file), str(dest))
-                files_copied += 1
-                agent_copied += 1
+                entry, written, changed = future.result()
             except Exception as e:
-                errors.append(f'{agent_id}/{rel}: {e}')
-        if agent_copied > 0:
-            agents_done.append(agent_id)
+                errors.append(f'{key[len("agents/"):]}: {e}')
+                if key in previous:
+                    files[key] = previous[key]
+                continue
+            files[key] = entry
+            bytes_written += written
+            if changed:
+                files_copied += 1
+                agents_done.add(key.split('/')[1])
+            else:
+                files_skipped += 1
 
-    timestamp = datetime.now().isoformat(timespec='seconds')
-    result = {
-        'ok': len(errors) == 0,
+    # files that disappeared since the previous snapshot; agents that failed to scan are kept as they were
+    files_deleted = 0
+    configured = {a['id'] for a in agents_list}
+    for key, entry in previous.items():
+        if key in files:
+            continue
+        agent_id = key.split('/')[1]
+        if propagate_deletes and (agent_id in scanned or agent_id not in configured):
+            files_deleted += 1
+        else:
+            files[key] = entry
+
+    now = datetime.now()
+    snapshot_id = _next_snapshot_id(ids, now)
+    snapshot = {
+        'version': 1,
+        'id': snapshot_id,
+        'created': now.isoformat(timespec='seconds'),
+        'files': files,
+        'stats': {
+            'files': len(files),
+            'bytes': sum(e['size'] for e in files.values()),
+            'bytes_written': bytes_written,
+            'changed': files_copied,
+            'deleted': files_deleted,
+        },
+    }
+    pruned = {}
+    try:
+        path = _snapshot_path(target, snapshot_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp, path)
+        pruned = prune_snapshots(target, backup_cfg.get('retention'))
+    except OSError as e:
+        errors.append(f'snapshot: {e}')
+
+    timestamp = now.isoformat(timespec='seconds')
+    summary = {
+        'snapshot': snapshot_id,
         'files_copied': files_copied,
-        'agents': agents_done,
-        'errors': errors,
-        'timestamp': timestamp,
+        'files_skipped': files_skipped,
+        'files_deleted': files_deleted,
+        'bytes_written': bytes_written,
+        'agents': sorted(agents_done),
+        **pruned,
     }
+    result = {'ok': len(errors) == 0, **summary, 'errors': errors, 'timestamp': timestamp}
 
     cfg = load_config()
     backup_cfg = cfg.setdefault('md_backup', {})
     backup_cfg['last_backup'] = timestamp
-    backup_cfg['last_result'] = {'files_copied': files_copied, 'agents': agents_done, 'ok': result['ok']}
+    backup_cfg['last_result'] = {**summary, 'ok': result['ok']}
     save_config(cfg)
 
     return result
 
 
+def restore_snapshot(target_path, snapshot_id, agent_id, files=None):
+    """Write an agent's files from a snapshot back into its 'agent' directory.
+
+    Files already matching the snapshot (same size and hash) are left
+    alone; `files` limits the restore to those relative paths. Returns
+    counts of restored and unchanged files.
+    """
+    target = Path(target_path)
+    snapshot = load_snapshot(target, snapshot_id)
+    prefix = f'agents/{agent_id}/'
+    agent_dir = (AGENTS_DIR / agent_id / 'agent').resolve()
+    wanted = set(files) if files else None
+    entries = [(k[len(prefix):], e) for k, e in snapshot['files'].items()
+               if k.startswith(prefix) and (wanted is None or k[len(prefix):] in wanted)]
+
+    def restore_one(rel, entry):
+        dest = (agent_dir / rel).resolve()
+        if agent_dir not in dest.parents:
+            raise ValueError(f'{rel}: outside the agent directory')
+        try:
+            if dest.stat().st_size == entry['size'] and _hash_file(dest) == entry['sha256']:
+                return None
+        except FileNotFoundError:
+            pass
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(dest.name + '.restore')
+        with gzip.open(_blob_path(target, entry['sha256']), 'rb') as fin, open(tmp, 'wb') as fout:
+            shutil.copyfileobj(fin, fout, MD_BACKUP_CHUNK)
+        os.replace(tmp, dest)
+        return entry['size']
+
+    restored = unchanged = bytes_restored = 0
+    errors = []
+    with ThreadPoolExecutor(max_workers=BACKUP_WORKERS, thread_name_prefix='md-restore') as pool:
+        futures = {pool.submit(restore_one, rel, entry): rel for rel, entry in entries}
+        for future, rel in futures.items():
+            try:
+                written = future.result()
+            except Exception as e:
+                errors.append(f'{rel}: {e}')
+                continue
+            if written is None:
+                unchanged += 1
+            else:
+                restored += 1
+                bytes_restored += written
+    return {
+        'ok': not errors,
+        'snapshot': snapshot_id,
+        'agent': agent_id,
+        'files_restored': restored,
+        'files_unchanged': unchanged,
+        'bytes_restored': bytes_restored,
+        'errors': errors,
+    }
+
+
+BACKUP_JOB_HISTORY = 20
+_backup_jobs = collections.OrderedDict()
+_backup_jobs_cond = threading.Condition()
+_backup_job_ids = itertools.count(1)
+
+
+def backup_job_view(job):
+    return {k: v for k, v in job.items() if k not in ('cancel', 'version')}
+
+
+def _update_backup_job(job, **changes):
+    with _backup_jobs_cond:
+        job.update(changes)
+        job['version'] += 1
+        _backup_jobs_cond.notify_all()
+
+
+def _run_backup_job(job, target):
+    def progress(files_done, files_total, bytes_done, bytes_total):
+        _update_backup_job(job, progress={'files_done': files_done, 'files_total': files_total,
+                                          'bytes_done': bytes_done, 'bytes_total': bytes_total})
+
+    with _backup_lock:
+        if job['cancel'].is_set():
+            result = {'ok': False, 'cancelled': True, 'error': 'Backup cancelled'}
+        else:
+            _update_backup_job(job, state='running', started=datetime.now().isoformat(timespec='seconds'))
+            try:
+                result = perform_md_backup(target, full=job['full'], progress=progress, cancel=job['cancel'])
+            except Exception as e:
+                result = {'ok': False, 'error': str(e)}
+    state = 'cancelled' if result.get('cancelled') else 'failed' if 'error' in result else 'done'
+    _update_backup_job(job, state=state, finished=datetime.now().isoformat(timespec='seconds'), result=result)
+
+
+def active_backup_job():
+    with _backup_jobs_cond:
+        return next((j for j in reversed(_backup_jobs.values()) if j['state'] in ('queued', 'running')), None)
+
+
+def submit_backup_job(target, full=False, trigger='manual'):
+    """Start a backup in the background, or return the one already queued or running (unless cancelled).
+
+    Returns (job, attached); attached is True when an existing job was returned.
+    """
+    with _backup_jobs_cond:
+        job = active_backup_job()
+        if job and not job['cancel'].is_set():
+            return job, True
+        job = {
+            'id': f'b_{next(_backup_job_ids)}',
+            'state': 'queued',
+            'trigger': trigger,
+            'full': full,
+            'target': str(target),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'started': None,
+            'finished': None,
+            'progress': {'files_done': 0, 'files_total': None, 'bytes_done': 0, 'bytes_total': None},
+            'result': None,
+            'cancel': threading.Event(),
+            'version': 0,
+        }
+        _backup_jobs[job['id']] = job
+        while len(_backup_jobs) > BACKUP_JOB_HISTORY:
+            _backup_jobs.popitem(last=False)
+    threading.Thread(target=_run_backup_job, args=(job, target), name=f"md-backup-{job['id']}", daemon=True).start()
+    return job, False
+
+
+def wait_backup_job(job, version=-1, timeout=None):
+    """Block until the job changes past `version` or finishes; returns its current version."""
+    with _backup_jobs_cond:
+        _backup_jobs_cond.wait_for(
+            lambda: job['version'] != version or job['state'] not in ('queued', 'running'), timeout)
+        return job['version']
+
+
 def _auto_backup_tick():
-    """Timer callback: perform backup and reschedule."""
+    """Timer callback: start a background backup (or leave the running one be) and reschedule."""
     cfg = load_config()
     backup_cfg = cfg.get('md_backup', {})
     target = backup_cfg.get('path', '')
     if target and backup_cfg.get('enabled', False):
-        with _backup_lock:
-            perform_md_backup(target)
+        submit_backup_job(target, trigger='auto')
     _restart_backup_timer()
 
 
@@ -285,6 +1109,300 @@ def _restart_backup_timer():
         _backup_timer.start()
 
 
+## ── METRICS ──
+
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_HELP = {
+    'hq_http_request_duration_seconds': ('histogram', 'Time to build a response, by route.'),
+    'hq_http_requests_total': ('counter', 'Responses by route and status.'),
+    'hq_http_requests_in_flight': ('gauge', 'Requests currently being served (streams included), by route.'),
+    'hq_file_read_bytes_total': ('counter', 'Bytes read from sessions.json, transcript and log files.'),
+    'hq_load_config_total': ('counter', 'openclaw.json loads.'),
+    'hq_subprocess_spawns_total': ('counter', 'Subprocesses started, by command.'),
+    'hq_sse_subscribers': ('gauge', 'Connected /events clients.'),
+}
+_metric_counters = collections.Counter()
+_metric_gauges = collections.Counter()
+_metric_latency = {}
+_metrics_lock = threading.Lock()
+
+
+def metric_inc(name, value=1, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _metrics_lock:
+        _metric_counters[key] += value
+
+
+def metric_gauge_add(name, delta, **labels):
+    key = (name, tuple(sorted(labels.items())))
+    with _metrics_lock:
+        _metric_gauges[key] += delta
+
+
+def spawn(cmd, **kwargs):
+    """subprocess.run through the configured command backend, counted per command in /metrics."""
+    metric_inc('hq_subprocess_spawns_total', command=os.path.basename(cmd[0]))
+    return _command_backend(cmd, **kwargs)
+
+
+def _metrics_route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+@app.before_request
+def _metrics_before():
+    g.metrics_start = time.perf_counter()
+    metric_gauge_add('hq_http_requests_in_flight', 1, route=_metrics_route())
+
+
+@app.after_request
+def _metrics_after(response):
+    elapsed = time.perf_counter() - g.get('metrics_start', time.perf_counter())
+    route = _metrics_route()
+    key = (request.method, route)
+    with _metrics_lock:
+        hist = _metric_latency.get(key)
+        if hist is None:
+            hist = _metric_latency[key] = [0] * (len(METRICS_LATENCY_BUCKETS) + 1) + [0.0]
+        hist[bisect.bisect_left(METRICS_LATENCY_BUCKETS, elapsed)] += 1
+        hist[-1] += elapsed
+        _metric_counters[('hq_http_requests_total',
+                          (('method', request.method), ('route', route), ('status', str(response.status_code))))] += 1
+    if response.is_streamed:
+        # Still in flight until the client has the whole body
+        g.metrics_streamed = True
+        response.call_on_close(functools.partial(metric_gauge_add, 'hq_http_requests_in_flight', -1, route=route))
+    return response
+
+
+@app.teardown_request
+def _metrics_teardown(exc):
+    # Streamed responses are counted down on close instead (and may tear down twice)
+    if g.pop('metrics_start', None) is not None and not g.get('metrics_streamed'):
+        metric_gauge_add('hq_http_requests_in_flight', -1, route=_metrics_route())
+
+
+def _metric_labels(labels):
+    if not labels:
+        return ''
+    esc = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _k, v in labels)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _v), v in zip(labels, esc)) + '}'
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition of request, I/O and subprocess metrics."""
+    with _metrics_lock:
+        series = collections.defaultdict(list)
+        for (name, labels), value in itertools.chain(_metric_counters.items(), _metric_gauges.items()):
+            series[name].append((labels, value))
+        latency = {k: list(v) for k, v in _metric_latency.items()}
+
+    out = []
+    name = 'hq_http_request_duration_seconds'
+    out.append(f'# HELP {name} {METRICS_HELP[name][1]}')
+    out.append(f'# TYPE {name} histogram')
+    for (method, route), hist in sorted(latency.items()):
+        labels = (('method', method), ('route', route))
+        total = 0
+        for le, count in zip(METRICS_LATENCY_BUCKETS + ('+Inf',), hist):
+            total += count
+            out.append(f'{name}_bucket{_metric_labels(labels + (("le", le),))} {total}')
+        out.append(f'{name}_sum{_metric_labels(labels)} {hist[-1]:.6f}')
+        out.append(f'{name}_count{_metric_labels(labels)} {total}')
+    for name, (kind, help_text) in METRICS_HELP.items():
+        if kind == 'histogram':
+            continue
+        out.append(f'# HELP {name} {help_text}')
+        out.append(f'# TYPE {name} {kind}')
+        for labels, value in sorted(series.get(name, ())):
+            out.append(f'{name}{_metric_labels(labels)} {value}')
+    return Response('\n'.join(out) + '\n', mimetype='text/plain; version=0.0.4')
+
+
+## ── COMMAND BACKEND ──
+
+# Every external command goes through spawn(). A replacement for subprocess.run can be
+# installed here, e.g. bench/cmd_simulator.py's in-process gateway emulation.
+
+def set_command_backend(backend=None):
+    """Route spawn() through `backend` (a subprocess.run-compatible callable; None restores subprocess.run)."""
+    global _command_backend
+    _command_backend = backend or subprocess.run
+    return _command_backend
+
+
+_command_backend = subprocess.run
+
+
+## ── PROFILING ──
+
+PROFILE_SAMPLE_INTERVAL = 0.01
+PROFILE_NAME_RE = re.compile(r'^(\d{8}T\d{12})-([A-Z]+)-(\w+)-(\d+)ms\.(prof|collapsed)$')
+PROFILE_TEXT_LIMIT = 60
+_profile_lock = threading.Lock()
+_sampled_requests = {}
+_sampled_lock = threading.Lock()
+_sampler_thread = None
+
+
+def _profile_requested():
+    """On-demand profiling needs the OPENCLAW_HQ_PROFILE_TOKEN secret in X-HQ-Profile or ?__profile."""
+    if not (PROFILING_ENABLED and PROFILE_TOKEN):
+        return False
+    supplied = request.headers.get('X-HQ-Profile') or request.args.get('__profile') or ''
+    return hmac.compare_digest(supplied.encode(), PROFILE_TOKEN.encode())
+
+
+def _collapse_stack(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def _sampler_loop():
+    while True:
+        time.sleep(PROFILE_SAMPLE_INTERVAL)
+        with _sampled_lock:
+            if not _sampled_requests:
+                continue
+            frames = sys._current_frames()
+            for ident, stacks in _sampled_requests.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    stacks[_collapse_stack(frame)] += 1
+
+
+def start_request_sampler():
+    """Sample request thread stacks so requests slower than OPENCLAW_HQ_SLOW_MS leave a profile behind."""
+    global _sampler_thread
+    if _sampler_thread is not None or SLOW_REQUEST_MS <= 0:
+        return
+    _sampler_thread = threading.Thread(target=_sampler_loop, name='request-sampler', daemon=True)
+    _sampler_thread.start()
+
+
+def _store_profile(ext, elapsed_ms, write):
+    """Write a profile into the on-disk ring via write(path) and return its file name."""
+    PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r'\W+', '_', _metrics_route()).strip('_') or 'root'
+    name = f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{request.method}-{slug}-{int(elapsed_ms)}ms.{ext}"
+    write(str(PROFILES_DIR / name))
+    ring = sorted(n for n in os.listdir(PROFILES_DIR) if PROFILE_NAME_RE.match(n))
+    for old in ring[:max(len(ring) - PROFILE_RING_SIZE, 0)]:
+        try:
+            os.unlink(PROFILES_DIR / old)
+        except OSError:
+            pass
+    return name
+
+
+def _write_collapsed(stacks):
+    def write(path):
+        with open(path, 'w') as f:
+            for stack, count in stacks.most_common():
+                f.write(f'{stack} {count}\n')
+    return write
+
+
+@app.before_request
+def _profile_before():
+    if _sampler_thread is not None:
+        with _sampled_lock:
+            _sampled_requests[threading.get_ident()] = collections.Counter()
+    if _profile_requested():
+        # One profiler at a time: on 3.12+ cProfile is process-wide
+        if _profile_lock.acquire(blocking=False):
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+        else:
+            g.profile_header = 'busy'
+
+
+@app.after_request
+def _profile_after(response):
+    elapsed_ms = (time.perf_counter() - g.get('metrics_start', time.perf_counter())) * 1000
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+        g.profile_header = _store_profile('prof', elapsed_ms, profiler.dump_stats)
+    if 'profile_header' in g:
+        response.headers['X-HQ-Profile'] = g.pop('profile_header')
+    if _sampler_thread is not None:
+        with _sampled_lock:
+            stacks = _sampled_requests.pop(threading.get_ident(), None)
+        if stacks and elapsed_ms >= SLOW_REQUEST_MS:
+            _store_profile('collapsed', elapsed_ms, _write_collapsed(stacks))
+    return response
+
+
+@app.teardown_request
+def _profile_teardown(exc):
+    # after_request is skipped when a handler raises; never leave the profiler running
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        _profile_lock.release()
+    if _sampler_thread is not None:
+        with _sampled_lock:
+            _sampled_requests.pop(threading.get_ident(), None)
+
+
+@app.route('/api/debug/profiles')
+def api_debug_profiles():
+    """Stored profiles, newest first: on-demand cProfile runs and slow-request samples."""
+    try:
+        names = sorted((n for n in os.listdir(PROFILES_DIR) if PROFILE_NAME_RE.match(n)), reverse=True)
+    except OSError:
+        names = []
+    result = []
+    for name in names:
+        stamp, method, route, duration, ext = PROFILE_NAME_RE.match(name).groups()
+        try:
+            size = os.path.getsize(PROFILES_DIR / name)
+        except OSError:
+            continue
+        result.append({
+            'name': name,
+            'kind': 'cprofile' if ext == 'prof' else 'sampled',
+            'method': method,
+            'route': route,
+            'durationMs': int(duration),
+            'createdAt': datetime.strptime(stamp, '%Y%m%dT%H%M%S%f').isoformat(timespec='milliseconds'),
+            'size': size,
+            'formats': ['pstats', 'text'] if ext == 'prof' else ['collapsed'],
+        })
+    return jsonify({'enabled': PROFILING_ENABLED, 'slowMs': SLOW_REQUEST_MS, 'profiles': result})
+
+
+@app.route('/api/debug/profiles/<name>')
+def api_debug_profile(name):
+    """Download one profile (?format=pstats|text|collapsed; text takes ?sort=cumulative|tottime|calls)."""
+    m = PROFILE_NAME_RE.match(name)
+    path = PROFILES_DIR / name
+    if not m or not path.is_file():
+        return jsonify({'error': 'profile not found'}), 404
+    ext = m.group(5)
+    fmt = request.args.get('format', 'pstats' if ext == 'prof' else 'collapsed')
+    if ext == 'prof' and fmt == 'pstats':
+        return Response(path.read_bytes(), mimetype='application/octet-stream',
+                        headers={'Content-Disposition': f'attachment; filename="{name}"'})
+    if ext == 'prof' and fmt == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in ('cumulative', 'tottime', 'calls'):
+            return jsonify({'error': 'sort must be cumulative, tottime or calls'}), 400
+        out = io.StringIO()
+        pstats.Stats(str(path), stream=out).strip_dirs().sort_stats(sort).print_stats(PROFILE_TEXT_LIMIT)
+        return Response(out.getvalue(), mimetype='text/plain')
+    if ext == 'collapsed' and fmt == 'collapsed':
+        return Response(path.read_text(), mimetype='text/plain')
+    return jsonify({'error': f'format {fmt} not available for this profile'}), 400
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -387,7 +1505,7 @@ def api_system_stats():
     elif is_macos:
         try:
             # MacOS RAM via vm_stat
-            vm = subprocess.run(['vm_stat'], capture_output=True, text=True)
+            vm = spawn(['vm_stat'], capture_output=True, text=True)
             lines = vm.stdout.strip().split('\n')
             free = active = wired = 0
             for line in lines:
@@ -402,7 +1520,7 @@ def api_system_stats():
             stats['ram_used_gb'] = (active + wired) * page_size / 1024 / 1024 / 1024
             stats['ram_percent'] = round(stats['ram_used_gb'] / stats['ram_total_gb'] * 100, 1) if stats['ram_total_gb'] > 0 else 0
             # MacOS CPU via sysctl
-            cpuload = subprocess.run(['sysctl', '-n', 'hw.loadavg'], capture_output=True, text=True)
+            cpuload = spawn(['sysctl', '-n', 'hw.loadavg'], capture_output=True, text=True)
             if cpuload.returncode == 0:
                 stats['cpu'] = float(cpuload.stdout.strip())
         except Exception:
@@ -439,7 +1557,7 @@ def api_system_stats():
     if is_macos:
         try:
             # Use osx-cpu-temp or powermetrics
-            result = subprocess.run(['osx-cpu-temp'], capture_output=True, text=True, timeout=5)
+            result = spawn(['osx-cpu-temp'], capture_output=True, text=True, timeout=5)
             if result.returncode == 0:
                 temp = result.stdout.strip().replace('°C', '').replace('C', '')
                 stats['cpu_temp'] = float(temp)
@@ -447,14 +1565,14 @@ def api_system_stats():
             pass
             # Fallback: try sysctl
             try:
-                result = subprocess.run(['sysctl', '-n', 'machdep.cpu.brand_string'], capture_output=True, text=True)
+                result = spawn(['sysctl', '-n', 'machdep.cpu.brand_string'], capture_output=True, text=True)
             except:
                 pass
     
     # GPU via nvidia-smi (Linux)
     if is_linux:
         try:
-            result = subprocess.run(['nvidia-smi', '--query-gpu=name,temperature.gpu,fan.speed,memory.used,memory.total,utilization.gpu', '--format=csv,noheader,nounits'], 
+            result = spawn(['nvidia-smi', '--query-gpu=name,temperature.gpu,fan.speed,memory.used,memory.total,utilization.gpu', '--format=csv,noheader,nounits'], 
                                   capture_output=True, text=True, timeout=5)
             if result.returncode == 0:
                 parts = result.stdout.strip().split(',')
@@ -474,7 +1592,7 @@ def api_system_stats():
     # GPU via nvidia-smi (macOS with eGPU)
     if is_macos:
         try:
-            result = subprocess.run(['nvidia-smi', '--query-gpu=name,temperature.gpu,fan.speed,memory.used,memory.total,utilization.gpu', '--format=csv,noheader,nounits'], 
+            result = spawn(['nvidia-smi', '--query-gpu=name,temperature.gpu,fan.speed,memory.used,memory.total,utilization.gpu', '--format=csv,noheader,nounits'], 
                                   capture_output=True, text=True, timeout=5)
             if result.returncode == 0:
                 parts = result.stdout.strip().split(',')
@@ -508,133 +1626,146 @@ def api_system_stats():
     return jsonify(stats)
 
 
-@app.route('/api/agents')
-def api_agents():
-    cfg = load_config()
-    agents_list = cfg.get('agents', {}).get('list', [])
-    bindings = cfg.get('bindings', [])
+def _last_user_text(session_file):
+    """Return the most recent non-empty user message text of a transcript, reading from the end.
 
-    result = []
-    for agent in agents_list:
-        agent_id = agent['id']
-        sessions_file = AGENTS_DIR / agent_id / 'sessions' / 'sessions.json'
+    User messages with no text (tool results, attachments, blank parts) are
+    passed over in favour of older ones.
+    """
+    for line in _iter_lines_reverse(session_file, opener=open_transcript, kind='transcript'):
+        try:
+            entry = json.loads(line)
+        except Exception:
+            continue
+        if not isinstance(entry, dict) or entry.get('type') != 'message':
+            continue
+        msg = entry.get('message')
+        if not isinstance(msg, dict) or msg.get('role') != 'user':
+            continue
+        content = msg.get('content')
+        parts = content if isinstance(content, list) else [{'type': 'text', 'text': content}]
+        for c in parts:
+            if isinstance(c, dict) and c.get('type') == 'text' and isinstance(c.get('text'), str):
+                text = c['text'].strip()
+                if text:
+                    return text[:120]
+    return None
+
+
+def _agent_summary(agent, bindings):
+    agent_id = agent['id']
+    sessions_data = load_sessions(agent_id)
 
-        last_activity = None
-        active_sessions = 0
+    last_activity = None
+    best_ts = 0
+    best_sess = None
+    total_input = 0
+    total_output = 0
+    for sess in sessions_data.values():
+        updated_at = sess.get('updatedAt', 0)
+        if updated_at:
+            ts = datetime.fromtimestamp(updated_at / 1000)
+            if last_activity is None or ts > last_activity:
+                last_activity = ts
+        if updated_at > best_ts:
+            best_ts = updated_at
+            best_sess = sess
+        total_input += sess.get('inputTokens', 0)
+        total_output += sess.get('outputTokens', 0)
 
+    current_task = None
+    if best_sess and best_sess.get('sessionFile'):
         try:
-            sessions_data = json.loads(sessions_file.read_text())
-            for sess in sessions_data.values():
-                updated_at = sess.get('updatedAt', 0)
-                if updated_at:
-                    ts = datetime.fromtimestamp(updated_at / 1000)
-                    if last_activity is None or ts > last_activity:
-                        last_activity = ts
-                active_sessions += 1
+            current_task = _last_user_text(best_sess['sessionFile'])
         except Exception:
             pass
 
-        current_task = None
-        if last_activity is not None:
-            # Find most recent session file
-            best_ts = 0
-            best_sess = None
-            try:
-                for sess in sessions_data.values():
-                    ts = sess.get('updatedAt', 0)
-                    if ts > best_ts:
-                        best_ts = ts
-                        best_sess = sess
-                if best_sess:
-                    sf = best_sess.get('sessionFile')
-                    if sf:
-                        with open(sf) as f:
-                            lines = f.read().splitlines()
-                        for line in reversed(lines):
-                            if not line.strip():
-                                continue
-                            try:
-                                entry = json.loads(line)
-                                if entry.get('type') == 'message':
-                                    msg = entry.get('message', {})
-                                    if msg.get('role') == 'user':
-                                        content = msg.get('content', [])
-                                        if isinstance(content, list):
-                                            for c in content:
-                                                if isinstance(c, dict) and c.get('type') == 'text':
-                                                    current_task = c.get('text', '')[:120]
-                                                    break
-                                        elif isinstance(content, str):
-                                            current_task = content[:120]
-                                        if current_task:
-                                            break
-                            except Exception:
-                                pass
-            except Exception:
-                pass
+    binding = next((b for b in bindings if b.get('agentId') == agent_id), None)
+    return {
+        'id': agent_id,
+        'name': agent['name'],
+        'model': agent.get('model', {}).get('primary', 'unknown'),
+        'platform': binding.get('channel', '') if binding else '',
+        'lastActivity': last_activity.isoformat() if last_activity else None,
+        'activeSessions': len(sessions_data),
+        'currentTask': current_task,
+        'tokens': {'input': total_input, 'output': total_output, 'total': total_input + total_output},
+    }
 
-        binding = next((b for b in bindings if b.get('agentId') == agent_id), None)
-        platform = binding.get('channel', '') if binding else ''
-        
-        # Get token stats from sessions
-        total_input = 0
-        total_output = 0
-        try:
-            for sess in sessions_data.values():
-                total_input += sess.get('inputTokens', 0)
-                total_output += sess.get('outputTokens', 0)
-        except:
-            pass
 
-        result.append({
-            'id': agent_id,
-            'name': agent['name'],
-            'model': agent.get('model', {}).get('primary', 'unknown'),
-            'platform': platform,
-            'lastActivity': last_activity.isoformat() if last_activity else None,
-            'activeSessions': active_sessions,
-            'currentTask': current_task,
-            'tokens': {'input': total_input, 'output': total_output, 'total': total_input + total_output},
-        })
+@app.route('/api/agents')
+def api_agents():
+    cfg = load_config()
+    agents_list = cfg.get('agents', {}).get('list', [])
+    bindings = cfg.get('bindings', [])
+
+    result = []
+    for agent, summary, error in map_agents(lambda a: _agent_summary(a, bindings), agents_list, request_deadline()):
+        if summary is None:
+            binding = next((b for b in bindings if b.get('agentId') == agent['id']), None)
+            summary = {
+                'id': agent['id'],
+                'name': agent['name'],
+                'model': agent.get('model', {}).get('primary', 'unknown'),
+                'platform': binding.get('channel', '') if binding else '',
+                'lastActivity': None,
+                'activeSessions': 0,
+                'currentTask': None,
+                'tokens': {'input': 0, 'output': 0, 'total': 0},
+                'timedOut': error == 'timeout',
+                'error': error,
+            }
+        result.append(summary)
 
     return jsonify(result)
 
 
+def _agent_sessions(agent):
+    agent_id = agent['id']
+    sessions = []
+    for key, sess in load_sessions(agent_id).items():
+        updated_at = sess.get('updatedAt', 0)
+        age_str = ''
+        if updated_at:
+            diff = time.time() - updated_at / 1000
+            if diff < 3600:
+                age_str = f"{int(diff/60)}m ago"
+            elif diff < 86400:
+                age_str = f"{int(diff/3600)}h ago"
+            else:
+                age_str = f"{int(diff/86400)}d ago"
+
+        sessions.append({
+            'agent': agent_id,
+            'key': key,
+            'age': age_str,
+            'chatType': sess.get('chatType', 'direct'),
+            'lastChannel': sess.get('lastChannel', ''),
+        })
+    return sessions
+
+
 @app.route('/api/sessions')
 def api_sessions():
     # Read all agents' session files directly (faster than subprocess)
-    sessions = []
     cfg = load_config()
     agents_list = cfg.get('agents', {}).get('list', [])
+    if wants_ndjson():
+        # One agent's sessions resident at a time
+        return ndjson_response(s for agent in agents_list for s in _agent_sessions(agent))
 
-    for agent in agents_list:
-        agent_id = agent['id']
-        sessions_file = AGENTS_DIR / agent_id / 'sessions' / 'sessions.json'
-        try:
-            sessions_data = json.loads(sessions_file.read_text())
-            for key, sess in sessions_data.items():
-                updated_at = sess.get('updatedAt', 0)
-                age_str = ''
-                if updated_at:
-                    diff = time.time() - updated_at / 1000
-                    if diff < 3600:
-                        age_str = f"{int(diff/60)}m ago"
-                    elif diff < 86400:
-                        age_str = f"{int(diff/3600)}h ago"
-                    else:
-                        age_str = f"{int(diff/86400)}d ago"
-
-                sessions.append({
-                    'agent': agent_id,
-                    'key': key,
-                    'age': age_str,
-                    'chatType': sess.get('chatType', 'direct'),
-                    'lastChannel': sess.get('lastChannel', ''),
-                })
-        except Exception:
-            pass
+    sessions = []
+    partial = []
+    for agent, agent_sessions, error in map_agents(_agent_sessions, agents_list, request_deadline()):
+        if error:
+            partial.append(agent['id'])
+        else:
+            sessions.extend(agent_sessions)
 
-    return jsonify(sessions)
+    response = jsonify(sessions)
+    if partial:
+        response.headers['X-Partial-Agents'] = ','.join(partial)
+    return response
 
 
 @app.route('/api/channels')
@@ -840,9 +1971,8 @@ def api_agent_detail(agent_id):
         sf = best_sess.get('sessionFile')
         if sf:
             try:
-                with open(sf) as f:
-                    lines = f.read().splitlines()
-                for line in lines[-80:]:
+                lines = list(itertools.islice(_iter_lines_reverse(sf, opener=open_transcript, kind='transcript'), 80))
+                for line in reversed(lines):
                     if not line.strip():
                         continue
                     try:
@@ -902,8 +2032,7 @@ def api_agent_detail(agent_id):
                 'mode': b.get('mode', 'read_only'),
                 'modeLabel': USAGE_MODE_LABELS.get(b.get('mode', ''), b.get('mode', '')),
             }
-            for b in cfg.get('apps', {}).get('bindings', [])
-            if b.get('agentId') == agent_id
+            for b in app_bindings_lookup()['by_agent'].get(agent_id, [])
         ],
     })
 
@@ -1210,6 +2339,9 @@ def api_md_backup_status():
         'path': backup_cfg.get('path', ''),
         'enabled': backup_cfg.get('enabled', False),
         'interval_minutes': backup_cfg.get('interval_minutes', 60),
+        'propagate_deletes': backup_cfg.get('propagate_deletes', False),
+        'retention': {**SNAPSHOT_RETENTION_DEFAULTS, **backup_cfg.get('retention', {})},
+        'job': (active_backup_job() or {}).get('id'),
         'last_backup': backup_cfg.get('last_backup'),
         'last_result': backup_cfg.get('last_result'),
     })
@@ -1217,7 +2349,7 @@ def api_md_backup_status():
 
 @app.route('/api/md-backup/settings', methods=['POST'])
 def api_md_backup_settings():
-    """Save md_backup settings: path, enabled, interval_minutes."""
+    """Save md_backup settings: path, enabled, interval_minutes, propagate_deletes, retention."""
     data = request.get_json() or {}
     cfg = load_config()
     backup_cfg = cfg.setdefault('md_backup', {})
@@ -1242,6 +2374,17 @@ def api_md_backup_settings():
     if 'interval_minutes' in data:
         backup_cfg['interval_minutes'] = int(data['interval_minutes'])
 
+    if 'propagate_deletes' in data:
+        backup_cfg['propagate_deletes'] = bool(data['propagate_deletes'])
+
+    if 'retention' in data:
+        retention = data['retention'] or {}
+        if not isinstance(retention, dict) or set(retention) - set(SNAPSHOT_RETENTION_DEFAULTS):
+            return jsonify({'error': f'retention keys: {", ".join(SNAPSHOT_RETENTION_DEFAULTS)}'}), 400
+        if not all(isinstance(v, int) and not isinstance(v, bool) and v >= 0 for v in retention.values()):
+            return jsonify({'error': 'retention counts must be non-negative integers'}), 400
+        backup_cfg['retention'] = dict(retention)
+
     save_config(cfg)
     _restart_backup_timer()
     return jsonify({'ok': True})
@@ -1249,59 +2392,283 @@ def api_md_backup_settings():
 
 @app.route('/api/md-backup/export', methods=['POST'])
 def api_md_backup_export():
-    """Manually trigger an MD file backup."""
+    """Start a backup job (or attach to the running one); {"full": true} rehashes, {"wait": true} blocks for the result."""
+    data = request.get_json(silent=True) or {}
     cfg = load_config()
     target = cfg.get('md_backup', {}).get('path', '')
     if not target:
         return jsonify({'error': 'No backup path configured'}), 400
-    with _backup_lock:
-        result = perform_md_backup(target)
+    job, attached = submit_backup_job(target, full=bool(data.get('full')))
+    if not data.get('wait'):
+        return jsonify({'job': backup_job_view(job), 'attached': attached}), 202
+    version = -1
+    while job['state'] in ('queued', 'running'):
+        version = wait_backup_job(job, version)
+    result = job['result']
     if not result['ok'] and 'error' in result:
         return jsonify(result), 400
     return jsonify(result)
 
 
-@app.route('/api/task', methods=['POST'])
-def api_task():
-    data = request.get_json() or {}
-    agent_id = data.get('agent_id', '')
-    message = data.get('message', '')
-    if not agent_id or not message:
-        return jsonify({'error': 'agent_id and message required'}), 400
-    output = run_cmd(
-        ['openclaw', 'agent', '--agent', agent_id, '--message', message],
-        timeout=60,
-    )
-    return jsonify({'output': output[:2000], 'ok': True})
+@app.route('/api/md-backup/jobs')
+def api_md_backup_jobs():
+    """Recent backup jobs, newest first."""
+    with _backup_jobs_cond:
+        return jsonify([backup_job_view(j) for j in reversed(_backup_jobs.values())])
 
 
-## ── TASK MANAGER ENDPOINTS ──
+@app.route('/api/md-backup/jobs/<job_id>')
+def api_md_backup_job(job_id):
+    job = _backup_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    with _backup_jobs_cond:
+        return jsonify(backup_job_view(job))
 
-@app.route('/api/tasks')
-def api_tasks():
-    data = load_tasks()
-    tasks = data.get('tasks', [])
-    agent = request.args.get('agent', '')
-    status = request.args.get('status', '')
-    priority = request.args.get('priority', '')
-    if agent:
-        tasks = [t for t in tasks if t.get('assignedTo') == agent]
-    if status:
-        tasks = [t for t in tasks if t.get('status') == status]
-    if priority:
-        tasks = [t for t in tasks if t.get('priority') == priority]
-    return jsonify(tasks)
 
+@app.route('/api/md-backup/jobs/<job_id>/events')
+def api_md_backup_job_events(job_id):
+    """SSE stream of a job's state and progress; ends once the job finishes."""
+    job = _backup_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
 
-@app.route('/api/tasks', methods=['POST'])
-def api_tasks_create():
-    body = request.get_json() or {}
-    title = body.get('title', '').strip()
-    if not title:
-        return jsonify({'error': 'title required'}), 400
-    data = load_tasks()
-    tid = f"t_{data['nextId']}"
-    now = datetime.now().isoformat(timespec='seconds')
+    def generate():
+        version = -1
+        while True:
+            seen = wait_backup_job(job, version, timeout=15)
+            if seen == version:
+                yield ': keepalive\n\n'
+                continue
+            version = seen
+            with _backup_jobs_cond:
+                view = backup_job_view(job)
+            yield f"data: {json.dumps(view)}\n\n"
+            if view['state'] not in ('queued', 'running'):
+                return
+            # coalesce bursts of per-file updates
+            time.sleep(0.2)
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@app.route('/api/md-backup/jobs/<job_id>/cancel', methods=['POST'])
+def api_md_backup_job_cancel(job_id):
+    job = _backup_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    job['cancel'].set()
+    with _backup_jobs_cond:
+        return jsonify(backup_job_view(job))
+
+
+@app.route('/api/md-backup/snapshots')
+def api_md_backup_snapshots():
+    """List backup snapshots, newest first, with their file and byte counts."""
+    cfg = load_config()
+    target = cfg.get('md_backup', {}).get('path', '')
+    if not target:
+        return jsonify({'error': 'No backup path configured'}), 400
+    snapshots = []
+    for snapshot_id in reversed(list_snapshot_ids(Path(target))):
+        try:
+            snap = load_snapshot(Path(target), snapshot_id)
+        except (OSError, ValueError) as e:
+            app.logger.warning('md backup: skipping snapshot %s: %s', snapshot_id, e)
+            continue
+        agents = sorted({k.split('/')[1] for k in snap['files']})
+        snapshots.append({'id': snapshot_id, 'created': snap.get('created'), 'agents': agents,
+                          **(snap.get('stats') if isinstance(snap.get('stats'), dict) else {})})
+    return jsonify({
+        'snapshots': snapshots,
+        'retention': {**SNAPSHOT_RETENTION_DEFAULTS, **cfg.get('md_backup', {}).get('retention', {})},
+    })
+
+
+@app.route('/api/md-backup/restore', methods=['POST'])
+def api_md_backup_restore():
+    """Restore one agent's .md files from a snapshot: {snapshot, agent, files?}."""
+    data = request.get_json() or {}
+    snapshot_id = data.get('snapshot', '')
+    agent_id = data.get('agent', '')
+    cfg = load_config()
+    target = cfg.get('md_backup', {}).get('path', '')
+    if not target:
+        return jsonify({'error': 'No backup path configured'}), 400
+    if not agent_id or not any(a['id'] == agent_id for a in cfg.get('agents', {}).get('list', [])):
+        return jsonify({'error': f'Unknown agent: {agent_id}'}), 400
+    files = data.get('files')
+    if files is not None and not (isinstance(files, list) and all(isinstance(f, str) for f in files)):
+        return jsonify({'error': 'files must be a list of relative paths'}), 400
+    with _backup_lock:
+        try:
+            result = restore_snapshot(target, snapshot_id, agent_id, files)
+        except FileNotFoundError:
+            return jsonify({'error': f'Snapshot not found: {snapshot_id}'}), 404
+        except ValueError as e:
+            app.logger.warning('md backup: cannot restore from snapshot %s: %s', snapshot_id, e)
+            return jsonify({'error': f'Snapshot is unreadable: {snapshot_id}'}), 400
+    return jsonify(result)
+
+
+@app.route('/api/task', methods=['POST'])
+def api_task():
+    data = request.get_json() or {}
+    agent_id = data.get('agent_id', '')
+    message = data.get('message', '')
+    if not agent_id or not message:
+        return jsonify({'error': 'agent_id and message required'}), 400
+    output = run_cmd(
+        ['openclaw', 'agent', '--agent', agent_id, '--message', message],
+        timeout=60,
+    )
+    return jsonify({'output': output[:2000], 'ok': True})
+
+
+## ── TASK MANAGER ENDPOINTS ──
+
+@app.route('/api/tasks')
+def api_tasks():
+    data = load_tasks()
+    agent = request.args.get('agent', '')
+    status = request.args.get('status', '')
+    priority = request.args.get('priority', '')
+    tasks = (
+        t for t in data.get('tasks', [])
+        if (not agent or t.get('assignedTo') == agent)
+        and (not status or t.get('status') == status)
+        and (not priority or t.get('priority') == priority)
+    )
+    if wants_ndjson():
+        return ndjson_response(tasks)
+    return jsonify(list(tasks))
+
+
+TASK_SEARCH_FIELDS = {'title': 3.0, 'assignedTo': 2.0, 'description': 1.0}
+TASK_SEARCH_LIMIT = 50
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _tokenize(text):
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+def _task_index_add(index, task, insort=True):
+    weights = collections.Counter()
+    for field, weight in TASK_SEARCH_FIELDS.items():
+        for token in _tokenize(task.get(field) or ''):
+            weights[token] += weight
+    tid = task['id']
+    index['docs'][tid] = task
+    index['terms'][tid] = weights
+    for token, weight in weights.items():
+        postings = index['postings'].get(token)
+        if postings is None:
+            postings = index['postings'][token] = {}
+            if insort:
+                bisect.insort(index['vocab'], token)
+        postings[tid] = weight
+
+
+def _task_index_remove(index, tid):
+    index['docs'].pop(tid, None)
+    for token in index['terms'].pop(tid, ()):
+        postings = index['postings'].get(token)
+        if postings is None:
+            continue
+        postings.pop(tid, None)
+        if not postings:
+            del index['postings'][token]
+            del index['vocab'][bisect.bisect_left(index['vocab'], token)]
+
+
+def _task_index_get():
+    """Return the task search index, rebuilding it if tasks.json changed underneath us.
+
+    Must be called with _task_index_lock held.
+    """
+    global _task_index
+    sig = _file_sig(TASKS_PATH)
+    if _task_index is None or _task_index['sig'] != sig:
+        _task_index = {'sig': sig, 'docs': {}, 'terms': {}, 'postings': {}, 'vocab': []}
+        for task in load_tasks().get('tasks', []):
+            _task_index_add(_task_index, task, insort=False)
+        _task_index['vocab'] = sorted(_task_index['postings'])
+    return _task_index
+
+
+def task_index_apply(upsert=None, remove=None):
+    """Fold one task change into the search index after tasks.json was saved."""
+    with _task_index_lock:
+        if _task_index is None:
+            return
+        if remove is not None:
+            _task_index_remove(_task_index, remove)
+        if upsert is not None:
+            _task_index_remove(_task_index, upsert['id'])
+            _task_index_add(_task_index, upsert)
+        _task_index['sig'] = _file_sig(TASKS_PATH)
+
+
+def search_tasks(query, limit=TASK_SEARCH_LIMIT):
+    """Rank tasks matching every query term (as a prefix) by weighted tf-idf.
+
+    Returns (total_matches, [(score, task), ...]).
+    """
+    terms = list(dict.fromkeys(_tokenize(query)))
+    if not terms:
+        return 0, []
+    with _task_index_lock:
+        index = _task_index_get()
+        vocab, postings, n_docs = index['vocab'], index['postings'], len(index['docs'])
+        scores = None
+        for term in terms:
+            term_scores = {}
+            i = bisect.bisect_left(vocab, term)
+            while i < len(vocab) and vocab[i].startswith(term):
+                token = vocab[i]
+                token_postings = postings[token]
+                idf = math.log(1 + n_docs / len(token_postings))
+                boost = 1.0 if token == term else 0.5
+                for tid, weight in token_postings.items():
+                    term_scores[tid] = term_scores.get(tid, 0.0) + weight * idf * boost
+                i += 1
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {tid: score + scores[tid] for tid, score in term_scores.items() if tid in scores}
+            if not scores:
+                return 0, []
+        top = heapq.nlargest(limit, scores.items(), key=lambda kv: kv[1])
+        return len(scores), [(score, index['docs'][tid]) for tid, score in top]
+
+
+@app.route('/api/tasks/search')
+def api_tasks_search():
+    """Full-text search over task title, description and assignee (?q=&limit=)."""
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', TASK_SEARCH_LIMIT, type=int), 1), 500)
+    total, hits = search_tasks(query, limit)
+    return jsonify({
+        'query': query,
+        'total': total,
+        'tasks': [{**task, 'score': round(score, 4)} for score, task in hits],
+    })
+
+
+@app.route('/api/tasks', methods=['POST'])
+def api_tasks_create():
+    body = request.get_json() or {}
+    title = body.get('title', '').strip()
+    if not title:
+        return jsonify({'error': 'title required'}), 400
+    data = load_tasks()
+    tid = f"t_{data['nextId']}"
+    now = datetime.now().isoformat(timespec='seconds')
     task = {
         'id': tid,
         'title': title,
@@ -1319,6 +2686,7 @@ def api_tasks_create():
     data['tasks'].append(task)
     data['nextId'] += 1
     save_tasks(data)
+    task_index_apply(upsert=task)
     return jsonify(task)
 
 
@@ -1339,6 +2707,7 @@ def api_tasks_update(tid):
     elif task.get('status') != 'completed':
         task['completedAt'] = None
     save_tasks(data)
+    task_index_apply(upsert=task)
     return jsonify(task)
 
 
@@ -1350,6 +2719,7 @@ def api_tasks_delete(tid):
     if len(data['tasks']) == before:
         return jsonify({'error': 'task not found'}), 404
     save_tasks(data)
+    task_index_apply(remove=tid)
     return jsonify({'ok': True})
 
 
@@ -1374,40 +2744,282 @@ def api_tasks_stats():
 
 ## ── CALENDAR ENDPOINTS ──
 
+RRULE_FREQS = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+RRULE_WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+CALENDAR_DEFAULT_WINDOW_DAYS = 90
+CALENDAR_MAX_WINDOW_DAYS = 3660
+
+
+def _parse_rrule(rule):
+    """Parse an RRULE string such as 'FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10'.
+
+    Supports FREQ, INTERVAL, COUNT, UNTIL and BYDAY (DAILY/WEEKLY only).
+    Raises ValueError for anything malformed or unsupported.
+    """
+    rule = rule.strip()
+    if rule.upper().startswith('RRULE:'):
+        rule = rule[6:]
+    parts = {}
+    for part in rule.split(';'):
+        if not part.strip():
+            continue
+        key, sep, val = part.partition('=')
+        if not sep:
+            raise ValueError(f'malformed rrule part: {part}')
+        parts[key.strip().upper()] = val.strip().upper()
+
+    freq = parts.pop('FREQ', '')
+    if freq not in RRULE_FREQS:
+        raise ValueError(f'rrule FREQ must be one of {", ".join(RRULE_FREQS)}')
+    parsed = {'freq': freq, 'interval': 1, 'count': None, 'until': None, 'byday': None}
+
+    if 'INTERVAL' in parts:
+        parsed['interval'] = int(parts.pop('INTERVAL'))
+        if parsed['interval'] < 1:
+            raise ValueError('rrule INTERVAL must be >= 1')
+    if 'COUNT' in parts:
+        parsed['count'] = int(parts.pop('COUNT'))
+        if parsed['count'] < 1:
+            raise ValueError('rrule COUNT must be >= 1')
+    if 'UNTIL' in parts:
+        raw = parts.pop('UNTIL').replace('-', '')[:8]
+        parsed['until'] = datetime.strptime(raw, '%Y%m%d').date()
+    if 'BYDAY' in parts:
+        if freq not in ('DAILY', 'WEEKLY'):
+            raise ValueError('rrule BYDAY is only supported with DAILY or WEEKLY')
+        days = [d.strip() for d in parts.pop('BYDAY').split(',') if d.strip()]
+        if not days or any(d not in RRULE_WEEKDAYS for d in days):
+            raise ValueError('rrule BYDAY must list weekdays like MO,TU,WE')
+        parsed['byday'] = sorted({RRULE_WEEKDAYS.index(d) for d in days})
+    if parts:
+        raise ValueError(f'unsupported rrule parts: {", ".join(sorted(parts))}')
+    return parsed
+
+
+def _add_months(d, months):
+    """Shift a date by whole months, returning None if the day does not exist."""
+    month_index = d.month - 1 + months
+    try:
+        return d.replace(year=d.year + month_index // 12, month=month_index % 12 + 1)
+    except ValueError:
+        return None
+
+
+def _rrule_period(start, rule, k):
+    """Return (period_start, candidate dates) for the k-th recurrence period."""
+    freq, step = rule['freq'], k * rule['interval']
+    if freq == 'DAILY':
+        d = start + timedelta(days=step)
+        if rule['byday'] is not None and d.weekday() not in rule['byday']:
+            return d, []
+        return d, [d]
+    if freq == 'WEEKLY':
+        base = start - timedelta(days=start.weekday()) + timedelta(weeks=step)
+        days = rule['byday'] if rule['byday'] is not None else [start.weekday()]
+        return base, [base + timedelta(days=wd) for wd in days if base + timedelta(days=wd) >= start]
+    months = step if freq == 'MONTHLY' else step * 12
+    d = _add_months(start, months)
+    base = d or _add_months(start.replace(day=1), months)
+    return base, [d] if d else []
+
+
+def _iter_rrule(start, rule, window_start, window_end):
+    """Lazily yield occurrence dates of a recurring event inside a window.
+
+    Whole periods before the window are skipped arithmetically so a daily
+    series that started years ago costs nothing to query for one month.
+    """
+    freq, interval, count = rule['freq'], rule['interval'], rule['count']
+    last = window_end if rule['until'] is None else min(window_end, rule['until'])
+    if last < start:
+        return
+
+    k = emitted = 0
+    if window_start > start:
+        if freq == 'DAILY':
+            k = (window_start - start).days // interval
+        elif freq == 'WEEKLY':
+            week0 = start - timedelta(days=start.weekday())
+            k = (window_start - week0).days // (7 * interval)
+        elif freq == 'MONTHLY':
+            k = ((window_start.year - start.year) * 12 + window_start.month - start.month) // interval
+        else:
+            k = (window_start.year - start.year) // interval
+        if count is not None:
+            # Occurrences skipped are only countable when every period yields
+            # a fixed number of dates; otherwise walk from the series start.
+            if freq == 'DAILY' and rule['byday'] is None:
+                emitted = k
+            elif freq == 'WEEKLY' and k > 0:
+                emitted = len(_rrule_period(start, rule, 0)[1]) + (k - 1) * len(rule['byday'] or [0])
+            else:
+                k = 0
+
+    while count is None or emitted < count:
+        base, candidates = _rrule_period(start, rule, k)
+        if base > last:
+            return
+        for d in candidates:
+            if d > last or (count is not None and emitted >= count):
+                return
+            emitted += 1
+            if d >= window_start:
+                yield d
+        k += 1
+
+
+def _event_sort_key(event):
+    return f"{event.get('date', '')}T{event.get('time') or '00:00'}"
+
+
+def _calendar_lookup():
+    """Return the sorted calendar index, rebuilding it when calendar.json changes.
+
+    One-off events are kept sorted by date/time so range queries are a pair
+    of bisects; recurring events are kept once with their parsed rule.
+    """
+    global _calendar_index
+    sig = _file_sig(CALENDAR_PATH)
+    with _calendar_index_lock:
+        if _calendar_index is not None and _calendar_index['sig'] == sig:
+            return _calendar_index
+        single = []
+        recurring = []
+        for event in load_calendar().get('events', []):
+            if event.get('rrule'):
+                try:
+                    recurring.append((date.fromisoformat(event['date']), _parse_rrule(event['rrule']), event))
+                    continue
+                except (KeyError, ValueError):
+                    pass
+            single.append(event)
+        single.sort(key=_event_sort_key)
+        _calendar_index = {
+            'sig': sig,
+            'keys': [_event_sort_key(e) for e in single],
+            'events': single,
+            'recurring': recurring,
+        }
+        return _calendar_index
+
+
+def _calendar_window(month, from_str, to_str):
+    """Resolve month/from/to query args into an inclusive (start, end) date pair."""
+    if month:
+        start = datetime.strptime(month[:7], '%Y-%m').date()
+        return start, (_add_months(start, 1) - timedelta(days=1))
+    start = date.fromisoformat(from_str[:10]) if from_str else None
+    end = date.fromisoformat(to_str[:10]) if to_str else None
+    if start is None:
+        start = end - timedelta(days=CALENDAR_DEFAULT_WINDOW_DAYS)
+    if end is None:
+        end = start + timedelta(days=CALENDAR_DEFAULT_WINDOW_DAYS)
+    return start, end
+
+
+def _iter_occurrences(event, series_start, rule, start, end):
+    for d in _iter_rrule(series_start, rule, start, end):
+        yield {**event, 'date': d.isoformat(), 'seriesStart': event['date'], 'recurring': True}
+
+
+def iter_calendar_range(start, end, agent=''):
+    """Yield events and recurring occurrences between two dates, in date/time order."""
+    index = _calendar_lookup()
+    lo = bisect.bisect_left(index['keys'], start.isoformat())
+    hi = bisect.bisect_right(index['keys'], end.isoformat() + 'T\uffff')
+    streams = [iter(index['events'][lo:hi])]
+    for series_start, rule, event in index['recurring']:
+        streams.append(_iter_occurrences(event, series_start, rule, start, end))
+    for event in heapq.merge(*streams, key=_event_sort_key):
+        if agent and event.get('agentId') not in (agent, 'all'):
+            continue
+        yield event
+
+
 @app.route('/api/calendar')
 def api_calendar():
-    data = load_calendar()
-    events = data.get('events', [])
+    """List events. With ?month=YYYY-MM or ?from=&to= recurring events are expanded."""
     month = request.args.get('month', '')
+    from_str = request.args.get('from', '')
+    to_str = request.args.get('to', '')
     agent = request.args.get('agent', '')
-    if month:
-        events = [e for e in events if e.get('date', '').startswith(month)]
-    if agent:
-        events = [e for e in events if e.get('agentId') in (agent, 'all')]
-    return jsonify(events)
+    if not (month or from_str or to_str):
+        events = (e for e in load_calendar().get('events', []) if not agent or e.get('agentId') in (agent, 'all'))
+        if wants_ndjson():
+            return ndjson_response(events)
+        return jsonify(list(events))
+
+    try:
+        start, end = _calendar_window(month, from_str, to_str)
+    except ValueError:
+        return jsonify({'error': 'month must be YYYY-MM, from/to must be YYYY-MM-DD'}), 400
+    if end < start:
+        return jsonify({'error': 'from must not be after to'}), 400
+    if (end - start).days > CALENDAR_MAX_WINDOW_DAYS:
+        return jsonify({'error': f'range must not exceed {CALENDAR_MAX_WINDOW_DAYS} days'}), 400
+    if wants_ndjson():
+        return ndjson_response(iter_calendar_range(start, end, agent))
+    return jsonify(list(iter_calendar_range(start, end, agent)))
+
+
+CALENDAR_TEXT_FIELDS = ('title', 'description', 'date', 'time', 'agentId', 'type', 'createdBy')
+
+
+def _calendar_fields(body, event=None):
+    """Validate the event fields present in a create/update payload; returns (fields, None) or (None, error).
+
+    Null counts as empty; any other non-string value is an error. For an
+    update (event given) the date and rrule are checked together whenever
+    either of them changes.
+    """
+    if not isinstance(body, dict):
+        return None, 'request body must be a JSON object'
+    fields = {}
+    for key in CALENDAR_TEXT_FIELDS + ('rrule',):
+        if key in body:
+            value = body[key] if body[key] is not None else ''
+            if not isinstance(value, str):
+                return None, f'{key} must be a string'
+            fields[key] = value.strip()
+    if 'rrule' in fields:
+        fields['rrule'] = fields['rrule'].upper()
+    merged = {**(event or {}), **fields}
+    if not merged.get('title') or not merged.get('date'):
+        return None, 'title and date required'
+    try:
+        if event is None or 'date' in fields or 'rrule' in fields:
+            date.fromisoformat(merged['date'])
+            if merged.get('rrule'):
+                _parse_rrule(merged['rrule'])
+        if fields.get('time'):
+            datetime.strptime(fields['time'], '%H:%M')
+    except ValueError as e:
+        return None, str(e)
+    return fields, None
 
 
 @app.route('/api/calendar', methods=['POST'])
 def api_calendar_create():
     body = request.get_json() or {}
-    title = body.get('title', '').strip()
-    date = body.get('date', '').strip()
-    if not title or not date:
-        return jsonify({'error': 'title and date required'}), 400
+    fields, error = _calendar_fields(body)
+    if error:
+        return jsonify({'error': error}), 400
     data = load_calendar()
     eid = f"e_{data['nextId']}"
     now = datetime.now().isoformat(timespec='seconds')
     event = {
         'id': eid,
-        'title': title,
-        'description': body.get('description', '').strip(),
-        'date': date,
-        'time': body.get('time', '').strip() or '00:00',
-        'agentId': body.get('agentId', 'all'),
-        'type': body.get('type', 'reminder'),
-        'createdBy': body.get('createdBy', 'user'),
+        'title': fields['title'],
+        'description': fields.get('description', ''),
+        'date': fields['date'],
+        'time': fields.get('time') or '00:00',
+        'agentId': fields.get('agentId') or 'all',
+        'type': fields.get('type') or 'reminder',
+        'createdBy': fields.get('createdBy') or 'user',
         'createdAt': now,
     }
+    if fields.get('rrule'):
+        event['rrule'] = fields['rrule']
     data['events'].append(event)
     data['nextId'] += 1
     save_calendar(data)
@@ -1421,9 +3033,20 @@ def api_calendar_update(eid):
     event = next((e for e in data['events'] if e['id'] == eid), None)
     if not event:
         return jsonify({'error': 'event not found'}), 404
-    for key in ('title', 'description', 'date', 'time', 'agentId', 'type'):
-        if key in body:
-            event[key] = body[key]
+    if isinstance(body, dict):
+        body = {k: v for k, v in body.items() if k != 'createdBy'}
+    fields, error = _calendar_fields(body, event)
+    if error:
+        return jsonify({'error': error}), 400
+    if 'time' in fields:
+        fields['time'] = fields['time'] or '00:00'
+    for key in ('agentId', 'type'):
+        if key in fields and not fields[key]:
+            del fields[key]
+    if 'rrule' in fields and not fields['rrule']:
+        del fields['rrule']
+        event.pop('rrule', None)
+    event.update(fields)
     save_calendar(data)
     return jsonify(event)
 
@@ -1472,6 +3095,1253 @@ def api_agent_profile_save(agent_id):
     return jsonify({'ok': True, 'filename': filename})
 
 
+## ── TRANSCRIPT ARCHIVE ──
+
+TRANSCRIPT_FRAME_BYTES = 256 * 1024
+ARCHIVE_SUFFIX = '.gz'
+ARCHIVE_INDEX_SUFFIX = '.gz.idx'
+ARCHIVE_ASIDE_SUFFIX = '.archiving'
+
+
+def _archive_index(session_file):
+    """Frame index of a transcript's gzip archive, or None if it has none.
+
+    The archive is a series of independent gzip members ("frames"), each
+    holding whole lines. The sidecar index lists [uncompressed_offset,
+    compressed_offset] per frame, the total uncompressed size, and the
+    (mtime_ns, size) of the live file it absorbed.
+    """
+    gz_path = session_file + ARCHIVE_SUFFIX
+    try:
+        st = os.stat(gz_path)
+    except OSError:
+        return None
+    sig = (st.st_mtime_ns, st.st_size)
+    with _archive_lock:
+        cached = _archive_indexes.get(gz_path)
+        if cached and cached[0] == sig:
+            return cached[1]
+        try:
+            with open(session_file + ARCHIVE_INDEX_SUFFIX) as f:
+                idx = json.load(f)
+            if idx.get('csize') != st.st_size:
+                raise ValueError('index does not match archive')
+        except (OSError, ValueError):
+            # No usable index: one frame from the start, size by decompressing once
+            size = 0
+            with gzip.open(gz_path, 'rb') as f:
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+            idx = {'size': size, 'csize': st.st_size, 'frames': [[0, 0]], 'absorbed': None}
+        idx['starts'] = [u for u, _c in idx['frames']]
+        _archive_indexes[gz_path] = (sig, idx)
+        return idx
+
+
+def _transcript_segments(session_file):
+    """Logical layout of a transcript as [(start, path, frames)]: the archive first, then the live file.
+
+    frames is None for the live .jsonl. A live file already absorbed into the
+    archive (left behind by an interrupted archival) is ignored. Holds the
+    archive lock so a transcript midway through archival is never observed.
+    """
+    segments = []
+    with _archive_lock:
+        idx = _archive_index(session_file)
+        if idx:
+            segments.append((0, session_file + ARCHIVE_SUFFIX, idx))
+        try:
+            st = os.stat(session_file)
+        except OSError:
+            return segments
+        if not idx or [st.st_mtime_ns, st.st_size] != idx['absorbed']:
+            segments.append((idx['size'] if idx else 0, session_file, None))
+    return segments
+
+
+def transcript_exists(session_file):
+    return bool(_transcript_segments(session_file))
+
+
+def transcript_size(session_file):
+    """Uncompressed size of a transcript across archive and live file; OSError if neither exists."""
+    segments = _transcript_segments(session_file)
+    if not segments:
+        raise FileNotFoundError(session_file)
+    start, path, idx = segments[-1]
+    return start + (idx['size'] if idx else os.path.getsize(path))
+
+
+class TranscriptReader(io.RawIOBase):
+    """Read-only view of a transcript addressed by uncompressed byte offsets.
+
+    Offsets recorded before a session was archived (line indexes, search
+    index, analytics tail positions) stay valid afterwards. A seek into the
+    archive decompresses from the start of the enclosing frame only.
+    """
+
+    def __init__(self, session_file):
+        super().__init__()
+        self._segments = _transcript_segments(session_file)
+        if not self._segments:
+            raise FileNotFoundError(session_file)
+        self._pos = 0
+        self._files = []
+        self._limit = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            start, path, idx = self._segments[-1]
+            offset += start + (idx['size'] if idx else os.path.getsize(path))
+        offset = max(offset, 0)
+        if offset != self._pos:
+            self._drop()
+            self._pos = offset
+        return self._pos
+
+    def _drop(self):
+        for f in reversed(self._files):
+            f.close()
+        self._files = []
+
+    def _open(self):
+        """Open the segment containing the current position; False at end of transcript."""
+        for i, (start, path, idx) in enumerate(self._segments):
+            end = start + idx['size'] if idx else None
+            if self._pos < start or (end is not None and self._pos >= end):
+                continue
+            raw = open(path, 'rb')
+            if idx is None:
+                raw.seek(self._pos - start)
+                self._files = [raw]
+            else:
+                k = bisect.bisect_right(idx['starts'], self._pos - start) - 1
+                ustart, cstart = idx['frames'][k]
+                raw.seek(cstart)
+                gz = gzip.GzipFile(fileobj=raw, mode='rb')
+                gz.seek(self._pos - start - ustart)
+                self._files = [raw, gz]
+            self._limit = end
+            return True
+        return False
+
+    def readinto(self, b):
+        while True:
+            if not self._files and not self._open():
+                return 0
+            n = len(b) if self._limit is None else min(len(b), self._limit - self._pos)
+            data = self._files[-1].read(n) if n > 0 else b''
+            if data:
+                b[:len(data)] = data
+                self._pos += len(data)
+                return len(data)
+            if self._limit is None:
+                return 0
+            self._drop()
+            if self._pos < self._limit:
+                # Archive shorter than its index claims
+                raise OSError(f'truncated transcript archive: {self._segments[0][1]}')
+
+    def close(self):
+        self._drop()
+        super().close()
+
+
+def open_transcript(session_file):
+    """Open a session transcript for binary reading, whether live, archived or both."""
+    segments = _transcript_segments(session_file)
+    if len(segments) == 1 and segments[0][2] is None:
+        return open(session_file, 'rb')
+    return io.BufferedReader(TranscriptReader(session_file), buffer_size=65536)
+
+
+def _restore_aside(session_file, aside):
+    """Put a transcript renamed aside for archival back in place.
+
+    A writer that reopened the live path meanwhile started a new file; its
+    lines come after the renamed ones, so they are appended before the swap.
+    """
+    try:
+        os.link(aside, session_file)
+    except FileExistsError:
+        with open(aside, 'ab') as out, open(session_file, 'rb') as f:
+            shutil.copyfileobj(f, out)
+        os.replace(aside, session_file)
+    else:
+        os.unlink(aside)
+
+
+def archive_transcript(session_file):
+    """Compress a live transcript into its seekable gzip archive, then remove it.
+
+    The live file is first renamed aside so a writer reopening the path starts
+    a fresh live file that follows the archive. An existing archive is
+    extended in place: its frames are kept byte for byte and the renamed file
+    is appended as new frames cut at line boundaries. Returns
+    (bytes_in, bytes_out), or None if the file changed meanwhile.
+    """
+    gz_path = session_file + ARCHIVE_SUFFIX
+    idx_path = session_file + ARCHIVE_INDEX_SUFFIX
+    aside = session_file + ARCHIVE_ASIDE_SUFFIX
+    with _archive_lock:
+        if os.path.exists(aside):
+            _restore_aside(session_file, aside)
+        st = os.stat(session_file)
+        idx = _archive_index(session_file)
+        absorbed = bool(idx) and idx['absorbed'] == [st.st_mtime_ns, st.st_size]
+        os.rename(session_file, aside)
+        try:
+            with open(aside, 'rb') as f:
+                st = os.fstat(f.fileno())
+                sig = [st.st_mtime_ns, st.st_size]
+                if absorbed:
+                    # Left behind by an interrupted archival; only drop it if nobody wrote to it since
+                    if idx['absorbed'] != sig:
+                        _restore_aside(session_file, aside)
+                        return None
+                    os.unlink(aside)
+                    return 0, 0
+                frames = [list(fr) for fr in idx['frames']] if idx else []
+                usize = idx['size'] if idx else 0
+                consumed = 0
+                with open(gz_path + '.tmp', 'wb') as out:
+                    if idx:
+                        with open(gz_path, 'rb') as old:
+                            shutil.copyfileobj(old, out)
+                    before = out.tell()
+                    carry = b''
+                    while True:
+                        block = f.read(TRANSCRIPT_FRAME_BYTES)
+                        consumed += len(block)
+                        data = carry + block
+                        if not data:
+                            break
+                        cut = data.rfind(b'\n') + 1 if block else len(data)
+                        if cut == 0:
+                            carry = data
+                            continue
+                        frames.append([usize, out.tell()])
+                        out.write(gzip.compress(data[:cut], mtime=0))
+                        usize += cut
+                        carry = data[cut:]
+                    csize = out.tell()
+                st = os.fstat(f.fileno())
+            if st.st_size != consumed:
+                # Still being appended through an open handle
+                os.unlink(gz_path + '.tmp')
+                _restore_aside(session_file, aside)
+                return None
+            with open(idx_path + '.tmp', 'w') as f:
+                json.dump({'size': usize, 'csize': csize, 'frames': frames,
+                           'absorbed': [st.st_mtime_ns, st.st_size]}, f)
+            os.replace(gz_path + '.tmp', gz_path)
+            os.replace(idx_path + '.tmp', idx_path)
+            os.unlink(aside)
+        except BaseException:
+            for tmp in (gz_path + '.tmp', idx_path + '.tmp'):
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+            if os.path.exists(aside):
+                _restore_aside(session_file, aside)
+            raise
+        return consumed, csize - before
+
+
+def _open_file_paths():
+    """Paths of regular files any visible process holds open (empty where /proc is unavailable)."""
+    paths = set()
+    try:
+        pids = [p for p in os.listdir('/proc') if p.isdigit()]
+    except OSError:
+        return paths
+    for pid in pids:
+        fd_dir = f'/proc/{pid}/fd'
+        try:
+            fds = os.listdir(fd_dir)
+        except OSError:
+            continue
+        for fd in fds:
+            try:
+                paths.add(os.readlink(f'{fd_dir}/{fd}'))
+            except OSError:
+                continue
+    return paths
+
+
+def _session_active(sess, st, cutoff, open_paths):
+    """Whether the gateway may still be writing a session: touched since the cutoff or held open."""
+    if max(st.st_mtime * 1000, _to_ms(sess.get('updatedAt')) or 0) > cutoff * 1000:
+        return True
+    return os.path.realpath(sess['sessionFile']) in open_paths
+
+
+def archive_cold_transcripts(days, dry_run=False):
+    """Archive the transcripts of sessions idle for at least `days`; sessions.json is left as is.
+
+    A session is skipped while its gateway entry is active, judged again from a
+    fresh read of sessions.json right before its transcript is archived.
+    """
+    cutoff = time.time() - days * 86400
+    result = {'days': days, 'dryRun': dry_run, 'archived': 0, 'bytesIn': 0, 'bytesOut': 0, 'errors': []}
+    open_paths = _open_file_paths()
+    for agent in load_config().get('agents', {}).get('list', []):
+        sessions_path = AGENTS_DIR / agent['id'] / 'sessions' / 'sessions.json'
+        sessions_sig = _file_sig(sessions_path)
+        sessions = load_sessions(agent['id'])
+        for key, sess in list(sessions.items()):
+            sf = sess.get('sessionFile') if isinstance(sess, dict) else None
+            if not sf or not isinstance(sf, str):
+                continue
+            try:
+                st = os.stat(sf)
+            except OSError:
+                continue
+            if _session_active(sess, st, cutoff, open_paths):
+                continue
+            if dry_run:
+                result['archived'] += 1
+                result['bytesIn'] += st.st_size
+                continue
+            if _file_sig(sessions_path) != sessions_sig:
+                sessions_sig = _file_sig(sessions_path)
+                sessions = load_sessions(agent['id'])
+            fresh = sessions.get(key)
+            if not isinstance(fresh, dict) or fresh.get('sessionFile') != sf:
+                continue
+            try:
+                if _session_active(fresh, os.stat(sf), cutoff, open_paths):
+                    continue
+                done = archive_transcript(sf)
+            except OSError as e:
+                result['errors'].append({'agent': agent['id'], 'sessionKey': key, 'error': str(e)})
+                continue
+            if done:
+                result['archived'] += 1
+                result['bytesIn'] += done[0]
+                result['bytesOut'] += done[1]
+    return result
+
+
+def _archive_tick():
+    try:
+        archive_cold_transcripts(TRANSCRIPT_ARCHIVE_DAYS)
+    except Exception:
+        pass
+    start_transcript_archiver()
+
+
+def start_transcript_archiver():
+    """Archive cold transcripts daily when OPENCLAW_HQ_ARCHIVE_DAYS is set."""
+    global _archive_timer
+    if TRANSCRIPT_ARCHIVE_DAYS <= 0:
+        return
+    _archive_timer = threading.Timer(86400, _archive_tick)
+    _archive_timer.daemon = True
+    _archive_timer.start()
+
+
+@app.route('/api/transcripts/archive', methods=['POST'])
+def api_transcripts_archive():
+    """Archive transcripts idle for at least `days` (default OPENCLAW_HQ_ARCHIVE_DAYS or 30); `dryRun` only counts."""
+    data = request.json or {}
+    try:
+        days = float(data.get('days') or TRANSCRIPT_ARCHIVE_DAYS or 30)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'days must be a number'}), 400
+    if days <= 0:
+        return jsonify({'error': 'days must be positive'}), 400
+    return jsonify(archive_cold_transcripts(days, dry_run=bool(data.get('dryRun'))))
+
+
+## ── TRANSCRIPT BROWSING ──
+
+TRANSCRIPT_CHECKPOINT_LINES = 256
+TRANSCRIPT_INDEX_MAX_FILES = 256
+TRANSCRIPT_PAGE_LIMIT = 50
+MESSAGE_PREVIEW_CHARS = 600
+
+
+def _line_index(path):
+    """Return (line_count, checkpoints) for a transcript file.
+
+    checkpoints[i] is the byte offset of line i * TRANSCRIPT_CHECKPOINT_LINES.
+    The index is built once and extended from where it stopped as the file
+    grows, so locating any line costs one seek plus at most one block read.
+    """
+    size = transcript_size(path)
+    with _line_indexes_lock:
+        idx = _line_indexes.get(path)
+        if idx is None or size < idx['end']:
+            idx = {'end': 0, 'lines': 0, 'checkpoints': array.array('q')}
+        _line_indexes[path] = idx
+        _line_indexes.move_to_end(path)
+        while len(_line_indexes) > TRANSCRIPT_INDEX_MAX_FILES:
+            _line_indexes.popitem(last=False)
+        if size > idx['end']:
+            started = time.perf_counter()
+            with open_transcript(path) as f:
+                f.seek(idx['end'])
+                pos, lines, checkpoints = idx['end'], idx['lines'], idx['checkpoints']
+                for raw in f:
+                    if not raw.endswith(b'\n'):
+                        break
+                    if lines % TRANSCRIPT_CHECKPOINT_LINES == 0:
+                        checkpoints.append(pos)
+                    pos += len(raw)
+                    lines += 1
+            count_read('transcript', pos - idx['end'], started, path)
+            idx['end'], idx['lines'] = pos, lines
+        return idx['lines'], idx['checkpoints']
+
+
+def _read_line_range(path, checkpoints, start, stop):
+    """Yield (line_no, raw) for lines in [start, stop) using the nearest checkpoint."""
+    block = start // TRANSCRIPT_CHECKPOINT_LINES
+    n = block * TRANSCRIPT_CHECKPOINT_LINES
+    started = time.perf_counter()
+    with open_transcript(path) as f:
+        f.seek(checkpoints[block])
+        try:
+            for raw in f:
+                if n >= stop:
+                    break
+                if n >= start:
+                    yield n, raw
+                n += 1
+        finally:
+            count_read('transcript', f.tell() - checkpoints[block], started, path)
+
+
+def _session_file(agent_id, session_key):
+    sess = load_sessions(agent_id).get(session_key)
+    sf = sess.get('sessionFile') if isinstance(sess, dict) else None
+    return sf if sf and transcript_exists(sf) else None
+
+
+@app.route('/api/agent/<agent_id>/sessions/<path:session_key>/messages')
+def api_session_messages(agent_id, session_key):
+    """Page backwards through a session transcript (?before=<line>&limit=N&role=)."""
+    sf = _session_file(agent_id, session_key)
+    if not sf:
+        return jsonify({'error': 'session not found'}), 404
+    limit = min(max(request.args.get('limit', TRANSCRIPT_PAGE_LIMIT, type=int), 1), 500)
+    role_filter = request.args.get('role', '')
+    total, checkpoints = _line_index(sf)
+    before = request.args.get('before', type=int)
+    before = total if before is None else max(0, min(before, total))
+
+    page = []
+    block_end = before
+    while block_end > 0 and len(page) < limit:
+        block_start = (block_end - 1) // TRANSCRIPT_CHECKPOINT_LINES * TRANSCRIPT_CHECKPOINT_LINES
+        block = []
+        for n, raw in _read_line_range(sf, checkpoints, block_start, block_end):
+            parsed = _parse_transcript_message(raw)
+            if parsed and (not role_filter or parsed[0] == role_filter):
+                block.append((n, parsed))
+        for n, (role, ts, text) in reversed(block):
+            page.append({
+                'line': n,
+                'role': role,
+                'timestamp': ts,
+                'text': text[:MESSAGE_PREVIEW_CHARS],
+                'truncated': len(text) > MESSAGE_PREVIEW_CHARS,
+            })
+            if len(page) >= limit:
+                break
+        block_end = block_start
+    page.reverse()
+
+    return jsonify({
+        'agent': agent_id,
+        'sessionKey': session_key,
+        'totalLines': total,
+        'messages': page,
+        'nextBefore': page[0]['line'] if page and page[0]['line'] > 0 else None,
+    })
+
+
+@app.route('/api/agent/<agent_id>/sessions/<path:session_key>/messages/<int:line>')
+def api_session_message(agent_id, session_key, line):
+    """Return one transcript message in full."""
+    sf = _session_file(agent_id, session_key)
+    if not sf:
+        return jsonify({'error': 'session not found'}), 404
+    total, checkpoints = _line_index(sf)
+    if line >= total:
+        return jsonify({'error': 'line out of range'}), 404
+    raw = next(_read_line_range(sf, checkpoints, line, line + 1))[1]
+    parsed = _parse_transcript_message(raw)
+    if not parsed:
+        return jsonify({'error': 'not a message line'}), 404
+    role, ts, text = parsed
+    return jsonify({'line': line, 'role': role, 'timestamp': ts, 'text': text})
+
+
+## ── TRANSCRIPT SEARCH ──
+
+SEARCH_RESULT_LIMIT = 50
+SEARCH_INDEX_BATCH = 2000
+
+
+def _search_db():
+    conn = sqlite3.connect(str(SEARCH_DB_PATH), timeout=30)
+    conn.execute(
+        'CREATE TABLE IF NOT EXISTS indexed_files ('
+        'path TEXT PRIMARY KEY, agent TEXT, session TEXT, offset INTEGER, size INTEGER)'
+    )
+    conn.execute(
+        'CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5('
+        "text, agent UNINDEXED, session UNINDEXED, role UNINDEXED, ts UNINDEXED, "
+        "path UNINDEXED, offset UNINDEXED, tokenize='unicode61')"
+    )
+    return conn
+
+
+def _iter_transcript_lines(path, offset):
+    """Yield (line_offset, line) for complete lines from a byte offset; the last yield is (end, None)."""
+    started = time.perf_counter()
+    with open_transcript(path) as f:
+        f.seek(offset)
+        pos = offset
+        try:
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                yield pos, raw
+                pos += len(raw)
+        finally:
+            count_read('transcript', pos - offset, started, path)
+    yield pos, None
+
+
+def _parse_transcript_message(raw):
+    """Return (role, timestamp_ms, text) for a transcript message line, else None."""
+    try:
+        entry = json.loads(raw)
+    except Exception:
+        return None
+    if not isinstance(entry, dict) or entry.get('type') != 'message':
+        return None
+    msg = entry.get('message')
+    if not isinstance(msg, dict):
+        return None
+    text = _message_text(msg.get('content'))
+    if not text:
+        return None
+    return msg.get('role', ''), _to_ms(msg.get('timestamp') or entry.get('timestamp')), text
+
+
+def _index_transcript(conn, path, agent_id, session_key):
+    """Index new messages appended to one transcript since the last recorded offset."""
+    try:
+        size = transcript_size(path)
+    except OSError:
+        return 0
+    row = conn.execute('SELECT offset FROM indexed_files WHERE path = ?', (path,)).fetchone()
+    offset = row[0] if row else 0
+    if size < offset:
+        # Rewritten or truncated: start over for this file
+        conn.execute('DELETE FROM messages WHERE path = ?', (path,))
+        offset = 0
+    if size == offset:
+        return 0
+
+    added = 0
+    batch = []
+    for line_offset, raw in _iter_transcript_lines(path, offset):
+        if raw is None:
+            offset = line_offset
+            break
+        parsed = _parse_transcript_message(raw)
+        if parsed:
+            role, ts, text = parsed
+            batch.append((text, agent_id, session_key, role, ts, path, line_offset))
+        if len(batch) >= SEARCH_INDEX_BATCH:
+            conn.executemany('INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+            added += len(batch)
+            batch = []
+    if batch:
+        conn.executemany('INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+        added += len(batch)
+    conn.execute(
+        'INSERT OR REPLACE INTO indexed_files (path, agent, session, offset, size) VALUES (?, ?, ?, ?, ?)',
+        (path, agent_id, session_key, offset, size),
+    )
+    return added
+
+
+def _transcript_sig(session_file):
+    """Change detector for a transcript: signatures of its live file and its archive."""
+    return _file_sig(Path(session_file)), _file_sig(Path(session_file + ARCHIVE_SUFFIX))
+
+
+def index_transcripts(agent_filter=''):
+    """Bring the search index up to date with every agent's session transcripts.
+
+    Transcripts whose signature is unchanged since they were last indexed
+    are skipped before the index lock is taken, so a query over a quiet
+    tree costs a few stats and no database work.
+    """
+    stale = []
+    for agent in load_config().get('agents', {}).get('list', []):
+        agent_id = agent['id']
+        if agent_filter and agent_id != agent_filter:
+            continue
+        for key, sess in load_sessions(agent_id).items():
+            sf = sess.get('sessionFile') if isinstance(sess, dict) else None
+            if not sf:
+                continue
+            sig = _transcript_sig(sf)
+            if _search_indexed_sigs.get((SEARCH_DB_PATH, sf)) != sig:
+                stale.append((agent_id, key, sf, sig))
+    if not stale:
+        return 0
+    added = 0
+    with _search_index_lock:
+        _ensure_hq()
+        conn = _search_db()
+        try:
+            for agent_id, key, sf, sig in stale:
+                with conn:
+                    added += _index_transcript(conn, sf, agent_id, key)
+                _search_indexed_sigs[SEARCH_DB_PATH, sf] = sig
+        finally:
+            conn.close()
+    return added
+
+
+@app.route('/api/search/messages')
+def api_search_messages():
+    """Search message text across all agents' transcripts (?q=&agent=&role=&from=&to=&limit=)."""
+    terms = _tokenize(request.args.get('q', ''))
+    if not terms:
+        return jsonify({'error': 'q required'}), 400
+    agent = request.args.get('agent', '')
+    role = request.args.get('role', '')
+    limit = min(max(request.args.get('limit', SEARCH_RESULT_LIMIT, type=int), 1), 500)
+    ts_from = _to_ms(request.args.get('from', ''))
+    ts_to = _to_ms(request.args.get('to', ''), end_of_day=True)
+
+    try:
+        indexed = index_transcripts(agent)
+        conn = _search_db()
+    except sqlite3.Error as e:
+        return jsonify({'error': f'search index unavailable: {e}'}), 500
+
+    sql = (
+        "SELECT agent, session, role, ts, snippet(messages, 0, '[', ']', '...', 16), path, offset "
+        'FROM messages WHERE messages MATCH ?'
+    )
+    params = [' '.join(f'"{t}"*' for t in terms)]
+    for clause, value in (('agent = ?', agent), ('role = ?', role), ('ts >= ?', ts_from), ('ts <= ?', ts_to)):
+        if value:
+            sql += f' AND {clause}'
+            params.append(value)
+    sql += ' ORDER BY bm25(messages) LIMIT ?'
+    params.append(limit)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+    return jsonify({
+        'query': request.args.get('q', ''),
+        'indexed': indexed,
+        'results': [
+            {
+                'agent': a, 'sessionKey': sk, 'role': r, 'timestamp': ts,
+                'snippet': snip, 'sessionFile': path, 'offset': off,
+            }
+            for a, sk, r, ts, snip, path, off in rows
+        ],
+    })
+
+
+## ── TRANSCRIPT ANALYTICS ──
+
+TRANSCRIPT_BATCH = 1000
+USAGE_DEFAULT_DAYS = 30
+USAGE_GROUPS = ('agent', 'model', 'day', 'channel')
+
+_usage_rollups = {}      # (agent, model, channel) -> {'start': day, 'input': array, 'output': array}
+
+LATENCY_ACCURACY = 0.01
+LATENCY_SLOT_SECONDS = 3600
+LATENCY_RETENTION_SLOTS = 7 * 24
+LATENCY_WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400}
+_LATENCY_GAMMA = (1 + LATENCY_ACCURACY) / (1 - LATENCY_ACCURACY)
+
+_latency_sketches = {}   # ('agent'|'model', name) -> {slot: Counter(bucket -> count)}
+
+ACTIVITY_RETENTION_HOURS = 90 * 24
+ACTIVITY_DEFAULT_DAYS = 30
+ACTIVITY_MAX_DAYS = 366
+ACTIVITY_GRANULARITIES = ('hour', 'day')
+
+_activity = {}           # agent -> {(role, channel): {'start': hour, 'count': array}}
+
+
+def transcript_consumer(fn):
+    """Register fn(agent, record, entries) to receive newly appended transcript entries."""
+    _transcript_consumers.append(fn)
+    return fn
+
+
+def transcript_reconciler(fn):
+    """Register fn(agent, record), called once per session after its new entries are consumed."""
+    _transcript_reconcilers.append(fn)
+    return fn
+
+
+def ingest_transcripts():
+    """Feed entries appended since the last call to every registered consumer.
+
+    Entries go to the consumers in batches; a session's offset moves past a
+    batch only once every consumer has taken it. After the last batch each
+    reconciler runs once per session so it can square up against
+    sessions.json. State kept for transcripts that no longer exist is
+    dropped at the end of the scan. Callers read the consumers' state while
+    holding _transcript_lock.
+    """
+    cfg = load_config()
+    with _transcript_lock:
+        seen = set()
+        for agent in cfg.get('agents', {}).get('list', []):
+            for key, sess in load_sessions(agent['id']).items():
+                if not isinstance(sess, dict):
+                    continue
+                seen.add((agent['id'], key))
+                record = _session_records.get((agent['id'], key))
+                if record is None:
+                    record = _session_records[(agent['id'], key)] = SessionRecord(agent['id'], key)
+                record.update(sess)
+                sf = record.session_file
+                offset = _transcript_offsets.get(sf, 0) if sf else 0
+                try:
+                    size = transcript_size(sf) if sf else 0
+                except OSError:
+                    size = offset = 0
+                    _transcript_offsets.pop(sf, None)
+                    record.pending_user_ts = None
+                if size < offset:
+                    # Truncated or rewritten: what was read is already counted, so follow from the new end
+                    _transcript_offsets[sf] = offset = size
+                    record.pending_user_ts = None
+                if size > offset:
+                    batch = []
+                    for line_offset, raw in _iter_transcript_lines(sf, offset):
+                        if raw is not None:
+                            try:
+                                entry = json.loads(raw)
+                            except Exception:
+                                entry = None
+                            if isinstance(entry, dict):
+                                batch.append(entry)
+                            if len(batch) < TRANSCRIPT_BATCH:
+                                continue
+                            line_offset += len(raw)
+                        if batch:
+                            for fn in _transcript_consumers:
+                                fn(agent, record, batch)
+                            batch = []
+                        _transcript_offsets[sf] = line_offset
+                for fn in _transcript_reconcilers:
+                    fn(agent, record)
+
+        live = set()
+        for record_key, record in list(_session_records.items()):
+            if record_key in seen or (record.session_file and transcript_exists(record.session_file)):
+                live.add(record.session_file)
+            else:
+                del _session_records[record_key]
+        for sf in [sf for sf in _transcript_offsets if sf not in live and not transcript_exists(sf)]:
+            del _transcript_offsets[sf]
+
+
+def _entry_ts(entry, msg):
+    """Epoch ms of a transcript entry, or None if it has no plausible timestamp."""
+    return _plausible_ms(_to_ms(msg.get('timestamp') or entry.get('timestamp')))
+
+
+def _entry_day(entry, msg, record):
+    ms = _entry_ts(entry, msg) or _plausible_ms(record.updated_at) or time.time() * 1000
+    return date.fromtimestamp(ms / 1000).toordinal()
+
+
+def _message_model(msg, default_model):
+    """'provider/model' for an assistant message, falling back to the session/agent model."""
+    model = msg.get('model') if isinstance(msg.get('model'), str) else ''
+    model = model or default_model
+    if isinstance(msg.get('provider'), str) and msg['provider'] and model and '/' not in model:
+        model = f"{msg['provider']}/{model}"
+    return model or 'unknown'
+
+
+def _usage_tokens(usage):
+    """Extract (input, output) token counts from the usage shapes providers report.
+
+    Malformed counts (non-numeric, negative, absurdly large) yield (0, 0) so
+    the message is skipped rather than counted partially.
+    """
+    if not isinstance(usage, dict):
+        return 0, 0
+    inp = usage.get('input', usage.get('inputTokens', usage.get('input_tokens', usage.get('prompt_tokens', 0))))
+    out = usage.get('output', usage.get('outputTokens', usage.get('output_tokens', usage.get('completion_tokens', 0))))
+    inp, out = _token_count(inp), _token_count(out)
+    if inp is None or out is None:
+        return 0, 0
+    return inp, out
+
+
+def _new_bucket(start, *fields):
+    return {'start': start, **{f: array.array('q') for f in fields}}
+
+
+def _bucket_add(bucket, index, **amounts):
+    """Add amounts at an absolute index (day or hour number) of a bucket's parallel arrays.
+
+    All arrays in a bucket share bucket['start'] and grow at either end as needed.
+    """
+    fields = [k for k in bucket if k != 'start']
+    if index < bucket['start']:
+        pad = array.array('q', [0]) * (bucket['start'] - index)
+        for f in fields:
+            bucket[f] = pad + bucket[f]
+        bucket['start'] = index
+    i = index - bucket['start']
+    size = len(bucket[fields[0]])
+    if i >= size:
+        grow = array.array('q', [0]) * (i + 1 - size)
+        for f in fields:
+            bucket[f].extend(grow)
+    for f, amount in amounts.items():
+        bucket[f][i] += amount
+
+
+def _bucket_trim(bucket, keep):
+    """Drop leading entries so at most `keep` remain."""
+    fields = [k for k in bucket if k != 'start']
+    excess = len(bucket[fields[0]]) - keep
+    if excess > 0:
+        for f in fields:
+            del bucket[f][:excess]
+        bucket['start'] += excess
+
+
+def _usage_add(agent_id, model, channel, day, inp, out):
+    key = (agent_id, model or 'unknown', channel or '')
+    bucket = _usage_rollups.get(key)
+    if bucket is None:
+        bucket = _usage_rollups[key] = _new_bucket(day, 'input', 'output')
+    _bucket_add(bucket, day, input=inp, output=out)
+
+
+@transcript_consumer
+def _usage_consume(agent, record, entries):
+    """Roll per-message usage into day buckets."""
+    agent_id = agent['id']
+    default_model = record.model or agent.get('model', {}).get('primary', '')
+    for entry in entries:
+        msg = entry.get('message') if entry.get('type') == 'message' else None
+        if not isinstance(msg, dict) or msg.get('role') != 'assistant':
+            continue
+        inp, out = _usage_tokens(msg.get('usage'))
+        if not inp and not out:
+            continue
+        model = _message_model(msg, default_model)
+        _usage_add(agent_id, model, record.channel, _entry_day(entry, msg, record), inp, out)
+        record.counted_input += inp
+        record.counted_output += out
+
+
+@transcript_reconciler
+def _usage_reconcile(agent, record):
+    """Top up from sessions.json totals once the transcript has been read to its end.
+
+    Tokens sessions.json reports beyond what the transcript carried (older
+    transcripts have no per-message usage) are attributed to the session's
+    last update day, so nothing is counted twice.
+    """
+    default_model = record.model or agent.get('model', {}).get('primary', '')
+    gap_in = max(0, record.input_tokens - record.counted_input)
+    gap_out = max(0, record.output_tokens - record.counted_output)
+    if gap_in or gap_out:
+        _usage_add(agent['id'], default_model, record.channel, _entry_day({}, {}, record), gap_in, gap_out)
+        record.counted_input += gap_in
+        record.counted_output += gap_out
+
+
+def _sketch_bucket(value):
+    return math.ceil(math.log(max(value, 1.0), _LATENCY_GAMMA))
+
+
+def _sketch_value(bucket):
+    return 2 * _LATENCY_GAMMA ** bucket / (_LATENCY_GAMMA + 1)
+
+
+def _latency_add(key, ts_ms, latency_ms):
+    """Record one turnaround in the hourly slot of a log-bucketed (DDSketch-style) histogram."""
+    slots = _latency_sketches.setdefault(key, {})
+    slot = int(ts_ms // 1000 // LATENCY_SLOT_SECONDS)
+    slots.setdefault(slot, collections.Counter())[_sketch_bucket(latency_ms)] += 1
+    oldest = slot - LATENCY_RETENTION_SLOTS
+    if len(slots) > LATENCY_RETENTION_SLOTS:
+        for stale in [s for s in slots if s <= oldest]:
+            del slots[stale]
+
+
+def _sketch_quantiles(counts, quantiles):
+    """Quantile estimates (within LATENCY_ACCURACY relative error) from merged bucket counts."""
+    total = sum(counts.values())
+    if not total:
+        return [None] * len(quantiles)
+    buckets = sorted(counts.items())
+    result = []
+    for q in quantiles:
+        rank = q * (total - 1)
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen > rank:
+                result.append(round(_sketch_value(bucket)))
+                break
+    return result
+
+
+@transcript_consumer
+def _latency_consume(agent, record, entries):
+    """Measure user -> first assistant reply turnaround for every exchange."""
+    agent_id = agent['id']
+    default_model = record.model or agent.get('model', {}).get('primary', '')
+    for entry in entries:
+        msg = entry.get('message') if entry.get('type') == 'message' else None
+        if not isinstance(msg, dict):
+            continue
+        ts = _entry_ts(entry, msg)
+        if ts is None:
+            continue
+        if msg.get('role') == 'user':
+            if record.pending_user_ts is None:
+                record.pending_user_ts = ts
+        elif msg.get('role') == 'assistant' and record.pending_user_ts is not None:
+            latency = ts - record.pending_user_ts
+            record.pending_user_ts = None
+            if latency >= 0:
+                _latency_add(('agent', agent_id), ts, latency)
+                _latency_add(('model', _message_model(msg, default_model)), ts, latency)
+
+
+@app.route('/api/agents/latency')
+def api_agents_latency():
+    """p50/p95/p99 user->assistant turnaround in ms per agent and model (?window=1h|24h|7d)."""
+    window = request.args.get('window', '24h')
+    if window not in LATENCY_WINDOWS:
+        return jsonify({'error': f'window must be one of {", ".join(LATENCY_WINDOWS)}'}), 400
+    ingest_transcripts()
+    first_slot = int(time.time() - LATENCY_WINDOWS[window]) // LATENCY_SLOT_SECONDS
+    result = {'window': window, 'agents': {}, 'models': {}}
+    with _transcript_lock:
+        for (kind, name), slots in _latency_sketches.items():
+            merged = collections.Counter()
+            for slot, counts in slots.items():
+                if slot >= first_slot:
+                    merged.update(counts)
+            if not merged:
+                continue
+            p50, p95, p99 = _sketch_quantiles(merged, (0.5, 0.95, 0.99))
+            result['agents' if kind == 'agent' else 'models'][name] = {
+                'count': sum(merged.values()), 'p50': p50, 'p95': p95, 'p99': p99,
+            }
+    return jsonify(result)
+
+
+@transcript_consumer
+def _activity_consume(agent, record, entries):
+    """Count messages per agent per hour, split by role and the session's channel."""
+    agent_id = agent['id']
+    channel = record.channel
+    series = _activity.setdefault(agent_id, {})
+    for entry in entries:
+        msg = entry.get('message') if entry.get('type') == 'message' else None
+        if not isinstance(msg, dict):
+            continue
+        ts = _entry_ts(entry, msg)
+        if ts is None:
+            continue
+        hour = int(ts // 3600000)
+        role = msg.get('role')
+        key = (role if isinstance(role, str) else '', channel)
+        bucket = series.get(key)
+        if bucket is None:
+            bucket = series[key] = _new_bucket(hour, 'count')
+        _bucket_add(bucket, hour, count=1)
+        if len(bucket['count']) > ACTIVITY_RETENTION_HOURS + 24 * 7:
+            _bucket_trim(bucket, ACTIVITY_RETENTION_HOURS)
+
+
+@app.route('/api/activity')
+def api_activity():
+    """Message counts per agent per time bucket (?agent=&granularity=hour|day&from=&to=)."""
+    granularity = request.args.get('granularity', 'hour')
+    if granularity not in ACTIVITY_GRANULARITIES:
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+    agent_filter = request.args.get('agent', '')
+    try:
+        end = date.fromisoformat(request.args['to'][:10]) if request.args.get('to') else date.today()
+        start = (date.fromisoformat(request.args['from'][:10]) if request.args.get('from')
+                 else end - timedelta(days=ACTIVITY_DEFAULT_DAYS - 1))
+    except ValueError:
+        return jsonify({'error': 'from/to must be YYYY-MM-DD'}), 400
+    if end < start or (end - start).days >= ACTIVITY_MAX_DAYS:
+        return jsonify({'error': f'range must be 1-{ACTIVITY_MAX_DAYS} days'}), 400
+
+    first_hour = int(datetime(start.year, start.month, start.day).timestamp()) // 3600
+    last_hour = int((datetime(end.year, end.month, end.day) + timedelta(days=1)).timestamp()) // 3600 - 1
+    if granularity == 'hour':
+        labels = [datetime.fromtimestamp(h * 3600).isoformat(timespec='minutes')
+                  for h in range(first_hour, last_hour + 1)]
+        slot_of = list(range(len(labels)))
+    else:
+        labels = [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+        slot_of = [(datetime.fromtimestamp(h * 3600).date() - start).days for h in range(first_hour, last_hour + 1)]
+    range_ms = (first_hour * 3600000, (last_hour + 1) * 3600000)
+
+    ingest_transcripts()
+    agents = {}
+    with _transcript_lock:
+        for agent_id, series in _activity.items():
+            if agent_filter and agent_id != agent_filter:
+                continue
+            total = [0] * len(labels)
+            by_role = {}
+            by_channel = {}
+            for (role, channel), bucket in series.items():
+                counts = bucket['count']
+                lo = max(first_hour, bucket['start'])
+                hi = min(last_hour + 1, bucket['start'] + len(counts))
+                if lo >= hi:
+                    continue
+                role_row = by_role.setdefault(role, [0] * len(labels))
+                channel_row = by_channel.setdefault(channel, [0] * len(labels))
+                for h in range(lo, hi):
+                    n = counts[h - bucket['start']]
+                    if n:
+                        slot = slot_of[h - first_hour]
+                        total[slot] += n
+                        role_row[slot] += n
+                        channel_row[slot] += n
+            agents[agent_id] = {'total': total, 'byRole': by_role, 'byChannel': by_channel, 'sessionsByChannel': {}}
+        for record in _session_records.values():
+            if record.agent in agents and range_ms[0] <= record.updated_at < range_ms[1]:
+                by_channel = agents[record.agent]['sessionsByChannel']
+                by_channel[record.channel] = by_channel.get(record.channel, 0) + 1
+
+    return jsonify({'granularity': granularity, 'from': start.isoformat(), 'to': end.isoformat(),
+                    'buckets': labels, 'agents': agents})
+
+
+def _model_prices(cfg):
+    """Map 'provider/model' to (input, output) USD per 1M tokens from provider model 'cost' entries."""
+    prices = {}
+    for provider, pcfg in cfg.get('models', {}).get('providers', {}).items():
+        for m in pcfg.get('models', []):
+            if isinstance(m, dict) and 'id' in m and isinstance(m.get('cost'), dict):
+                price = (float(m['cost'].get('input', 0) or 0), float(m['cost'].get('output', 0) or 0))
+                prices[f"{provider}/{m['id']}"] = price
+                prices.setdefault(m['id'], price)
+    return prices
+
+
+@app.route('/api/usage')
+def api_usage():
+    """Token and cost rollups (?groupBy=agent|model|day|channel&from=&to=&agent=)."""
+    group_by = request.args.get('groupBy', 'agent')
+    if group_by not in USAGE_GROUPS:
+        return jsonify({'error': f'groupBy must be one of {", ".join(USAGE_GROUPS)}'}), 400
+    agent_filter = request.args.get('agent', '')
+    try:
+        end = date.fromisoformat(request.args['to'][:10]) if request.args.get('to') else date.today()
+        start = (date.fromisoformat(request.args['from'][:10]) if request.args.get('from')
+                 else end - timedelta(days=USAGE_DEFAULT_DAYS - 1))
+    except ValueError:
+        return jsonify({'error': 'from/to must be YYYY-MM-DD'}), 400
+
+    cfg = load_config()
+    prices = _model_prices(cfg)
+    ingest_transcripts()
+    lo_day, hi_day = start.toordinal(), end.toordinal()
+    rows = {}
+    with _transcript_lock:
+        for (agent_id, model, channel), bucket in _usage_rollups.items():
+            if agent_filter and agent_id != agent_filter:
+                continue
+            lo = max(0, lo_day - bucket['start'])
+            hi = min(len(bucket['input']), hi_day - bucket['start'] + 1)
+            if lo >= hi:
+                continue
+            price_in, price_out = prices.get(model) or prices.get(model.split('/', 1)[-1]) or (None, None)
+            if group_by == 'day':
+                keyed = ((date.fromordinal(bucket['start'] + i).isoformat(), bucket['input'][i], bucket['output'][i])
+                         for i in range(lo, hi))
+            else:
+                group = {'agent': agent_id, 'model': model, 'channel': channel}[group_by]
+                keyed = [(group, sum(bucket['input'][lo:hi]), sum(bucket['output'][lo:hi]))]
+            for group, inp, out in keyed:
+                if not inp and not out:
+                    continue
+                row = rows.setdefault(group, {'key': group, 'input': 0, 'output': 0, 'total': 0,
+                                              'cost': 0.0, 'unpricedTokens': 0})
+                row['input'] += inp
+                row['output'] += out
+                row['total'] += inp + out
+                if price_in is None:
+                    row['unpricedTokens'] += inp + out
+                else:
+                    row['cost'] += (inp * price_in + out * price_out) / 1e6
+
+    for row in rows.values():
+        row['cost'] = round(row['cost'], 6)
+    if group_by == 'day':
+        ordered = sorted(rows.values(), key=lambda r: r['key'])
+    else:
+        ordered = sorted(rows.values(), key=lambda r: r['total'], reverse=True)
+    return jsonify({'groupBy': group_by, 'from': start.isoformat(), 'to': end.isoformat(), 'rows': ordered})
+
+
+## ── TRANSCRIPT EXPORT ──
+
+EXPORT_PART_BYTES = 8 * 1024 * 1024
+
+
+def _iter_export_sessions(agent_filter, ts_from):
+    """Yield (agent, session_key, session) for sessions that can hold messages after ts_from."""
+    for agent in load_config().get('agents', {}).get('list', []):
+        if agent_filter and agent['id'] != agent_filter:
+            continue
+        for key, sess in sorted(load_sessions(agent['id']).items()):
+            if not isinstance(sess, dict) or not sess.get('sessionFile'):
+                continue
+            updated = _to_ms(sess.get('updatedAt'))
+            if ts_from and updated and updated < ts_from:
+                continue
+            yield agent, key, sess
+
+
+def _iter_export_rows(agent, key, sess, ts_from, ts_to):
+    """Normalized message rows of one session transcript within [ts_from, ts_to]."""
+    sf = sess['sessionFile']
+    if not transcript_exists(sf):
+        return
+    default_model = sess.get('model') or agent.get('model', {}).get('primary', '')
+    for _offset, raw in _iter_transcript_lines(sf, 0):
+        if raw is None:
+            break
+        try:
+            entry = json.loads(raw)
+        except Exception:
+            continue
+        msg = entry.get('message') if isinstance(entry, dict) and entry.get('type') == 'message' else None
+        if not isinstance(msg, dict):
+            continue
+        ts = _to_ms(msg.get('timestamp') or entry.get('timestamp'))
+        if (ts_from or ts_to) and ts is None:
+            continue
+        if (ts_from and ts < ts_from) or (ts_to and ts > ts_to):
+            continue
+        role = msg.get('role', '')
+        inp, out = _usage_tokens(msg.get('usage'))
+        yield {
+            'agent': agent['id'],
+            'sessionKey': key,
+            'sessionId': sess.get('sessionId'),
+            'channel': sess.get('lastChannel', ''),
+            'role': role,
+            'timestamp': ts,
+            'text': _message_text(msg.get('content')),
+            'model': _message_model(msg, default_model) if role == 'assistant' else None,
+            'inputTokens': inp,
+            'outputTokens': out,
+        }
+
+
+def _iter_export_parts(agent_filter, ts_from, ts_to):
+    """Yield (member_name, ndjson_bytes) per session, split into parts of about EXPORT_PART_BYTES."""
+    for agent, key, sess in _iter_export_sessions(agent_filter, ts_from):
+        stem = agent['id'] + '/' + re.sub(r'[^\w.-]', '_', key)
+        part, buf, size = 0, [], 0
+        for row in _iter_export_rows(agent, key, sess, ts_from, ts_to):
+            line = (json.dumps(row, ensure_ascii=False) + '\n').encode()
+            buf.append(line)
+            size += len(line)
+            if size >= EXPORT_PART_BYTES:
+                part += 1
+                yield f'{stem}.{part:04d}.ndjson', b''.join(buf)
+                buf, size = [], 0
+        if buf:
+            part += 1
+            yield f'{stem}.{part:04d}.ndjson', b''.join(buf)
+
+
+def _stream_tar_gz(members):
+    """Stream (name, data) pairs as a gzip-compressed tar, without staging anything on disk."""
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)
+    mtime = int(time.time())
+    for name, data in members:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = mtime
+        info.mode = 0o644
+        out = gz.compress(info.tobuf(format=tarfile.PAX_FORMAT))
+        out += gz.compress(data)
+        out += gz.compress(b'\0' * (-len(data) % tarfile.BLOCKSIZE))
+        if out:
+            yield out
+    yield gz.compress(b'\0' * (2 * tarfile.BLOCKSIZE)) + gz.flush()
+
+
+@app.route('/api/export/sessions')
+def api_export_sessions():
+    """Stream normalized message rows of session transcripts (?agent=&from=&to=&format=ndjson|tar.gz)."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'tar.gz'):
+        return jsonify({'error': 'format must be ndjson or tar.gz'}), 400
+    agent = request.args.get('agent', '')
+    ts_from = _to_ms(request.args.get('from', ''))
+    ts_to = _to_ms(request.args.get('to', ''), end_of_day=True)
+
+    if fmt == 'ndjson':
+        resp = ndjson_response(
+            row
+            for a, key, sess in _iter_export_sessions(agent, ts_from)
+            for row in _iter_export_rows(a, key, sess, ts_from, ts_to)
+        )
+    else:
+        resp = Response(
+            stream_with_context(_stream_tar_gz(_iter_export_parts(agent, ts_from, ts_to))),
+            mimetype='application/gzip',
+        )
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    resp.headers['Content-Disposition'] = f'attachment; filename="sessions-{stamp}.{fmt}"'
+    return resp
+
+
 ## ── HQ SETTINGS ENDPOINTS ──
 
 @app.route('/api/hq/settings')
@@ -1512,20 +4382,358 @@ def _parse_log_line(line):
 
 ## ── CRON JOBS ENDPOINTS ──
 
+CRON_MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+CRON_FIELDS = [('minute', 0, 59), ('hour', 0, 23), ('day of month', 1, 31), ('month', 1, 12), ('day of week', 0, 7)]
+CRON_NAMES = {
+    3: {m: i + 1 for i, m in enumerate(['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+                                        'jul', 'aug', 'sep', 'oct', 'nov', 'dec'])},
+    4: {d: i for i, d in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])},
+}
+CRON_WORKERS = 4
+CRON_JOB_TIMEOUT = 300
+CRON_RESYNC_SECONDS = 60
+CRON_UPCOMING_LIMIT = 500
+CRON_RUNS_RETENTION_DAYS = 30
+CRON_RUNS_MAX = 100000
+CRON_RUNS_COMPACT_EVERY = 3600
+CRON_STATS_WINDOW = 500
+
+_cron_cond = threading.Condition()
+_cron_heap = []          # (fire_ts, generation, job_id); stale entries are skipped lazily
+_cron_entries = {}       # job_id -> {'generation', 'next', 'compiled', 'job'}
+_cron_generation = itertools.count(1)
+_cron_running = set()
+_cron_sig = None
+_cron_thread = None
+_cron_pool = None
+
+_cron_runs_lock = threading.Lock()
+_cron_stats = None       # job_id -> aggregate, loaded once from the run log
+_cron_runs_compacted_at = 0.0
+
+
 def load_cron_jobs():
-    cron_file = Path.home() / '.openclaw' / 'cron' / 'jobs.json'
-    if cron_file.exists():
+    if CRON_JOBS_PATH.exists():
         try:
-            return json.loads(cron_file.read_text())
+            return json.loads(CRON_JOBS_PATH.read_text())
         except Exception:
             pass
     return {'version': 1, 'jobs': []}
 
 
 def save_cron_jobs(data):
-    cron_file = Path.home() / '.openclaw' / 'cron' / 'jobs.json'
-    cron_file.parent.mkdir(parents=True, exist_ok=True)
-    cron_file.write_text(json.dumps(data, indent=2))
+    global _cron_sig
+    CRON_JOBS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    CRON_JOBS_PATH.write_text(json.dumps(data, indent=2))
+    with _cron_cond:
+        _cron_sig = _file_sig(CRON_JOBS_PATH)
+
+
+@functools.lru_cache(maxsize=1024)
+def parse_cron(expr):
+    """Compile a 5-field cron expression (or @macro) into sorted value tuples.
+
+    Returns (minutes, hours, days, months, weekdays, day_any, weekday_any).
+    Raises ValueError for malformed expressions.
+    """
+    expr = expr.strip()
+    fields = CRON_MACROS.get(expr.lower(), expr).split()
+    if len(fields) != 5:
+        raise ValueError('cron expression must have 5 fields')
+    values = []
+    for i, (field, (name, lo, hi)) in enumerate(zip(fields, CRON_FIELDS)):
+        names = CRON_NAMES.get(i, {})
+        allowed = set()
+        try:
+            for part in field.lower().split(','):
+                rng, has_step, step = part.partition('/')
+                step = int(step) if has_step else 1
+                if rng == '*':
+                    start, end = lo, hi
+                else:
+                    a, dash, b = rng.partition('-')
+                    start = int(names.get(a, a))
+                    end = int(names.get(b, b)) if dash else (hi if has_step else start)
+                if step < 1 or not lo <= start <= end <= hi:
+                    raise ValueError
+                allowed.update(range(start, end + 1, step))
+        except ValueError:
+            raise ValueError(f'invalid {name} field: {field}') from None
+        values.append(tuple(sorted(allowed)))
+    weekdays = tuple(sorted({d % 7 for d in values[4]}))
+    # Vixie cron treats a day field starting with '*' (also '*/n') as unrestricted for the OR rule
+    return (values[0], values[1], values[2], values[3], weekdays,
+            fields[2].startswith('*'), fields[4].startswith('*'))
+
+
+def cron_next(compiled, after):
+    """Return the first datetime strictly after `after` matching a compiled expression."""
+    minutes, hours, days, months, weekdays, day_any, weekday_any = compiled
+    t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    last_year = t.year + 5
+    while t.year <= last_year:
+        if t.month not in months:
+            i = bisect.bisect_right(months, t.month)
+            t = datetime(t.year, months[i], 1) if i < len(months) else datetime(t.year + 1, months[0], 1)
+            continue
+        day_ok = t.day in days
+        weekday_ok = t.isoweekday() % 7 in weekdays
+        # Vixie cron: when both day fields are restricted either may match
+        if not ((day_ok and weekday_ok) if (day_any or weekday_any) else (day_ok or weekday_ok)):
+            t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+            continue
+        if t.hour not in hours:
+            i = bisect.bisect_right(hours, t.hour)
+            if i < len(hours):
+                t = t.replace(hour=hours[i], minute=minutes[0])
+            else:
+                t = datetime(t.year, t.month, t.day) + timedelta(days=1)
+            continue
+        if t.minute not in minutes:
+            i = bisect.bisect_right(minutes, t.minute)
+            if i < len(minutes):
+                t = t.replace(minute=minutes[i])
+            else:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            continue
+        return t
+    return None
+
+
+def _cron_expr(job):
+    """Return the cron expression of a job (dashboard jobs store a string, gateway jobs a dict)."""
+    schedule = job.get('schedule')
+    if isinstance(schedule, dict):
+        schedule = schedule.get('expr')
+    return schedule if isinstance(schedule, str) else ''
+
+
+def _cron_managed(job):
+    """Only dashboard-created jobs are fired here; gateway-native jobs run in the gateway."""
+    return isinstance(job.get('schedule'), str) and bool(job.get('message'))
+
+
+def cron_next_run(job, after=None):
+    """Next fire time of a job, or None if it is disabled or its schedule is invalid."""
+    if not job.get('enabled', True):
+        return None
+    try:
+        compiled = parse_cron(_cron_expr(job))
+    except ValueError:
+        return None
+    return cron_next(compiled, after or datetime.now())
+
+
+def cron_schedule_job(job):
+    """Insert or replace a job in the scheduler heap."""
+    with _cron_cond:
+        _cron_entries.pop(job['id'], None)
+        if not _cron_managed(job):
+            return
+        nxt = cron_next_run(job)
+        if nxt is None:
+            return
+        gen = next(_cron_generation)
+        _cron_entries[job['id']] = {'generation': gen, 'next': nxt, 'compiled': parse_cron(_cron_expr(job)), 'job': job}
+        heapq.heappush(_cron_heap, (nxt.timestamp(), gen, job['id']))
+        _cron_cond.notify()
+
+
+def cron_unschedule_job(job_id):
+    with _cron_cond:
+        if _cron_entries.pop(job_id, None) is not None:
+            _cron_cond.notify()
+
+
+def _cron_sync():
+    """Rebuild the heap from jobs.json (startup and external edits)."""
+    global _cron_sig
+    jobs = load_cron_jobs().get('jobs', [])
+    with _cron_cond:
+        _cron_sig = _file_sig(CRON_JOBS_PATH)
+        _cron_entries.clear()
+        _cron_heap.clear()
+        for job in jobs:
+            cron_schedule_job(job)
+
+
+def _cron_stats_entry(job_id):
+    return _cron_stats.setdefault(job_id, {
+        'runs': 0, 'failures': 0, 'skipped': 0, 'last': None,
+        'durations': collections.deque(maxlen=CRON_STATS_WINDOW),
+    })
+
+
+def _cron_stats_add(record):
+    entry = _cron_stats_entry(record['job'])
+    if record['status'] == 'skipped':
+        entry['skipped'] += 1
+        return
+    entry['runs'] += 1
+    if record['status'] != 'ok':
+        entry['failures'] += 1
+    entry['durations'].append(record['durMs'])
+    entry['last'] = record
+
+
+def _cron_stats_load():
+    """Build the in-memory aggregate from the run log; done once per process."""
+    global _cron_stats
+    if _cron_stats is not None:
+        return
+    _cron_stats = {}
+    try:
+        with open(CRON_RUNS_PATH) as f:
+            for line in f:
+                try:
+                    _cron_stats_add(json.loads(line))
+                except Exception:
+                    pass
+    except OSError:
+        pass
+
+
+def _cron_runs_compact():
+    """Rewrite the run log without records past retention or beyond CRON_RUNS_MAX."""
+    cutoff = (time.time() - CRON_RUNS_RETENTION_DAYS * 86400) * 1000
+    kept = collections.deque(maxlen=CRON_RUNS_MAX)
+    try:
+        with open(CRON_RUNS_PATH) as f:
+            for line in f:
+                try:
+                    if json.loads(line).get('start', 0) >= cutoff:
+                        kept.append(line)
+                except Exception:
+                    pass
+    except OSError:
+        return
+    tmp = CRON_RUNS_PATH.with_suffix('.tmp')
+    tmp.write_text(''.join(kept))
+    os.replace(tmp, CRON_RUNS_PATH)
+
+
+def record_cron_run(record):
+    """Append one run record to the log and fold it into the aggregate."""
+    global _cron_runs_compacted_at
+    _ensure_hq()
+    with _cron_runs_lock:
+        _cron_stats_load()
+        with open(CRON_RUNS_PATH, 'a') as f:
+            f.write(json.dumps(record, separators=(',', ':')) + '\n')
+        _cron_stats_add(record)
+        if time.time() - _cron_runs_compacted_at > CRON_RUNS_COMPACT_EVERY:
+            _cron_runs_compacted_at = time.time()
+            _cron_runs_compact()
+
+
+def _cron_run(job):
+    started = time.time()
+    try:
+        code, output = run_cmd_result(
+            ['openclaw', 'agent', '--agent', job['agentId'], '--message', job['message']],
+            timeout=CRON_JOB_TIMEOUT,
+        )
+        record_cron_run({
+            'job': job['id'],
+            'agent': job['agentId'],
+            'start': int(started * 1000),
+            'durMs': int((time.time() - started) * 1000),
+            'status': 'ok' if code == 0 else 'failed',
+            'exit': code,
+            'outBytes': len(output.encode()),
+        })
+    finally:
+        with _cron_cond:
+            _cron_running.discard(job['id'])
+
+
+def _cron_dispatch(job):
+    with _cron_cond:
+        overlapping = job['id'] in _cron_running
+        if not overlapping:
+            _cron_running.add(job['id'])
+    if overlapping:
+        record_cron_run({
+            'job': job['id'], 'agent': job['agentId'], 'start': int(time.time() * 1000),
+            'durMs': 0, 'status': 'skipped', 'exit': None, 'outBytes': 0,
+        })
+        return
+    _cron_pool.submit(_cron_run, job)
+
+
+def _cron_loop():
+    """Sleep until the earliest due job, fire it and push its next run back on the heap."""
+    while True:
+        if _file_sig(CRON_JOBS_PATH) != _cron_sig:
+            _cron_sync()
+        due = []
+        with _cron_cond:
+            now = time.time()
+            while _cron_heap:
+                ts, gen, job_id = _cron_heap[0]
+                entry = _cron_entries.get(job_id)
+                if entry is None or entry['generation'] != gen:
+                    heapq.heappop(_cron_heap)
+                    continue
+                if ts > now:
+                    break
+                heapq.heappop(_cron_heap)
+                due.append(entry['job'])
+                entry['next'] = cron_next(entry['compiled'], datetime.fromtimestamp(now))
+                if entry['next'] is not None:
+                    heapq.heappush(_cron_heap, (entry['next'].timestamp(), gen, job_id))
+            if not due:
+                timeout = CRON_RESYNC_SECONDS
+                if _cron_heap:
+                    timeout = min(timeout, max(0.0, _cron_heap[0][0] - now))
+                _cron_cond.wait(timeout)
+        for job in due:
+            _cron_dispatch(job)
+
+
+def start_cron_scheduler():
+    global _cron_thread, _cron_pool
+    if _cron_thread is not None:
+        return
+    _cron_pool = ThreadPoolExecutor(max_workers=CRON_WORKERS, thread_name_prefix='cron')
+    _cron_sync()
+    _cron_thread = threading.Thread(target=_cron_loop, name='cron-scheduler', daemon=True)
+    _cron_thread.start()
+
+
+def _cron_last_run(job_id):
+    with _cron_runs_lock:
+        _cron_stats_load()
+        entry = _cron_stats.get(job_id)
+        if not entry or not entry['last']:
+            return None
+        last = entry['last']
+        return {
+            'at': datetime.fromtimestamp(last['start'] / 1000).isoformat(timespec='seconds'),
+            'durMs': last['durMs'],
+            'status': last['status'],
+            'runs': entry['runs'],
+            'failures': entry['failures'],
+        }
+
+
+def _cron_public(job):
+    """Strip the payload and attach the computed next run for API responses."""
+    job = {k: v for k, v in job.items() if k != 'payload'}
+    nxt = cron_next_run(job)
+    job['nextRun'] = nxt.isoformat(timespec='seconds') if nxt else None
+    job['lastRun'] = _cron_last_run(job['id'])
+    if nxt and isinstance(job.get('schedule'), str):
+        job['state'] = {**job.get('state', {}), 'nextRunAtMs': int(nxt.timestamp() * 1000)}
+    return job
 
 
 @app.route('/api/cron')
@@ -1535,10 +4743,98 @@ def api_cron_list():
     jobs = data.get('jobs', [])
     if agent:
         jobs = [j for j in jobs if j.get('agentId') == agent]
-    # Clean sensitive data
-    for job in jobs:
-        job.pop('payload', None)
-    return jsonify(jobs)
+    return jsonify([_cron_public(j) for j in jobs])
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _cron_stats_summary(entry):
+    durations = sorted(entry['durations'])
+    return {
+        'runs': entry['runs'],
+        'failures': entry['failures'],
+        'failureRate': round(entry['failures'] / entry['runs'], 4) if entry['runs'] else 0,
+        'skipped': entry['skipped'],
+        'p50Ms': _percentile(durations, 0.5),
+        'p95Ms': _percentile(durations, 0.95),
+    }
+
+
+@app.route('/api/cron/<job_id>/runs')
+def api_cron_runs(job_id):
+    """Most recent runs of a job, newest first (?limit=N, default 50)."""
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 1000)
+    runs = []
+    try:
+        for line in _iter_lines_reverse(CRON_RUNS_PATH):
+            try:
+                record = json.loads(line)
+            except Exception:
+                continue
+            if record.get('job') == job_id:
+                runs.append(record)
+                if len(runs) >= limit:
+                    break
+    except OSError:
+        pass
+    return jsonify(runs)
+
+
+@app.route('/api/cron/stats')
+def api_cron_stats():
+    """Duration percentiles, failure rates and overlap skips per job and overall."""
+    with _cron_runs_lock:
+        _cron_stats_load()
+        jobs = {job_id: _cron_stats_summary(entry) for job_id, entry in _cron_stats.items()}
+        total = {'runs': 0, 'failures': 0, 'skipped': 0, 'durations': []}
+        for entry in _cron_stats.values():
+            total['runs'] += entry['runs']
+            total['failures'] += entry['failures']
+            total['skipped'] += entry['skipped']
+            total['durations'].extend(entry['durations'])
+    return jsonify({'jobs': jobs, 'total': _cron_stats_summary(total)})
+
+
+def _iter_cron_fires(job, start, end):
+    try:
+        compiled = parse_cron(_cron_expr(job))
+    except ValueError:
+        return
+    t = cron_next(compiled, start)
+    while t is not None and t <= end:
+        yield t, job
+        t = cron_next(compiled, t)
+
+
+@app.route('/api/cron/upcoming')
+def api_cron_upcoming():
+    """Fire times of enabled jobs within the next ?hours=N (default 24)."""
+    try:
+        hours = float(request.args.get('hours', 24))
+    except ValueError:
+        return jsonify({'error': 'hours must be a number'}), 400
+    hours = max(0.0, min(hours, 24 * 31))
+    agent = request.args.get('agent', '')
+    now = datetime.now()
+    end = now + timedelta(hours=hours)
+    jobs = [j for j in load_cron_jobs().get('jobs', [])
+            if j.get('enabled', True) and (not agent or j.get('agentId') == agent)]
+    fires = heapq.merge(*(_iter_cron_fires(j, now, end) for j in jobs), key=lambda f: f[0])
+    result = []
+    for t, job in itertools.islice(fires, CRON_UPCOMING_LIMIT):
+        result.append({
+            'jobId': job['id'],
+            'name': job.get('name', ''),
+            'agentId': job.get('agentId', ''),
+            'at': t.isoformat(timespec='seconds'),
+            'atMs': int(t.timestamp() * 1000),
+            'managed': _cron_managed(job),
+        })
+    return jsonify(result)
 
 
 @app.route('/api/cron', methods=['POST'])
@@ -1551,9 +4847,14 @@ def api_cron_create():
     enabled = body.get('enabled', True)
     if not agent or not name or not schedule:
         return jsonify({'error': 'agent, name, and schedule required'}), 400
-    
+    try:
+        parse_cron(schedule)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     data = load_cron_jobs()
-    job_id = f"cron_{data.get('nextId', len(data['jobs']) + 1)}"
+    next_id = data.get('nextId', len(data['jobs']) + 1)
+    job_id = f"cron_{next_id}"
     now = datetime.now().isoformat(timespec='seconds')
     job = {
         'id': job_id,
@@ -1563,13 +4864,12 @@ def api_cron_create():
         'message': message,
         'enabled': enabled,
         'createdAt': now,
-        'nextRun': schedule,  # cron expression
     }
     data['jobs'].append(job)
-    if 'nextId' not in data:
-        data['nextId'] = len(data['jobs']) + 1
+    data['nextId'] = next_id + 1
     save_cron_jobs(data)
-    return jsonify(job)
+    cron_schedule_job(job)
+    return jsonify(_cron_public(job))
 
 
 @app.route('/api/cron/<job_id>/toggle', methods=['POST'])
@@ -1580,7 +4880,9 @@ def api_cron_toggle(job_id):
         return jsonify({'error': 'job not found'}), 404
     job['enabled'] = not job.get('enabled', True)
     save_cron_jobs(data)
-    return jsonify({'ok': True, 'enabled': job['enabled']})
+    cron_schedule_job(job)
+    nxt = cron_next_run(job)
+    return jsonify({'ok': True, 'enabled': job['enabled'], 'nextRun': nxt.isoformat(timespec='seconds') if nxt else None})
 
 
 @app.route('/api/cron/<job_id>/delete', methods=['POST'])
@@ -1591,22 +4893,67 @@ def api_cron_delete(job_id):
     if len(data['jobs']) == before:
         return jsonify({'error': 'job not found'}), 404
     save_cron_jobs(data)
+    cron_unschedule_job(job_id)
     return jsonify({'ok': True})
 
 
+LOG_QUERY_MAX_LINES = 1000000
+
+
+def _tail_offset(path, n, block_size=65536):
+    """Byte offset where the last n lines of a file start, found by scanning back from the end."""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = end = f.tell()
+        newlines = 0
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            metric_inc('hq_file_read_bytes_total', step, kind='log')
+            if pos + step == end and chunk.endswith(b'\n'):
+                chunk = chunk[:-1]
+            i = len(chunk)
+            while True:
+                i = chunk.rfind(b'\n', 0, i)
+                if i < 0:
+                    break
+                newlines += 1
+                if newlines == n:
+                    return pos + i + 1
+    return 0
+
+
+def _iter_log_entries(path, lines):
+    """Parse the last `lines` lines of a log file, oldest first, without loading the file."""
+    started = time.perf_counter()
+    try:
+        offset = _tail_offset(path, lines)
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            parsed = 0
+            try:
+                for raw in f:
+                    parsed += 1
+                    entry = _parse_log_line(raw.decode('utf-8', errors='replace'))
+                    if entry:
+                        yield entry
+            finally:
+                metric_inc('hq_file_read_bytes_total', f.tell() - offset, kind='log')
+                record_span('log.parse', started, bytes=f.tell() - offset, lines=parsed)
+    except OSError:
+        return
+
+
 @app.route('/api/logs/recent')
 def api_logs_recent():
-    log_file = today_log()
-    logs = []
-    try:
-        lines = log_file.read_text().splitlines()
-        for line in lines[-100:]:
-            entry = _parse_log_line(line)
-            if entry:
-                logs.append(entry)
-    except Exception:
-        pass
-    return jsonify(logs)
+    """Latest gateway log entries (?lines=N, default 100)."""
+    lines = min(max(request.args.get('lines', 100, type=int), 1), LOG_QUERY_MAX_LINES)
+    entries = _iter_log_entries(today_log(), lines)
+    if wants_ndjson():
+        return ndjson_response(entries)
+    return jsonify(list(entries))
 
 
 @app.route('/events')
@@ -1618,27 +4965,45 @@ def events():
         except Exception:
             size = 0
 
+        metric_gauge_add('hq_sse_subscribers', 1)
+        try:
+            yield from follow(log_file, size)
+        finally:
+            metric_gauge_add('hq_sse_subscribers', -1)
+
+    def read_new(path, offset):
+        """Complete lines appended to a log since offset, and the offset just past them."""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return [], offset
+        # A line still being written is picked up whole on the next poll
+        data = data[:data.rfind(b'\n') + 1]
+        metric_inc('hq_file_read_bytes_total', len(data), kind='log')
+        return data.decode('utf-8', errors='replace').splitlines(), offset + len(data)
+
+    def follow(log_file, size):
         while True:
+            lines = []
+            # Day rollover: finish yesterday's file before switching to today's
+            current_log = today_log()
+            if current_log != log_file:
+                lines, _ = read_new(log_file, size)
+                log_file, size = current_log, 0
             try:
-                # Handle day rollover
-                current_log = today_log()
-                if current_log != log_file:
-                    log_file = current_log
-                    size = 0
-
-                current_size = log_file.stat().st_size
-                if current_size > size:
-                    with open(log_file) as f:
-                        f.seek(size)
-                        new_content = f.read()
-                    size = current_size
-
-                    for line in new_content.splitlines():
-                        entry = _parse_log_line(line)
-                        if entry:
-                            yield f"data: {json.dumps(entry)}\n\n"
-            except Exception:
-                pass
+                grown = log_file.stat().st_size > size
+            except OSError:
+                grown = False
+            if grown:
+                new_lines, size = read_new(log_file, size)
+                lines += new_lines
+
+            for line in lines:
+                entry = _parse_log_line(line)
+                if entry:
+                    yield f"data: {json.dumps(entry)}\n\n"
 
             time.sleep(1)
 
@@ -1656,19 +5021,19 @@ def _verify_system_password(password):
     """Verify the current system user's password."""
     # Use sudo -k to clear cache, then -S to read password from stdin
     try:
-        subprocess.run(['sudo', '-k'], capture_output=True, timeout=5)
-        proc = subprocess.run(
+        spawn(['sudo', '-k'], capture_output=True, timeout=5)
+        proc = spawn(
             ['sudo', '-S', 'true'],
             input=password + '\n', capture_output=True, text=True, timeout=10
         )
         # Clear sudo cache after verification
-        subprocess.run(['sudo', '-k'], capture_output=True, timeout=5)
+        spawn(['sudo', '-k'], capture_output=True, timeout=5)
         return proc.returncode == 0
     except Exception:
         pass
     # Fallback: su to root (requires password)
     try:
-        proc = subprocess.run(
+        proc = spawn(
             ['su', '-c', 'true'],
             input=password + '\n', capture_output=True, text=True, timeout=10
         )
@@ -1677,64 +5042,185 @@ def _verify_system_password(password):
         return False
 
 
-@app.route('/api/agents/add', methods=['POST'])
-def api_agents_add():
-    """Add a new agent."""
-    data = request.get_json() or {}
-    agent_id = data.get('id', '').strip().lower()
-    agent_name = data.get('name', '').strip() or agent_id
-    model = data.get('model', '').strip()
+AGENT_ID_RE = re.compile(r'^[a-z][a-z0-9_-]{0,31}$')
+PROFILE_TEMPLATES = {
+    'IDENTITY.md': '# {name}\n\nAgent identity profile.\n',
+    'SOUL.md': '# {name} - Soul\n\nAgent behavior and personality.\n',
+    'MEMORY.md': '# {name} - Memory\n\nPersistent memory store.\n',
+    'TOOLS.md': '# {name} - Tools\n\nAvailable tools and capabilities.\n',
+}
+BULK_AGENTS_MAX = 1000
 
-    if not agent_id:
-        return jsonify({'error': 'Agent ID is required'}), 400
-    if not re.match(r'^[a-z][a-z0-9_-]{0,31}$', agent_id):
-        return jsonify({'error': 'ID must start with a letter, only lowercase letters/digits/hyphens/underscores, max 32 chars'}), 400
 
-    cfg = load_config()
-    agents_list = cfg.setdefault('agents', {}).setdefault('list', [])
+def _new_agent_entry(data):
+    """Validate an add-agent payload; returns (config entry, None) or (None, error).
 
-    if any(a['id'] == agent_id for a in agents_list):
-        return jsonify({'error': f'Agent "{agent_id}" already exists'}), 409
+    Missing and null fields count as empty; any other non-string value is an error.
+    """
+    for field in ('id', 'name', 'model'):
+        if not isinstance(data.get(field) or '', str):
+            return None, f'{field} must be a string'
+    agent_id = (data.get('id') or '').strip().lower()
+    agent_name = (data.get('name') or '').strip() or agent_id
+    model = (data.get('model') or '').strip()
+
+    fallbacks = data.get('fallbacks', data.get('fallback')) or []
+    if isinstance(fallbacks, str):
+        fallbacks = [fallbacks]
+    if not isinstance(fallbacks, list) or not all(isinstance(f, str) for f in fallbacks):
+        return None, 'fallback must be a model ID or a list of model IDs'
+
+    if not agent_id:
+        return None, 'Agent ID is required'
+    if not AGENT_ID_RE.match(agent_id):
+        return None, 'ID must start with a letter, only lowercase letters/digits/hyphens/underscores, max 32 chars'
 
-    # Build agent entry
-    workspace = str(Path.home() / '.openclaw' / f'workspace-{agent_id}')
-    agent_dir = str(AGENTS_DIR / agent_id / 'agent')
     agent_entry = {
         'id': agent_id,
         'name': agent_name,
-        'workspace': workspace,
-        'agentDir': agent_dir,
+        'workspace': str(Path.home() / '.openclaw' / f'workspace-{agent_id}'),
+        'agentDir': str(AGENTS_DIR / agent_id / 'agent'),
         'model': {'primary': model} if model else {},
     }
-    fallback = data.get('fallback', '').strip()
-    if fallback:
-        agent_entry['model']['fallbacks'] = [fallback]
-    agents_list.append(agent_entry)
-    save_config(cfg)
-
-    # Create agent directory structure
-    agent_base = AGENTS_DIR / agent_id
+    fallbacks = [f.strip() for f in fallbacks if f.strip()]
+    if fallbacks:
+        agent_entry['model']['fallbacks'] = fallbacks
+    return agent_entry, None
+
+
+def _parse_app_items(apps):
+    """[(app_id, mode)] from a list of app IDs or {appId, mode} objects; returns (pairs, None) or (None, error)."""
+    if not isinstance(apps, list):
+        return None, 'apps must be a list'
+    pairs = []
+    for app_item in apps:
+        if isinstance(app_item, dict):
+            app_id, mode = app_item.get('appId') or '', app_item.get('mode') or 'read_only'
+        else:
+            app_id, mode = app_item, 'read_only'
+        if not isinstance(app_id, str) or not isinstance(mode, str):
+            return None, 'apps items must be app IDs or {appId, mode} objects with string values'
+        app_id, mode = app_id.strip(), mode.strip()
+        if app_id:
+            pairs.append((app_id, mode if mode in USAGE_MODES else 'read_only'))
+    return pairs, None
+
+
+def _provision_agent(agent_entry):
+    """Create the agent's directory tree, workspace and default profile files (existing files are kept)."""
+    agent_base = AGENTS_DIR / agent_entry['id']
     agent_agent_dir = agent_base / 'agent'
     agent_agent_dir.mkdir(parents=True, exist_ok=True)
     (agent_base / 'sessions').mkdir(parents=True, exist_ok=True)
-    Path(workspace).mkdir(parents=True, exist_ok=True)
+    Path(agent_entry['workspace']).mkdir(parents=True, exist_ok=True)
 
-    # Create default profile files
     for fname in PROFILE_FILES:
         fpath = agent_agent_dir / fname
         if not fpath.exists():
-            if fname == 'IDENTITY.md':
-                fpath.write_text(f'# {agent_name}\n\nAgent identity profile.\n')
-            elif fname == 'SOUL.md':
-                fpath.write_text(f'# {agent_name} - Soul\n\nAgent behavior and personality.\n')
-            elif fname == 'MEMORY.md':
-                fpath.write_text(f'# {agent_name} - Memory\n\nPersistent memory store.\n')
-            elif fname == 'TOOLS.md':
-                fpath.write_text(f'# {agent_name} - Tools\n\nAvailable tools and capabilities.\n')
+            fpath.write_text(PROFILE_TEMPLATES[fname].format(name=agent_entry['name']))
+
+
+@app.route('/api/agents/add', methods=['POST'])
+def api_agents_add():
+    """Add a new agent."""
+    data = request.get_json() or {}
+    agent_entry, error = _new_agent_entry(data)
+    if error:
+        return jsonify({'error': error}), 400
+    agent_id = agent_entry['id']
+
+    cfg = load_config()
+    agents_list = cfg.setdefault('agents', {}).setdefault('list', [])
+
+    if any(a['id'] == agent_id for a in agents_list):
+        return jsonify({'error': f'Agent "{agent_id}" already exists'}), 409
+
+    agents_list.append(agent_entry)
+    save_config(cfg)
+    _provision_agent(agent_entry)
 
     return jsonify({'ok': True, 'id': agent_id})
 
 
+@app.route('/api/agents/bulk', methods=['POST'])
+def api_agents_bulk():
+    """Add many agents with one config write.
+
+    Body: {"agents": [{id, name?, model?, fallback(s)?, platform?, apps?: [appId | {appId, mode}]}],
+    "atomic": false}. Invalid or duplicate entries are reported per agent
+    and skipped (with atomic, nothing is added). Directories and profile
+    files are then created in parallel.
+    """
+    data = request.get_json() or {}
+    items = data if isinstance(data, list) else data.get('agents', [])
+    atomic = isinstance(data, dict) and bool(data.get('atomic'))
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'agents list required'}), 400
+    if len(items) > BULK_AGENTS_MAX:
+        return jsonify({'error': f'At most {BULK_AGENTS_MAX} agents per request'}), 400
+
+    cfg = load_config()
+    agents_list = cfg.setdefault('agents', {}).setdefault('list', [])
+    taken = {a['id'] for a in agents_list}
+    results = []
+    accepted = []
+    for item in items:
+        if not isinstance(item, dict):
+            results.append({'id': None, 'ok': False, 'error': 'Each agent must be an object'})
+            continue
+        agent_entry, error = _new_agent_entry(item)
+        if not error and agent_entry['id'] in taken:
+            error = f'Agent "{agent_entry["id"]}" already exists'
+        platform = item.get('platform') or ''
+        if not error and not isinstance(platform, str):
+            error = 'platform must be a string'
+        apps = None
+        if not error:
+            apps, error = _parse_app_items(item.get('apps') or [])
+        if error:
+            results.append({'id': agent_entry['id'] if agent_entry else item.get('id'), 'ok': False, 'error': error})
+            continue
+        taken.add(agent_entry['id'])
+        result = {'id': agent_entry['id'], 'ok': True}
+        results.append(result)
+        accepted.append((agent_entry, platform.strip(), apps, result))
+
+    if atomic and len(accepted) < len(results):
+        return jsonify({'ok': False, 'created': 0, 'results': results}), 400
+
+    if accepted:
+        bindings = cfg.setdefault('bindings', [])
+        # first platform binding per agent, as api_agent_platform matches it (stale ones may outlive an agent)
+        platform_bindings = {b.get('agentId'): b for b in reversed(bindings)}
+        app_bindings = cfg.setdefault('apps', {}).setdefault('bindings', [])
+        by_pair = _index_app_bindings(app_bindings)['by_pair']
+        for agent_entry, platform, apps, result in accepted:
+            agent_id = agent_entry['id']
+            agents_list.append(agent_entry)
+            if platform and agent_id in platform_bindings:
+                platform_bindings[agent_id]['channel'] = platform
+            elif platform:
+                bindings.append({'agentId': agent_id, 'channel': platform})
+            bound = []
+            for app_id, mode in apps:
+                binding = by_pair.get((agent_id, app_id))
+                if binding:
+                    binding['mode'] = mode
+                else:
+                    by_pair[(agent_id, app_id)] = binding = {'agentId': agent_id, 'appId': app_id, 'mode': mode}
+                    app_bindings.append(binding)
+                bound.append(app_id)
+            result['apps'] = bound
+        save_config(cfg)
+
+        by_id = {agent_entry['id']: result for agent_entry, _platform, _apps, result in accepted}
+        for agent_entry, _outcome, error in map_agents(_provision_agent, [a[0] for a in accepted]):
+            if error:
+                by_id[agent_entry['id']].update(ok=False, error=f'added to config, but provisioning failed: {error}')
+
+    return jsonify({'ok': all(r['ok'] for r in results), 'created': len(accepted), 'results': results})
+
+
 @app.route('/api/agents/<agent_id>/delete', methods=['POST'])
 def api_agents_delete(agent_id):
     """Delete an agent. Requires system password."""
@@ -1851,39 +5337,74 @@ def api_app_toggle(app_id):
     return jsonify({'ok': True, 'enabled': app_entry['enabled']})
 
 
+def _index_app_bindings(bindings):
+    """by_pair {(agent, app): binding}, by_agent and by_app {id: [bindings]} over a bindings list."""
+    by_pair = {}
+    by_agent = collections.defaultdict(list)
+    by_app = collections.defaultdict(list)
+    for b in bindings:
+        by_pair[(b.get('agentId'), b.get('appId'))] = b
+        by_agent[b.get('agentId')].append(b)
+        by_app[b.get('appId')].append(b)
+    return {'by_pair': by_pair, 'by_agent': dict(by_agent), 'by_app': dict(by_app)}
+
+
+def app_bindings_lookup():
+    """Return the app-binding index, rebuilding it when openclaw.json changes.
+
+    Read-only: writers index the config they loaded and save it, which
+    drops this copy.
+    """
+    global _app_bindings_index
+    sig = _file_sig(CONFIG_PATH)
+    with _app_bindings_index_lock:
+        if _app_bindings_index is not None and _app_bindings_index['sig'] == sig:
+            return _app_bindings_index
+        bindings = load_config().get('apps', {}).get('bindings', [])
+        _app_bindings_index = {'sig': sig, 'bindings': bindings, **_index_app_bindings(bindings)}
+        return _app_bindings_index
+
+
 @app.route('/api/apps/bindings', methods=['GET'])
 def api_app_bindings_get():
     """List all app bindings, optional ?agent=X or ?app=Y filter."""
-    cfg = load_config()
-    all_bindings = cfg.get('apps', {}).get('bindings', [])
+    index = app_bindings_lookup()
     agent_filter = request.args.get('agent', '')
     app_filter = request.args.get('app', '')
-    if agent_filter:
-        all_bindings = [b for b in all_bindings if b.get('agentId') == agent_filter]
-    if app_filter:
-        all_bindings = [b for b in all_bindings if b.get('appId') == app_filter]
+    if agent_filter and app_filter:
+        pair = index['by_pair'].get((agent_filter, app_filter))
+        all_bindings = [pair] if pair else []
+    elif agent_filter:
+        all_bindings = index['by_agent'].get(agent_filter, [])
+    elif app_filter:
+        all_bindings = index['by_app'].get(app_filter, [])
+    else:
+        all_bindings = index['bindings']
     # Enrich with app metadata
-    result = []
-    for b in all_bindings:
-        app_def = APP_REGISTRY.get(b.get('appId'), {})
-        result.append({
+    result = (
+        {
             **b,
-            'appName': app_def.get('name', b.get('appId', '')),
+            'appName': APP_REGISTRY.get(b.get('appId'), {}).get('name', b.get('appId', '')),
             'appIcon': APP_ICONS.get(b.get('appId', ''), '\U0001F4E6'),
             'modeLabel': USAGE_MODE_LABELS.get(b.get('mode', ''), b.get('mode', '')),
-        })
-    return jsonify(result)
+        }
+        for b in all_bindings
+    )
+    if wants_ndjson():
+        return ndjson_response(result)
+    return jsonify(list(result))
 
 
 @app.route('/api/apps/bindings', methods=['POST'])
 def api_app_bindings_post():
-    """Add/update bindings. Accepts single object or array."""
+    """Add/update bindings. Accepts single object or array; one config write per request."""
     data = request.get_json()
     if not data:
         return jsonify({'error': 'No data'}), 400
     items = data if isinstance(data, list) else [data]
     cfg = load_config()
     bindings = cfg.setdefault('apps', {}).setdefault('bindings', [])
+    by_pair = _index_app_bindings(bindings)['by_pair']
     added = 0
     updated = 0
     for item in items:
@@ -1894,14 +5415,17 @@ def api_app_bindings_post():
             continue
         if mode not in USAGE_MODES:
             mode = 'read_only'
-        existing = next((b for b in bindings if b['agentId'] == agent_id and b['appId'] == app_id), None)
+        existing = by_pair.get((agent_id, app_id))
         if existing:
-            existing['mode'] = mode
-            updated += 1
+            if existing.get('mode') != mode:
+                existing['mode'] = mode
+                updated += 1
         else:
-            bindings.append({'agentId': agent_id, 'appId': app_id, 'mode': mode})
+            by_pair[(agent_id, app_id)] = binding = {'agentId': agent_id, 'appId': app_id, 'mode': mode}
+            bindings.append(binding)
             added += 1
-    save_config(cfg)
+    if added or updated:
+        save_config(cfg)
     return jsonify({'ok': True, 'added': added, 'updated': updated})
 
 
@@ -1914,27 +5438,24 @@ def api_app_bindings_remove():
     items = data if isinstance(data, list) else [data]
     cfg = load_config()
     bindings = cfg.setdefault('apps', {}).setdefault('bindings', [])
-    removed = 0
-    for item in items:
-        agent_id = item.get('agentId', '')
-        app_id = item.get('appId', '')
-        before = len(bindings)
-        bindings[:] = [b for b in bindings if not (b['agentId'] == agent_id and b['appId'] == app_id)]
-        removed += before - len(bindings)
-    save_config(cfg)
+    pairs = {(item.get('agentId', ''), item.get('appId', '')) for item in items}
+    before = len(bindings)
+    bindings[:] = [b for b in bindings if (b['agentId'], b['appId']) not in pairs]
+    removed = before - len(bindings)
+    if removed:
+        save_config(cfg)
     return jsonify({'ok': True, 'removed': removed})
 
 
 @app.route('/api/agent/<agent_id>/apps')
 def api_agent_apps(agent_id):
     """Get apps bound to a specific agent."""
-    cfg = load_config()
-    bindings = cfg.get('apps', {}).get('bindings', [])
-    agent_bindings = [b for b in bindings if b.get('agentId') == agent_id]
+    agent_bindings = app_bindings_lookup()['by_agent'].get(agent_id, [])
+    registry = load_config().get('apps', {}).get('registry', {}) if agent_bindings else {}
     result = []
     for b in agent_bindings:
         app_def = APP_REGISTRY.get(b['appId'], {})
-        enabled = cfg.get('apps', {}).get('registry', {}).get(b['appId'], {}).get('enabled', False)
+        enabled = registry.get(b['appId'], {}).get('enabled', False)
         result.append({
             'appId': b['appId'],
             'appName': app_def.get('name', b['appId']),
@@ -1950,4 +5471,7 @@ def api_agent_apps(agent_id):
 if __name__ == '__main__':
     port = int(os.environ.get('OPENCLAW_HQ_PORT', 7843))
     _restart_backup_timer()
+    start_cron_scheduler()
+    start_transcript_archiver()
+    start_request_sampler()
     app.run(host='0.0.0.0', port=port, debug=False, threaded=True)
@@ -0,0 +1,51 @@
+"""Validation of /api/agents/add and /api/agents/bulk payloads."""
+import json
+
+import pytest
+
+import dashboard
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    config = tmp_path / 'openclaw.json'
+    config.write_text(json.dumps({'agents': {'list': []}}))
+    monkeypatch.setenv('HOME', str(tmp_path))
+    monkeypatch.setattr(dashboard, 'CONFIG_PATH', config)
+    monkeypatch.setattr(dashboard, 'AGENTS_DIR', tmp_path / 'agents')
+    return dashboard.app.test_client()
+
+
+def _agent_ids():
+    return [a['id'] for a in dashboard.load_config()['agents']['list']]
+
+
+def test_null_fields_are_empty(client):
+    assert client.post('/api/agents/add', json={'id': None}).status_code == 400
+    resp = client.post('/api/agents/add', json={'id': 'alpha', 'model': None, 'name': None, 'fallback': None})
+    assert resp.status_code == 200
+    assert dashboard.load_config()['agents']['list'][0]['model'] == {}
+    assert _agent_ids() == ['alpha']
+
+
+@pytest.mark.parametrize('item', [
+    {'id': 'bad', 'model': 5},
+    {'id': 'bad', 'fallback': {'a': 1}},
+    {'id': 'bad', 'fallbacks': ['ok', None]},
+    {'id': 'bad', 'apps': [5]},
+    {'id': 'bad', 'apps': [{'appId': 'github', 'mode': 3}]},
+    {'id': 'bad', 'platform': ['telegram']},
+])
+def test_bulk_reports_invalid_fields_per_agent(client, item):
+    resp = client.post('/api/agents/bulk', json={'agents': [{'id': 'good', 'apps': ['github']}, item]})
+    assert resp.status_code == 200
+    results = resp.get_json()['results']
+    assert results[0]['ok'] and not results[1]['ok'] and results[1]['error']
+    assert _agent_ids() == ['good']
+
+
+def test_bulk_atomic_rejects_whole_batch(client):
+    resp = client.post('/api/agents/bulk', json={'agents': [{'id': 'good'}, {'id': 'bad', 'apps': [5]}],
+                                                 'atomic': True})
+    assert resp.status_code == 400
+    assert _agent_ids() == []
@@ -0,0 +1,62 @@
+"""App-binding upserts and the cached binding index."""
+import json
+import os
+
+import pytest
+
+import dashboard
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    config = tmp_path / 'openclaw.json'
+    config.write_text(json.dumps({'agents': {'list': [{'id': 'alpha'}, {'id': 'beta'}]},
+                                  'apps': {'bindings': [{'agentId': 'alpha', 'appId': 'gmail', 'mode': 'read_only'}]}}))
+    monkeypatch.setattr(dashboard, 'CONFIG_PATH', config)
+    monkeypatch.setattr(dashboard, '_app_bindings_index', None)
+    return dashboard.app.test_client()
+
+
+def _apps(client, agent):
+    return {b['appId']: b['mode'] for b in client.get(f'/api/apps/bindings?agent={agent}').get_json()}
+
+
+def test_unchanged_mode_is_not_an_update(client, monkeypatch):
+    saves = []
+    save_config = dashboard.save_config
+    monkeypatch.setattr(dashboard, 'save_config', lambda cfg: saves.append(1) or save_config(cfg))
+    resp = client.post('/api/apps/bindings', json={'agentId': 'alpha', 'appId': 'gmail', 'mode': 'read_only'})
+    assert resp.get_json() == {'ok': True, 'added': 0, 'updated': 0}
+    assert not saves
+    resp = client.post('/api/apps/bindings', json=[{'agentId': 'alpha', 'appId': 'gmail', 'mode': 'read_write'},
+                                                   {'agentId': 'beta', 'appId': 'gmail'}])
+    assert resp.get_json() == {'ok': True, 'added': 1, 'updated': 1}
+    assert len(saves) == 1
+
+
+def test_index_follows_writes(client):
+    assert _apps(client, 'alpha') == {'gmail': 'read_only'}
+    client.post('/api/apps/bindings', json={'agentId': 'alpha', 'appId': 'slack', 'mode': 'read_write'})
+    assert _apps(client, 'alpha') == {'gmail': 'read_only', 'slack': 'read_write'}
+    client.post('/api/apps/bindings/remove', json={'agentId': 'alpha', 'appId': 'gmail'})
+    assert _apps(client, 'alpha') == {'slack': 'read_write'}
+    assert client.get('/api/apps/bindings?agent=alpha&app=slack').get_json()[0]['mode'] == 'read_write'
+
+
+def test_index_invalidated_by_save_config(client):
+    assert _apps(client, 'beta') == {}
+    cfg = dashboard.load_config()
+    cfg['apps']['bindings'].append({'agentId': 'beta', 'appId': 'notion', 'mode': 'write_only'})
+    dashboard.save_config(cfg)
+    assert dashboard._app_bindings_index is None
+    assert _apps(client, 'beta') == {'notion': 'write_only'}
+
+
+def test_index_notices_external_edits(client):
+    assert _apps(client, 'alpha') == {'gmail': 'read_only'}
+    cfg = json.loads(dashboard.CONFIG_PATH.read_text())
+    cfg['apps']['bindings'][0]['mode'] = 'event_listener'
+    dashboard.CONFIG_PATH.write_text(json.dumps(cfg, indent=4))
+    st = os.stat(dashboard.CONFIG_PATH)
+    os.utime(dashboard.CONFIG_PATH, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert _apps(client, 'alpha') == {'gmail': 'event_listener'}
@@ -0,0 +1,50 @@
+"""Recurrence rule validation on calendar create/update."""
+import json
+
+import pytest
+
+import dashboard
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard, 'HQ_DIR', tmp_path)
+    monkeypatch.setattr(dashboard, 'CALENDAR_PATH', tmp_path / 'calendar.json')
+    (tmp_path / 'calendar.json').write_text(json.dumps({'events': [], 'nextId': 1}))
+    return dashboard.app.test_client()
+
+
+@pytest.mark.parametrize('rrule', [5, ['FREQ=DAILY'], {'freq': 'DAILY'}, 'FREQ=HOURLY'])
+def test_invalid_rrule_is_rejected(client, rrule):
+    assert client.post('/api/calendar', json={'title': 't', 'date': '2026-01-01', 'rrule': rrule}).status_code == 400
+    eid = client.post('/api/calendar', json={'title': 't', 'date': '2026-01-01'}).get_json()['id']
+    assert client.post(f'/api/calendar/{eid}/update', json={'rrule': rrule}).status_code == 400
+
+
+def test_valid_rrule_is_stored(client):
+    event = client.post('/api/calendar', json={'title': 't', 'date': '2026-01-01', 'rrule': 'freq=weekly'}).get_json()
+    assert event['rrule'] == 'FREQ=WEEKLY'
+
+
+@pytest.mark.parametrize('body', [{'date': 'not-a-date'}, {'date': None}, {'title': ''}, {'title': 5},
+                                  {'time': '25:99'}, {'time': ['09:00']}, {'agentId': {'id': 'x'}}, ['title']])
+def test_invalid_update_is_rejected(client, body):
+    event = client.post('/api/calendar', json={'title': 't', 'date': '2026-01-01', 'time': '09:00'}).get_json()
+    assert client.post(f"/api/calendar/{event['id']}/update", json=body).status_code == 400
+    stored = json.loads(dashboard.CALENDAR_PATH.read_text())['events'][0]
+    assert stored == event
+
+
+@pytest.mark.parametrize('body', [{'title': 't', 'date': '2026-02-30'}, {'title': 't', 'date': '2026-01-01', 'time': 'noon'},
+                                  {'title': ['t'], 'date': '2026-01-01'}, {'title': 't', 'date': 20260101}])
+def test_invalid_create_is_rejected(client, body):
+    assert client.post('/api/calendar', json=body).status_code == 400
+
+
+def test_update_changes_date_and_rrule(client):
+    event = client.post('/api/calendar', json={'title': 't', 'date': '2026-01-01', 'rrule': 'FREQ=DAILY'}).get_json()
+    updated = client.post(f"/api/calendar/{event['id']}/update",
+                          json={'date': '2026-02-01', 'title': ' renamed ', 'time': None}).get_json()
+    assert (updated['date'], updated['title'], updated['time'], updated['rrule']) == ('2026-02-01', 'renamed', '00:00', 'FREQ=DAILY')
+    updated = client.post(f"/api/calendar/{event['id']}/update", json={'rrule': ''}).get_json()
+    assert 'rrule' not in updated
@@ -0,0 +1,68 @@
+"""Cron expression parsing and next-fire computation."""
+from datetime import datetime
+
+import pytest
+
+import dashboard
+
+
+def _next(expr, after):
+    return dashboard.cron_next(dashboard.parse_cron(expr), after)
+
+
+@pytest.mark.parametrize('macro, expr', [('@hourly', '0 * * * *'), ('@daily', '0 0 * * *'),
+                                         ('@WEEKLY', '0 0 * * 0'), ('@monthly', '0 0 1 * *'),
+                                         ('@yearly', '0 0 1 1 *')])
+def test_macros(macro, expr):
+    assert dashboard.parse_cron(macro) == dashboard.parse_cron(expr)
+
+
+def test_steps_ranges_and_names():
+    minutes, hours, days, months, weekdays, _, _ = dashboard.parse_cron('*/15 9-17/4 1,15 jan-mar mon-fri')
+    assert minutes == (0, 15, 30, 45)
+    assert hours == (9, 13, 17)
+    assert days == (1, 15)
+    assert months == (1, 2, 3)
+    assert weekdays == (1, 2, 3, 4, 5)
+    assert dashboard.parse_cron('0 0 * * 7')[4] == (0,)
+    assert dashboard.parse_cron('5/20 * * * *')[0] == (5, 25, 45)
+
+
+@pytest.mark.parametrize('expr', ['', '* * * *', '60 * * * *', '* 24 * * *', '* * 0 * *', '*/0 * * * *',
+                                  '5-1 * * * *', '* * * foo *'])
+def test_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        dashboard.parse_cron(expr)
+
+
+def test_next_fire_is_strictly_after():
+    assert _next('*/15 * * * *', datetime(2026, 1, 1, 10, 15, 30)) == datetime(2026, 1, 1, 10, 30)
+    assert _next('0 9 * * *', datetime(2026, 1, 1, 9, 0)) == datetime(2026, 1, 2, 9, 0)
+    assert _next('30 23 31 12 *', datetime(2026, 12, 31, 23, 30)) == datetime(2027, 12, 31, 23, 30)
+
+
+def test_day_of_month_or_day_of_week():
+    # 2026-03-02 is a Monday: both restricted, either matches
+    assert _next('0 0 13 * 1', datetime(2026, 3, 1)) == datetime(2026, 3, 2)
+    assert _next('0 0 13 * 1', datetime(2026, 3, 12)) == datetime(2026, 3, 13)
+    # one field unrestricted (also as a '*' step): both must match
+    assert _next('0 0 13 * *', datetime(2026, 3, 1)) == datetime(2026, 3, 13)
+    assert _next('0 0 */2 * 1', datetime(2026, 3, 1)) == datetime(2026, 3, 9)
+    assert _next('0 0 13 * */7', datetime(2026, 3, 1)) == datetime(2026, 9, 13)
+
+
+def test_leap_day_and_impossible_dates():
+    assert _next('0 0 29 2 *', datetime(2026, 1, 1)) == datetime(2028, 2, 29)
+    assert _next('0 0 30 2 *', datetime(2026, 1, 1)) is None
+    assert _next('0 0 31 4,6,9,11 *', datetime(2026, 1, 1)) is None
+
+
+@pytest.mark.parametrize('schedule', [{'expr': 5}, {'expr': None}, {}, 12, None, ['0 * * * *']])
+def test_non_string_schedule_has_no_next_run(schedule):
+    assert dashboard._cron_expr({'schedule': schedule}) == ''
+    assert dashboard.cron_next_run({'schedule': schedule}) is None
+
+
+def test_gateway_schedule_dict():
+    job = {'schedule': {'kind': 'cron', 'expr': '0 9 * * *'}}
+    assert dashboard.cron_next_run(job, datetime(2026, 1, 1, 10)) == datetime(2026, 1, 2, 9)
@@ -0,0 +1,39 @@
+"""Current-task preview taken from the latest user message of a transcript."""
+import json
+
+import dashboard
+
+
+def _user(content):
+    return json.dumps({'type': 'message', 'message': {'role': 'user', 'content': content}}) + '\n'
+
+
+def _assistant(text):
+    return json.dumps({'type': 'message', 'message': {'role': 'assistant', 'content': text}}) + '\n'
+
+
+def test_latest_user_text_wins(tmp_path):
+    sf = tmp_path / 's.jsonl'
+    sf.write_text(_user('first') + _assistant('ok') + _user([{'type': 'text', 'text': 'second'}]) + _assistant('ok'))
+    assert dashboard._last_user_text(str(sf)) == 'second'
+
+
+def test_empty_user_messages_fall_back_to_older(tmp_path):
+    sf = tmp_path / 's.jsonl'
+    sf.write_text(
+        _user('deploy the gateway')
+        + _user([{'type': 'image', 'data': '...'}, {'type': 'text', 'text': '  '}, {'type': 'text', 'text': 'look'}])
+        + _user([{'type': 'text', 'text': ''}, {'type': 'tool_result', 'content': 'x'}])
+        + _user('')
+        + _user([{'type': 'text', 'text': None}])
+        + '"not an object"\n'
+    )
+    assert dashboard._last_user_text(str(sf)) == 'look'
+    sf.write_text(_user('deploy the gateway') + _user('   ') + _user([]))
+    assert dashboard._last_user_text(str(sf)) == 'deploy the gateway'
+
+
+def test_no_user_text(tmp_path):
+    sf = tmp_path / 's.jsonl'
+    sf.write_text(_assistant('hi') + _user(''))
+    assert dashboard._last_user_text(str(sf)) is None
@@ -0,0 +1,130 @@
+"""Snapshot retention, blob collection and input validation of the .md backup store."""
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import dashboard
+
+AGENT = 'alpha'
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    agents_dir = tmp_path / 'agents'
+    (agents_dir / AGENT / 'agent').mkdir(parents=True)
+    target = tmp_path / 'backup'
+    target.mkdir()
+    config = tmp_path / 'openclaw.json'
+    config.write_text(json.dumps({'agents': {'list': [{'id': AGENT}]}, 'md_backup': {'path': str(target)}}))
+    monkeypatch.setattr(dashboard, 'CONFIG_PATH', config)
+    monkeypatch.setattr(dashboard, 'AGENTS_DIR', agents_dir)
+    monkeypatch.setattr(dashboard, '_restart_backup_timer', lambda: None)
+    return agents_dir / AGENT / 'agent', target
+
+
+def _ids(start, step, count):
+    return [(start + step * i).strftime('%Y%m%dT%H%M%S') for i in range(count)]
+
+
+def test_retention_keeps_newest_per_period():
+    ids = _ids(datetime(2026, 1, 1), timedelta(minutes=30), 96)
+    keep = dashboard._retained_snapshots(ids, {'hourly': 3, 'daily': 2, 'weekly': 0, 'monthly': 0})
+    assert keep == {ids[-1], ids[-3], ids[-5], ids[47]}
+
+
+def test_retention_always_keeps_newest():
+    ids = _ids(datetime(2026, 1, 1), timedelta(days=1), 5)
+    assert dashboard._retained_snapshots(ids, {'hourly': 0, 'daily': 0, 'weekly': 0, 'monthly': 0}) == {ids[-1]}
+
+
+def test_same_second_snapshots_keep_the_latest():
+    now = datetime(2026, 1, 1, 12)
+    ids = []
+    for _ in range(3):
+        ids.append(dashboard._next_snapshot_id(ids, now))
+    assert ids == sorted(ids, key=dashboard._snapshot_order)
+    assert dashboard._retained_snapshots(ids, {'hourly': 1}) == {ids[-1]}
+
+
+def _blobs(target):
+    return {p.name for p in (target / 'blobs').rglob('*') if p.is_file()}
+
+
+def test_prune_collects_unreferenced_blobs(home):
+    agent_dir, target = home
+    (agent_dir / 'SOUL.md').write_text('v1')
+    first = dashboard.perform_md_backup(target)['snapshot']
+    old = '20200101T000000'
+    os.replace(dashboard._snapshot_path(target, first), dashboard._snapshot_path(target, old))
+    (agent_dir / 'SOUL.md').write_text('v2')
+    second = dashboard.perform_md_backup(target)['snapshot']
+    assert dashboard.list_snapshot_ids(target) == [old, second]
+    assert len(_blobs(target)) == 2
+    (target / 'blobs' / 'ab').mkdir(exist_ok=True)
+    (target / 'blobs' / 'ab' / 'stale.part').write_bytes(b'x')
+
+    result = dashboard.prune_snapshots(target, {'hourly': 0, 'daily': 0, 'weekly': 0, 'monthly': 0})
+    assert result['snapshots_removed'] == 1 and result['blobs_removed'] == 2
+    assert dashboard.list_snapshot_ids(target) == [second]
+    entry = dashboard.load_snapshot(target, second)['files'][f'agents/{AGENT}/SOUL.md']
+    assert _blobs(target) == {entry['sha256']}
+
+
+@pytest.mark.parametrize('content', ['{not json', '[]', '{"files": {"agents/alpha/SOUL.md": {"size": 1}}}',
+                                     '{"files": {"agents/alpha/SOUL.md": {"size": 1, "sha256": "../../x"}}}'])
+def test_corrupt_snapshot_is_skipped(home, content):
+    agent_dir, target = home
+    (agent_dir / 'SOUL.md').write_text('v1')
+    good = dashboard.perform_md_backup(target)['snapshot']
+    blobs = _blobs(target)
+    bad = dashboard._next_snapshot_id([good], datetime.now())
+    dashboard._snapshot_path(target, bad).write_text(content)
+    with pytest.raises(ValueError):
+        dashboard.load_snapshot(target, bad)
+
+    client = dashboard.app.test_client()
+    listed = client.get('/api/md-backup/snapshots').get_json()['snapshots']
+    assert [s['id'] for s in listed] == [good]
+    assert client.post('/api/md-backup/restore', json={'snapshot': bad, 'agent': AGENT}).status_code == 400
+
+    result = dashboard.perform_md_backup(target)
+    assert result['ok'] and result['files_copied'] == 0 and result['files_skipped'] == 1
+    assert _blobs(target) == blobs
+
+    # while the newest snapshot is unreadable, blobs stay even if they look unreferenced
+    latest = dashboard.list_snapshot_ids(target)
+    dashboard._snapshot_path(target, dashboard._next_snapshot_id(latest, datetime.now())).write_text(content)
+    (target / 'blobs' / 'ab').mkdir(exist_ok=True)
+    (target / 'blobs' / 'ab' / 'stale.part').write_bytes(b'x')
+    assert dashboard.prune_snapshots(target)['blobs_removed'] == 0
+    assert _blobs(target) == blobs | {'stale.part'}
+
+
+@pytest.mark.parametrize('retention', [{'daily': -1}, {'daily': 'x'}, {'daily': 1.5}, {'daily': True}, {'yearly': 1}])
+def test_invalid_retention_is_rejected(home, retention):
+    resp = dashboard.app.test_client().post('/api/md-backup/settings', json={'retention': retention})
+    assert resp.status_code == 400
+
+
+@pytest.mark.parametrize('files', ['SOUL.md', [1], [None], {'SOUL.md': 1}])
+def test_restore_files_must_be_strings(home, files):
+    agent_dir, target = home
+    (agent_dir / 'SOUL.md').write_text('v1')
+    snapshot = dashboard.perform_md_backup(target)['snapshot']
+    resp = dashboard.app.test_client().post('/api/md-backup/restore',
+                                            json={'snapshot': snapshot, 'agent': AGENT, 'files': files})
+    assert resp.status_code == 400
+
+
+def test_restore_round_trip(home):
+    agent_dir, target = home
+    (agent_dir / 'SOUL.md').write_text('v1')
+    snapshot = dashboard.perform_md_backup(target)['snapshot']
+    (agent_dir / 'SOUL.md').write_text('changed')
+    resp = dashboard.app.test_client().post('/api/md-backup/restore',
+                                            json={'snapshot': snapshot, 'agent': AGENT, 'files': ['SOUL.md']})
+    assert resp.get_json()['files_restored'] == 1
+    assert (agent_dir / 'SOUL.md').read_text() == 'v1'
+    assert not os.path.exists(agent_dir / 'SOUL.md.restore')
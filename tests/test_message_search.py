@@ -0,0 +1,75 @@
+"""Transcript search and export: date bounds and index freshness."""
+import json
+from datetime import datetime
+
+import pytest
+
+import dashboard
+
+AGENT = 'alpha'
+
+
+def _ms(*args):
+    return int(datetime(*args).timestamp() * 1000)
+
+
+def _message(text, ts, role='user'):
+    return json.dumps({'type': 'message', 'message': {'role': role, 'timestamp': ts,
+                                                      'content': [{'type': 'text', 'text': text}]}}) + '\n'
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    agents_dir = tmp_path / 'agents'
+    sessions_dir = agents_dir / AGENT / 'sessions'
+    sessions_dir.mkdir(parents=True)
+    config = tmp_path / 'openclaw.json'
+    config.write_text(json.dumps({'agents': {'list': [{'id': AGENT}]}}))
+    monkeypatch.setattr(dashboard, 'CONFIG_PATH', config)
+    monkeypatch.setattr(dashboard, 'AGENTS_DIR', agents_dir)
+    monkeypatch.setattr(dashboard, 'HQ_DIR', tmp_path / 'hq')
+    monkeypatch.setattr(dashboard, 'SEARCH_DB_PATH', tmp_path / 'hq' / 'search.db')
+    transcript = sessions_dir / 'sess.jsonl'
+    transcript.write_text(_message('deploy early', _ms(2026, 3, 1, 0, 0)) +
+                          _message('deploy late', _ms(2026, 3, 1, 23, 30)) +
+                          _message('deploy next day', _ms(2026, 3, 2, 9, 0)))
+    (sessions_dir / 'sessions.json').write_text(json.dumps({f'agent:{AGENT}:main': {'sessionFile': str(transcript)}}))
+    return transcript
+
+
+def _search(**params):
+    resp = dashboard.app.test_client().get('/api/search/messages', query_string={'q': 'deploy', **params})
+    assert resp.status_code == 200
+    return sorted(r['timestamp'] for r in resp.get_json()['results'])
+
+
+def test_date_only_to_includes_the_whole_day(home):
+    assert _search(**{'from': '2026-03-01', 'to': '2026-03-01'}) == [_ms(2026, 3, 1, 0, 0), _ms(2026, 3, 1, 23, 30)]
+    assert _search(to='2026-03-01T12:00:00') == [_ms(2026, 3, 1, 0, 0)]
+    assert len(_search(to=str(_ms(2026, 3, 2, 9, 0)))) == 3
+
+
+def test_to_ms_end_of_day():
+    assert dashboard._to_ms('2026-03-01', end_of_day=True) == _ms(2026, 3, 2) - 1
+    assert dashboard._to_ms('2026-03-01') == _ms(2026, 3, 1)
+    assert dashboard._to_ms('1772323200', end_of_day=True) == 1772323200000
+
+
+def test_export_date_only_to_includes_the_whole_day(home):
+    resp = dashboard.app.test_client().get('/api/export/sessions', query_string={'from': '2026-03-01', 'to': '2026-03-01'})
+    assert resp.status_code == 200
+    rows = [json.loads(line) for line in resp.get_data().splitlines()]
+    assert sorted(r['timestamp'] for r in rows) == [_ms(2026, 3, 1, 0, 0), _ms(2026, 3, 1, 23, 30)]
+
+
+def test_unchanged_transcripts_skip_the_index(home, monkeypatch):
+    assert dashboard.index_transcripts() == 3
+    opened = []
+    search_db = dashboard._search_db
+    monkeypatch.setattr(dashboard, '_search_db', lambda: opened.append(1) or search_db())
+    assert dashboard.index_transcripts() == 0
+    assert not opened
+    with open(home, 'a') as f:
+        f.write(_message('deploy again', _ms(2026, 3, 3)))
+    assert dashboard.index_transcripts() == 1
+    assert opened
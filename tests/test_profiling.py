@@ -0,0 +1,29 @@
+"""On-demand request profiling is gated by a secret token."""
+import pytest
+
+import dashboard
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard, 'PROFILES_DIR', tmp_path / 'profiles')
+    monkeypatch.setattr(dashboard, 'PROFILING_ENABLED', True)
+    monkeypatch.setattr(dashboard, 'PROFILE_TOKEN', 's3cret')
+    return dashboard.app.test_client()
+
+
+def _profiled(resp):
+    return resp.headers.get('X-HQ-Profile', '').endswith('.prof')
+
+
+def test_profile_needs_the_token(client):
+    assert not _profiled(client.get('/api/debug/profiles?__profile=1'))
+    assert not _profiled(client.get('/api/debug/profiles', headers={'X-HQ-Profile': 's3cre'}))
+    assert _profiled(client.get('/api/debug/profiles', headers={'X-HQ-Profile': 's3cret'}))
+    assert _profiled(client.get('/api/debug/profiles?__profile=s3cret'))
+
+
+def test_no_token_disables_on_demand_profiling(client, monkeypatch):
+    monkeypatch.setattr(dashboard, 'PROFILE_TOKEN', '')
+    assert not _profiled(client.get('/api/debug/profiles?__profile='))
+    assert not _profiled(client.get('/api/debug/profiles?__profile=1'))
@@ -0,0 +1,64 @@
+"""Task search index: incremental maintenance and prefix ranking."""
+import pytest
+
+import dashboard
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard, 'HQ_DIR', tmp_path)
+    monkeypatch.setattr(dashboard, 'TASKS_PATH', tmp_path / 'tasks.json')
+    monkeypatch.setattr(dashboard, '_task_index', None)
+    return dashboard.app.test_client()
+
+
+def _search(client, q, **params):
+    return client.get('/api/tasks/search', query_string={'q': q, **params}).get_json()
+
+
+def _rebuilt():
+    with dashboard._task_index_lock:
+        dashboard._task_index = None
+        return dashboard._task_index_get()
+
+
+def _snapshot(index):
+    return (
+        {tid: dict(terms) for tid, terms in index['terms'].items()},
+        {token: dict(p) for token, p in index['postings'].items()},
+        list(index['vocab']),
+    )
+
+
+def test_incremental_index_matches_rebuild(client):
+    a = client.post('/api/tasks', json={'title': 'Deploy gateway', 'assignedTo': 'ops'}).get_json()
+    b = client.post('/api/tasks', json={'title': 'Write deploy notes', 'description': 'gateway rollout'}).get_json()
+    client.post('/api/tasks', json={'title': 'Unrelated chore'})
+    assert _search(client, 'deploy')['total'] == 2
+
+    client.post(f"/api/tasks/{a['id']}/update", json={'title': 'Rotate keys'})
+    client.post(f"/api/tasks/{b['id']}/delete")
+    with dashboard._task_index_lock:
+        incremental = _snapshot(dashboard._task_index_get())
+    assert incremental == _snapshot(_rebuilt())
+    assert incremental[2] == sorted(incremental[1])
+    assert 'deploy' not in incremental[1] and 'gateway' not in incremental[1]
+    assert _search(client, 'rot')['total'] == 1
+    assert _search(client, 'deploy')['total'] == 0
+
+
+def test_exact_match_outranks_prefix_and_title_outranks_description(client):
+    client.post('/api/tasks', json={'title': 'deployment plan'})
+    exact = client.post('/api/tasks', json={'title': 'deploy now'}).get_json()
+    desc = client.post('/api/tasks', json={'title': 'misc', 'description': 'deploy'}).get_json()
+    hits = [t['id'] for t in _search(client, 'deploy')['tasks']]
+    assert hits[0] == exact['id']
+    assert hits[-1] == desc['id']
+
+
+def test_prefix_expansion_is_not_truncated(client):
+    for i in range(300):
+        client.post('/api/tasks', json={'title': f'item{i:03d}'})
+    result = _search(client, 'item', limit=5)
+    assert result['total'] == 300
+    assert len(result['tasks']) == 5
@@ -0,0 +1,129 @@
+"""Regression tests for transcript ingestion feeding /api/usage, /api/agents/latency and /api/activity."""
+import json
+import time
+
+import pytest
+
+import dashboard
+
+AGENT = 'alpha'
+SESSION_KEY = 'agent:alpha:telegram:1'
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    agents_dir = tmp_path / 'agents'
+    (agents_dir / AGENT / 'sessions').mkdir(parents=True)
+    config = tmp_path / 'openclaw.json'
+    config.write_text(json.dumps({'agents': {'list': [{'id': AGENT, 'model': {'primary': 'anthropic/claude'}}]}}))
+    monkeypatch.setattr(dashboard, 'CONFIG_PATH', config)
+    monkeypatch.setattr(dashboard, 'AGENTS_DIR', agents_dir)
+    states = (dashboard._transcript_offsets, dashboard._session_records, dashboard._usage_rollups,
+              dashboard._latency_sketches, dashboard._activity)
+    for state in states:
+        state.clear()
+    yield agents_dir / AGENT / 'sessions'
+    for state in states:
+        state.clear()
+
+
+def _write_session(sessions_dir, lines, input_tokens, output_tokens):
+    transcript = sessions_dir / 'sess.jsonl'
+    transcript.write_text(''.join(line + '\n' for line in lines))
+    now_ms = int(time.time() * 1000)
+    (sessions_dir / 'sessions.json').write_text(json.dumps({SESSION_KEY: {
+        'sessionId': 'sess',
+        'sessionFile': str(transcript),
+        'updatedAt': now_ms,
+        'lastChannel': 'telegram',
+        'inputTokens': input_tokens,
+        'outputTokens': output_tokens,
+    }}))
+    return transcript
+
+
+def _assistant_lines(count, inp=10, out=2):
+    ts = int(time.time() * 1000) - count * 1000
+    return [json.dumps({'type': 'message', 'message': {
+        'role': 'assistant', 'timestamp': ts + i * 1000, 'model': 'claude', 'provider': 'anthropic',
+        'content': [{'type': 'text', 'text': 'ok'}], 'usage': {'input': inp, 'output': out},
+    }}) for i in range(count)]
+
+
+def _usage_totals():
+    resp = dashboard.app.test_client().get('/api/usage?groupBy=agent')
+    assert resp.status_code == 200
+    rows = resp.get_json()['rows']
+    return sum(r['input'] for r in rows), sum(r['output'] for r in rows)
+
+
+def test_usage_spanning_batches_is_counted_once(home):
+    count = dashboard.TRANSCRIPT_BATCH * 2 + 500
+    _write_session(home, _assistant_lines(count), input_tokens=count * 10, output_tokens=count * 2)
+    assert _usage_totals() == (count * 10, count * 2)
+    # a second pass with nothing new adds nothing
+    assert _usage_totals() == (count * 10, count * 2)
+
+
+def test_shrunk_transcript_is_not_recounted(home):
+    lines = _assistant_lines(50)
+    transcript = _write_session(home, lines, input_tokens=500, output_tokens=100)
+    assert _usage_totals() == (500, 100)
+    transcript.write_text(''.join(line + '\n' for line in lines[:10]))
+    assert _usage_totals() == (500, 100)
+
+
+def test_non_object_lines_are_skipped(home):
+    lines = _assistant_lines(5)
+    _write_session(home, lines[:2] + ['[1, 2]', '"text"', '42'] + lines[2:], input_tokens=50, output_tokens=10)
+    client = dashboard.app.test_client()
+    for url in ('/api/usage', '/api/agents/latency', '/api/activity'):
+        assert client.get(url).status_code == 200
+    assert _usage_totals() == (50, 10)
+
+
+@pytest.mark.parametrize('usage', [{'input': 'lots', 'output': 2}, {'input': -5, 'output': 2},
+                                   {'input': 10 ** 30, 'output': 2}, {'input': [1], 'output': 2},
+                                   {'input': float('inf'), 'output': 2}])
+def test_malformed_token_counts_skip_the_line(home, usage):
+    lines = _assistant_lines(3)
+    bad = json.loads(lines[1])
+    bad['message']['usage'] = usage
+    lines[1] = json.dumps(bad)
+    _write_session(home, lines, input_tokens=20, output_tokens=4)
+    assert _usage_totals() == (20, 4)
+
+
+def test_malformed_fields_do_not_break_ingestion(home):
+    lines = _assistant_lines(2)
+    weird = json.loads(lines[0])
+    weird['message'].update(timestamp=float('inf'), model=['x'], role=['assistant'])
+    far = json.loads(lines[1])
+    far['message']['timestamp'] = 10 ** 17
+    _write_session(home, [json.dumps(weird), json.dumps(far)] + _assistant_lines(1), input_tokens='many',
+                   output_tokens=None)
+    client = dashboard.app.test_client()
+    for url in ('/api/usage', '/api/agents/latency', '/api/activity'):
+        assert client.get(url).status_code == 200
+
+
+def test_state_of_removed_sessions_is_pruned(home):
+    transcript = _write_session(home, _assistant_lines(3), input_tokens=30, output_tokens=6)
+    _usage_totals()
+    assert str(transcript) in dashboard._transcript_offsets
+    assert (AGENT, SESSION_KEY) in dashboard._session_records
+    transcript.unlink()
+    (home / 'sessions.json').write_text('{}')
+    _usage_totals()
+    assert str(transcript) not in dashboard._transcript_offsets
+    assert (AGENT, SESSION_KEY) not in dashboard._session_records
+    assert _usage_totals() == (30, 6)
+
+
+def test_unreadable_sessions_json_keeps_state(home):
+    transcript = _write_session(home, _assistant_lines(3), input_tokens=30, output_tokens=6)
+    _usage_totals()
+    (home / 'sessions.json').write_text('{truncated')
+    _usage_totals()
+    assert str(transcript) in dashboard._transcript_offsets
+    assert (AGENT, SESSION_KEY) in dashboard._session_records
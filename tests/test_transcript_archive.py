@@ -0,0 +1,108 @@
+"""Transcript archival: seekable gzip frames, in-place extension and live-session safety."""
+import json
+import os
+import time
+
+import pytest
+
+import dashboard
+
+AGENT = 'alpha'
+
+
+def _lines(start, count):
+    return ''.join(json.dumps({'type': 'message', 'n': i, 'pad': 'x' * (i % 97)}) + '\n'
+                   for i in range(start, start + count)).encode()
+
+
+def _read_all(session_file):
+    with dashboard.TranscriptReader(session_file) as reader:
+        return reader.read()
+
+
+@pytest.fixture
+def session_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(dashboard, 'TRANSCRIPT_FRAME_BYTES', 4096)
+    dashboard._archive_indexes.clear()
+    return str(tmp_path / 'sess.jsonl')
+
+
+def test_reader_round_trip_over_archive_extended_in_place(session_file):
+    first, second, third = _lines(0, 300), _lines(300, 200), _lines(500, 50)
+    with open(session_file, 'wb') as f:
+        f.write(first)
+    assert dashboard.archive_transcript(session_file)[0] == len(first)
+    assert not os.path.exists(session_file)
+    with open(session_file, 'wb') as f:
+        f.write(second)
+    old_archive = open(session_file + dashboard.ARCHIVE_SUFFIX, 'rb').read()
+    assert dashboard.archive_transcript(session_file)[0] == len(second)
+    new_archive = open(session_file + dashboard.ARCHIVE_SUFFIX, 'rb').read()
+    assert new_archive.startswith(old_archive)
+    with open(session_file, 'wb') as f:
+        f.write(third)
+
+    data = first + second + third
+    assert dashboard.transcript_size(session_file) == len(data)
+    assert _read_all(session_file) == data
+    with dashboard.TranscriptReader(session_file) as reader:
+        for offset in (0, 1, len(first) - 5, len(first), len(first) + 4097, len(first) + len(second) + 3):
+            reader.seek(offset)
+            assert reader.read(64) == data[offset:offset + 64]
+
+
+def test_leftover_aside_file_is_restored_before_archiving(session_file):
+    with open(session_file + dashboard.ARCHIVE_ASIDE_SUFFIX, 'wb') as f:
+        f.write(_lines(0, 10))
+    with open(session_file, 'wb') as f:
+        f.write(_lines(10, 5))
+    dashboard.archive_transcript(session_file)
+    assert not os.path.exists(session_file + dashboard.ARCHIVE_ASIDE_SUFFIX)
+    assert _read_all(session_file) == _lines(0, 15)
+
+
+def test_absorbed_live_file_is_dropped_only_if_unchanged(session_file):
+    with open(session_file, 'wb') as f:
+        f.write(_lines(0, 20))
+    dashboard.archive_transcript(session_file)
+    idx = dashboard._archive_index(session_file)
+    # Simulate an archival interrupted before the unlink
+    with open(session_file, 'wb') as f:
+        f.write(_lines(0, 20))
+    os.utime(session_file, ns=(idx['absorbed'][0], idx['absorbed'][0]))
+    assert dashboard._transcript_segments(session_file)[-1][2] is not None
+    assert dashboard.archive_transcript(session_file) == (0, 0)
+    assert not os.path.exists(session_file)
+    assert _read_all(session_file) == _lines(0, 20)
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    agents_dir = tmp_path / 'agents'
+    sessions_dir = agents_dir / AGENT / 'sessions'
+    sessions_dir.mkdir(parents=True)
+    config = tmp_path / 'openclaw.json'
+    config.write_text(json.dumps({'agents': {'list': [{'id': AGENT}]}}))
+    monkeypatch.setattr(dashboard, 'CONFIG_PATH', config)
+    monkeypatch.setattr(dashboard, 'AGENTS_DIR', agents_dir)
+    dashboard._archive_indexes.clear()
+    old = time.time() - 10 * 86400
+    sessions = {}
+    for name in ('idle', 'held', 'recent'):
+        sf = sessions_dir / f'{name}.jsonl'
+        sf.write_bytes(_lines(0, 5))
+        os.utime(sf, (old, old))
+        sessions[f'agent:{AGENT}:{name}'] = {'sessionFile': str(sf), 'updatedAt': int(old * 1000)}
+    sessions[f'agent:{AGENT}:recent']['updatedAt'] = int(time.time() * 1000)
+    (sessions_dir / 'sessions.json').write_text(json.dumps(sessions))
+    return sessions_dir
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='open files are detected through /proc')
+def test_cold_archival_skips_active_sessions(home):
+    with open(home / 'held.jsonl', 'ab'):
+        result = dashboard.archive_cold_transcripts(1)
+    assert result['archived'] == 1
+    assert not (home / 'idle.jsonl').exists()
+    assert (home / 'held.jsonl').exists()
+    assert (home / 'recent.jsonl').exists()